@@ -4,4 +4,7 @@ from bson.objectid import ObjectId
 
 from scalymongo.document import Document
 from scalymongo.connection import Connection
+from scalymongo.aio import AsyncConnection
+from scalymongo.batching import FindOneBatch
+from scalymongo.cache import DocumentCache
 from scalymongo.schema_operators import OR, IS
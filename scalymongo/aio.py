@@ -0,0 +1,523 @@
+"""
+Asynchronous
+============
+
+Non-blocking counterparts of :class:`~scalymongo.connection.Connection` and
+the :class:`~scalymongo.document.Document` query methods built on Motor_'s
+Tornado client.
+
+Every method that talks to the server returns a Tornado future which can be
+yielded from a coroutine.  Query validation (e.g. :meth:`check_query_sharding`)
+still happens immediately when the method is called:
+
+.. code-block:: python
+
+    @gen.coroutine
+    def rename(connection, owner, name):
+        user = yield connection.models.User.find_one({'owner': owner})
+        yield user.modify({'$set': {'name': name}})
+
+.. _Motor: https://motor.readthedocs.io/
+
+"""
+try:
+    from motor.motor_tornado import MotorClient
+except ImportError:  # motor is optional.
+    MotorClient = None
+try:
+    from tornado.concurrent import Future
+except ImportError:  # Tornado is installed along with motor.
+    Future = None
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from scalymongo.document import (
+    _record_inserted,
+    _record_write_errors,
+    get_registration_log,
+)
+from scalymongo.connection import (
+    ConnectedDocumentCache,
+    DocumentProxy,
+    get_document_collection,
+)
+from scalymongo.errors import ModifyFailedError, UnsafeBehaviorError
+from scalymongo.helpers import ClassDefault, is_update_modifier
+from scalymongo.modifiers import check_local_update_modifier
+from scalymongo.schema import SchemaDocument
+
+
+class AsyncConnection(ConnectedDocumentCache):
+    """An asynchronous connection to a MongoDB database.
+
+    Models are accessed through :attr:`models` just like on a
+    :class:`~scalymongo.connection.Connection`, but their query methods
+    return futures.
+
+    All arguments are passed to :class:`motor.motor_tornado.MotorClient`.
+
+    :keyword client: (optional) an already created Motor style client to use
+        instead (e.g. an in-process stand-in server for tests).
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        client = kwargs.pop('client', None)
+        if client is None:
+            if MotorClient is None:
+                raise ImportError('AsyncConnection requires motor.')
+            client = MotorClient(*args, **kwargs)
+        self.client = client
+        ConnectedDocumentCache.__init__(self)
+        self.__models = DocumentProxy(self, get_registration_log())
+
+    def __getitem__(self, name):
+        return self.client[name]
+
+    def _make_connected_document(self, document):
+        """Create a new asynchronous subclass of `document` bound to this
+        connection.
+        """
+        database = self[document.__database__]
+        attrs = {
+            'connection': self,
+            'database': database,
+            'collection': get_document_collection(database, document),
+        }
+        return type('AsyncConnected{0}'.format(document.__name__),
+                    (AsyncDocumentMixin, document),
+                    attrs)
+
+    @property
+    def models(self):
+        """The :class:`~scalymongo.connection.DocumentProxy` for all models on
+        this connection.
+        """
+        return self.__models
+
+    def resolved(self, value):
+        """Return a future already resolved to `value`."""
+        return _resolved(value)
+
+
+class AsyncDocumentMixin(object):
+    """Mixin replacing the blocking :class:`~scalymongo.document.Document`
+    methods with ones returning futures.
+
+    :meth:`~scalymongo.document.Document.insert_many` and
+    :meth:`~scalymongo.document.Document.insert_prepared` return a future for
+    their :class:`~scalymongo.document.BulkInsertResult`.  Methods which
+    can't be made non-blocking (e.g.
+    :meth:`~scalymongo.document.Document.paginate` and lazy documents) raise
+    :class:`TypeError`.
+
+    This is mixed in by :meth:`AsyncConnection.connect_document`.
+
+    """
+
+    def save(self, validation=None, **kwargs):
+        """Save this document.
+
+        See :meth:`scalymongo.document.Document.save`.
+
+        """
+        if '_id' in self:
+            raise UnsafeBehaviorError(
+                'This document has already been saved once.'
+                ' Further alterations should use modify.')
+
+        self._validation_policy(validation).run(self.validate)
+        return _then(self.collection.save(self, **kwargs),
+                     lambda _: self.mark_clean())
+
+    def save_changes(self, query=None, **kwargs):
+        """Save only the changes made since this document was loaded.
+
+        See :meth:`scalymongo.document.Document.save_changes`.
+
+        """
+        if '_id' not in self:
+            raise UnsafeBehaviorError(
+                'This document has never been saved.  Use save instead.')
+
+        changes = self.get_changes()
+        if not changes:
+            return self.connection.resolved(None)
+
+        full_query = self.shard_key
+        if query:
+            full_query.update(query)
+        full_query['_id'] = self['_id']
+
+        def _saved(result):
+            if result is not None and not result.get('n'):
+                raise ModifyFailedError(
+                    'Failed to update document.  The document was not found'
+                    ' based on the criteria {0}.  Document was {1}.'.format(
+                        query, self),
+                )
+            self.mark_clean()
+
+        # Call the classmethod `update` not the one from `dict`.
+        return _then(type(self).update(full_query, changes, **kwargs), _saved)
+
+    @classmethod
+    def _insert_chunks(cls, result, chunks, ordered, write_concern):
+        """Insert each of `chunks` in turn with a bulk write.
+
+        Returns a future for `result`.
+
+        """
+        chunks = iter(chunks)
+
+        def _insert_next(completed):
+            chunk = next(chunks, None)
+            if chunk is None or (ordered and not completed):
+                return result
+
+            def _inserted(_):
+                _record_inserted(result, chunk)
+                return _insert_next(True)
+
+            def _failed(exception):
+                write_errors = None
+                if isinstance(exception, BulkWriteError):
+                    write_errors = exception.details.get('writeErrors')
+                if not write_errors:
+                    # Only the write concern failed so nothing can be said
+                    # about individual documents.
+                    raise exception
+                _record_write_errors(result, chunk, ordered, write_errors)
+                return _insert_next(False)
+
+            bulk = cls._bulk_insert_op(result, chunk, ordered)
+            return _then(
+                bulk.execute(write_concern), _inserted, on_error=_failed)
+
+        return _then(_resolved(True), _insert_next)
+
+    def reload(self):
+        """Reload this document.
+
+        See :meth:`scalymongo.document.Document.reload`.
+
+        """
+        spec = self.shard_key
+        spec['_id'] = self['_id']
+
+        def _reloaded(result):
+            # Call the parent `update` not the classmethod.
+            SchemaDocument.update(self, result)
+            self.mark_clean()
+
+        return _then(self.find_one(spec), _reloaded)
+
+    def modify(self, update, query=None, apply_locally=False,
+               validation=None, **write_concern):
+        """Modify this document using :meth:`find_and_modify`.
+
+        See :meth:`scalymongo.document.Document.modify`.
+
+        """
+        full_query = self.shard_key
+        if query:
+            full_query.update(query)
+        full_query['_id'] = self['_id']
+        options = {'new': True}
+        if validation is not None:
+            options['validation'] = validation
+        if write_concern:
+            options['writeConcern'] = write_concern
+
+        def _failed(_):
+            raise ModifyFailedError(
+                'Failed to update document.  The document was not found'
+                ' based on the criteria {0}.  Document was {1}.'.format(
+                    query, self),
+            )
+
+        if apply_locally:
+            if is_update_modifier(update):
+                check_local_update_modifier(update)
+
+            def _updated(result):
+                if result is not None and not result.get('n'):
+                    _failed(result)
+                self._apply_update(update)
+
+            # Call the classmethod `update` not the one from `dict`.
+            return _then(
+                type(self).update(full_query, update, validation=validation,
+                                  **write_concern),
+                _updated)
+
+        def _modified(result):
+            if result is None:
+                return _then(self.reload(), _failed)
+            # We have to clear the existing dictionary first in case the
+            # operation included an `$unset` or replaced the entire document.
+            self.clear()
+            # Call the parent `update` not the classmethod.
+            SchemaDocument.update(self, result)
+            self.mark_clean()
+
+        return _then(
+            self.find_and_modify(full_query, update, **options), _modified)
+
+    @classmethod
+    def find_one(cls, spec=None, allow_global=False, lazy=False, **kwargs):
+        """Find one matching document of this type.
+
+        See :meth:`scalymongo.document.Document.find_one`.  The
+        :attr:`~scalymongo.document.Document.cache` is used in the same way.
+        Lazy documents aren't supported.
+
+        """
+        if lazy:
+            _refuse_lazy()
+        if not allow_global:
+            cls.check_query_sharding(spec)
+
+        key = None
+        if cls.cache is not None and not kwargs:
+            key = cls._cache_key(spec)
+        if key is None:
+            return _then(cls.collection.find_one(spec, **kwargs),
+                         lambda result: cls._wrap_result(result))
+
+        cached = cls.cache.get(key)
+        if cached is not None:
+            return _resolved(cls(cached))
+        generation = cls.cache.generation
+
+        def _found(result):
+            if result is not None:
+                cls.cache.set(key, result, generation)
+            return cls._wrap_result(result)
+
+        return _then(cls.collection.find_one(spec), _found)
+
+    @classmethod
+    def find(cls, spec=None, allow_global=False, *args, **kwargs):
+        """Query the database for documents of this type.
+
+        Returns an :class:`AsyncCursor`.  See
+        :meth:`scalymongo.document.Document.find`.  Lazy documents aren't
+        supported.
+
+        """
+        if kwargs.pop('lazy', False):
+            _refuse_lazy()
+        if not allow_global:
+            cls.check_query_sharding(spec)
+        return AsyncCursor(cls.collection.find(spec, *args, **kwargs), cls)
+
+    @classmethod
+    def find_and_modify(cls, query=ClassDefault, update=None,
+                        allow_global=False, validation=None, **kwargs):
+        """Atomically update and return a document of this type.
+
+        See :meth:`scalymongo.document.Document.find_and_modify`.
+
+        """
+        if query is ClassDefault:
+            query = {}
+
+        if not allow_global:
+            cls.check_query_sharding(query)
+
+        cls._validate_update(update, validation)
+
+        returned = cls.database.command(
+            'findandmodify', cls.collection.name,
+            query=query, update=update, **kwargs)
+
+        def _modified(result):
+            cls._invalidate_cache(query)
+            return cls._wrap_result(result['value'])
+
+        def _failed(exception):
+            cls._invalidate_cache(query)
+            return _none_on_operation_failure(exception)
+
+        return _then(returned, _modified, on_error=_failed)
+
+    @classmethod
+    def update(cls, spec, document, allow_global=False, validation=None,
+               **kwargs):
+        """Update a document matching `spec` using `document`.
+
+        See :meth:`scalymongo.document.Document.update`.
+
+        """
+        if not allow_global:
+            cls.check_query_sharding(spec)
+
+        cls._validate_update(document, validation)
+
+        return _then(cls.collection.update(spec, document, **kwargs),
+                     lambda result: cls._invalidated(spec, result))
+
+    @classmethod
+    def remove(cls, spec, allow_global=False, **kwargs):
+        """Find and remove documents matching `spec`.
+
+        See :meth:`scalymongo.document.Document.remove`.
+
+        """
+        if not allow_global:
+            cls.check_query_sharding(spec)
+
+        return _then(cls.collection.remove(spec, **kwargs),
+                     lambda result: cls._invalidated(spec, result))
+
+    @classmethod
+    def _invalidated(cls, spec, result):
+        """Invalidate the :attr:`cache` for `spec` and return `result`."""
+        cls._invalidate_cache(spec)
+        return result
+
+    @classmethod
+    def _wrap_result(cls, result):
+        if result is not None:
+            return cls(result)
+
+
+def _make_blocking_only_method(name):
+    """Make a classmethod refusing to run the blocking method `name`."""
+    def _method(cls, *args, **kwargs):
+        raise TypeError(
+            '{0} is only available on models of a blocking'
+            ' Connection.'.format(name))
+
+    _method.__name__ = name
+    _method.__doc__ = (
+        'Not available asynchronously.  See '
+        ':meth:`scalymongo.document.Document.{0}`.'.format(name))
+    return classmethod(_method)
+
+
+for _name in ['paginate', 'find_parallel', 'find_many_by_keys']:
+    setattr(AsyncDocumentMixin, _name, _make_blocking_only_method(_name))
+
+
+def _refuse_lazy():
+    raise TypeError(
+        'Lazy documents are only available on models of a blocking'
+        ' Connection.')
+
+
+def _make_async_cursor_wrapper_method(method_name):
+    """Make a wrapper for the Motor cursor method `method_name` which
+    returns another cursor.
+    """
+    def _wrapped_method(self, *args, **kwargs):
+        method = getattr(self.wrapped_cursor, method_name)
+        return AsyncCursor(method(*args, **kwargs), self.document_type)
+
+    return _wrapped_method
+
+
+class AsyncCursor(object):
+    """Wrapper for Motor cursors yielding documents of `document_type`.
+
+    Documents are iterated as with a Motor cursor:
+
+    .. code-block:: python
+
+        while (yield cursor.fetch_next):
+            document = cursor.next_object()
+
+    or loaded all at once with :meth:`to_list`.
+
+    """
+
+    def __init__(self, wrapped_cursor, document_type):
+        self.wrapped_cursor = wrapped_cursor
+        self.document_type = document_type
+
+    @property
+    def fetch_next(self):
+        """A future resolving to ``True`` if there is another document to be
+        returned by :meth:`next_object`."""
+        return self.wrapped_cursor.fetch_next
+
+    def next_object(self):
+        """Return the next document fetched by :attr:`fetch_next`, or
+        ``None`` if there is none."""
+        document = self.wrapped_cursor.next_object()
+        if document is not None:
+            return self.document_type(document)
+
+    def to_list(self, length):
+        """Return a future for a list of up to `length` documents."""
+        return _then(
+            self.wrapped_cursor.to_list(length),
+            lambda results: [self.document_type(doc) for doc in results])
+
+    # Wrap all methods that return a new cursor.
+    batch_size = _make_async_cursor_wrapper_method('batch_size')
+    clone = _make_async_cursor_wrapper_method('clone')
+    hint = _make_async_cursor_wrapper_method('hint')
+    limit = _make_async_cursor_wrapper_method('limit')
+    max_scan = _make_async_cursor_wrapper_method('max_scan')
+    rewind = _make_async_cursor_wrapper_method('rewind')
+    skip = _make_async_cursor_wrapper_method('skip')
+    sort = _make_async_cursor_wrapper_method('sort')
+    where = _make_async_cursor_wrapper_method('where')
+
+    def __getattr__(self, attr):
+        """All other methods and properties are those of the wrapped cursor."""
+        return getattr(self.wrapped_cursor, attr)
+
+
+def _none_on_operation_failure(exception):
+    if isinstance(exception, OperationFailure):
+        return None
+    raise exception
+
+
+def _resolved(value):
+    """Return a future already resolved to `value`."""
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _then(future, on_result, on_error=None):
+    """Return a future for the result of `on_result` applied to `future`.
+
+    If `future` fails `on_error` (when given) is applied to the exception
+    instead.  Exceptions raised by either callback fail the returned future,
+    and if either returns a future the returned future follows it.
+
+    """
+    chained = Future()
+
+    def _settle(source):
+        exception = source.exception()
+        if exception is not None:
+            chained.set_exception(exception)
+        else:
+            chained.set_result(source.result())
+
+    def _done(source):
+        try:
+            exception = source.exception()
+            if exception is None:
+                value = on_result(source.result())
+            elif on_error is not None:
+                value = on_error(exception)
+            else:
+                chained.set_exception(exception)
+                return
+        except Exception as ex:
+            chained.set_exception(ex)
+            return
+
+        if hasattr(value, 'add_done_callback'):
+            value.add_done_callback(_settle)
+        else:
+            chained.set_result(value)
+
+    future.add_done_callback(_done)
+    return chained
@@ -0,0 +1,335 @@
+"""
+Batch Validation
+================
+
+Validate many documents following one structure at once.
+
+Rather than walking each document in turn the batch is checked field by
+field: the values of each field are gathered from every document and checked
+together, so the structure is only interpreted once per batch and each
+distinct type of value only once per field.
+
+"""
+from bisect import bisect_right
+from inspect import isclass
+
+from scalymongo.errors import ValidationError
+from scalymongo.schema import (
+    SchemaDocument,
+    make_field_check,
+    validate_required_fields,
+    validate_single_field,
+)
+from scalymongo.schema_operators import IS, OR
+from scalymongo.structure_walker import _check_for_unknown_fields, _join_all
+
+
+class ValidationFailure(object):
+    """One problem found in a document by :func:`validate_many`."""
+
+    def __init__(self, index, path, message):
+        self.index = index
+        """The index of the document in the batch."""
+        self.path = path
+        """The dotted path to the offending value, or ``None`` if the problem
+        is with the document itself."""
+        self.message = message
+        """The message :meth:`~scalymongo.schema.SchemaDocument.validate`
+        would raise for this problem."""
+
+    def __repr__(self):
+        return '<ValidationFailure {0} {1!r}: {2}>'.format(
+            self.index, self.path, self.message)
+
+
+class ValidationReport(object):
+    """The outcome of :func:`validate_many`.
+
+    Unlike :meth:`~scalymongo.schema.SchemaDocument.validate`, which stops
+    at the first problem, every problem of every document is reported.
+
+    """
+
+    def __init__(self, count, failures):
+        self.count = count
+        """The number of documents validated."""
+        self.failures = sorted(failures, key=lambda failure: failure.index)
+        """A list of :class:`ValidationFailure`\ s ordered by document."""
+
+    def is_valid(self):
+        """Return ``True`` if every document passed validation."""
+        return not self.failures
+
+    def errors(self):
+        """Return a :class:`dict` mapping the indexes of invalid documents to
+        the list of their failures."""
+        errors = {}
+        for failure in self.failures:
+            errors.setdefault(failure.index, []).append(failure)
+        return errors
+
+    def valid_indexes(self):
+        """Return a list of the indexes of the valid documents."""
+        invalid = self.errors()
+        return [index for index in xrange(self.count)
+                if index not in invalid]
+
+    def raise_first(self):
+        """Raise a :class:`ValidationError` for the first failure, if any."""
+        if self.failures:
+            raise ValidationError(self.failures[0].message)
+
+
+def validate_many(documents, structure, required_fields=()):
+    """Validate each of `documents` against `structure`.
+
+    This performs the same checks as
+    :meth:`~scalymongo.schema.SchemaDocument.validate` on every document but
+    returns a :class:`ValidationReport` instead of raising.  Values declared
+    as embedded documents or arrays which are something else are reported
+    as failures as well.
+
+    :param documents: is an iterable of :class:`dict`\ s.
+    :param structure: is the structure each document should follow.
+    :param required_fields: (optional) are the top-level fields each
+        document must have.
+
+    """
+    documents = list(documents)
+    failures = []
+    _check_column(structure, _Column(documents), failures)
+
+    required = set(required_fields)
+    if required:
+        for index, document in enumerate(documents):
+            if isinstance(document, dict) and not required.issubset(document):
+                failures.append(ValidationFailure(index, None, _message(
+                    validate_required_fields, document, required)))
+
+    return ValidationReport(len(documents), failures)
+
+
+class _Column(object):
+    """The values found at one place in the structure of every document.
+
+    :param values: is a list of the values.
+    :param parent: is the :class:`_Column` holding the values containing
+        these, or ``None`` for the documents themselves.
+    :param locate: maps the position of a value in `values` to the position
+        of its container in `parent` and its key there (or ``None``).
+
+    Paths are only built for values which fail validation.
+
+    """
+
+    def __init__(self, values, parent=None, locate=None):
+        self.values = values
+        self.parent = parent
+        self.locate = locate
+
+    def origin(self, position):
+        """Return the document index and the path of the value at
+        `position`."""
+        keys = []
+        column = self
+        while column.parent is not None:
+            position, key = column.locate(position)
+            if key is not None:
+                keys.append(key)
+            column = column.parent
+        keys.reverse()
+        return position, _join_all(keys)
+
+
+def _check_column(structure, column, failures):
+    if not column.values:
+        return
+    if isinstance(structure, list):
+        assert len(structure) == 1
+        _check_arrays(structure[0], column, failures)
+    elif isinstance(structure, dict):
+        _check_documents(structure, column, failures)
+    else:
+        _check_leaves(structure, column, failures)
+
+
+def _check_documents(structure, column, failures):
+    column = _only_instances(column, dict, failures)
+    documents = column.values
+    if not documents:
+        return
+
+    # Gather every field name used in the batch so that the documents only
+    # have to be searched if there is an unknown field.
+    fields = set()
+    fields.update(*documents)
+    type_keys = tuple([field for field in structure if isclass(field)])
+    unknown_fields = set([
+        field for field in fields.difference(structure)
+        if not isclass(field) and not isinstance(field, type_keys)])
+    if unknown_fields:
+        for position, document in enumerate(documents):
+            if not unknown_fields.isdisjoint(document):
+                index, path = column.origin(position)
+                failures.append(ValidationFailure(index, path, _message(
+                    _check_for_unknown_fields, document, structure, path)))
+
+    for field, sub_structure in structure.iteritems():
+        if isclass(field):
+            _check_column(
+                sub_structure, _type_key_column(column, field), failures)
+        if field in fields:
+            _check_column(
+                sub_structure, _field_column(column, field), failures)
+
+
+def _field_column(column, field):
+    """Return a column of the values of `field` in the documents of
+    `column`."""
+    documents = column.values
+    try:
+        values = [document[field] for document in documents]
+    except KeyError:
+        owners = [position for position, document in enumerate(documents)
+                  if field in document]
+        return _Column(
+            [documents[position][field] for position in owners],
+            column,
+            lambda position: (owners[position], field))
+    return _Column(values, column, lambda position: (position, field))
+
+
+def _type_key_column(column, key_type):
+    """Return a column of the values of any keys of `key_type` in the
+    documents of `column`."""
+    owners = []
+    keys = []
+    values = []
+    for position, document in enumerate(column.values):
+        for key, value in document.iteritems():
+            if isinstance(key, key_type):
+                owners.append(position)
+                keys.append(key)
+                values.append(value)
+    return _Column(
+        values, column, lambda position: (owners[position], keys[position]))
+
+
+def _check_arrays(element_structure, column, failures):
+    column = _only_instances(column, list, failures)
+    starts = []
+    elements = []
+    for array in column.values:
+        starts.append(len(elements))
+        elements.extend(array)
+    _check_column(
+        element_structure,
+        _Column(elements, column,
+                lambda position: _locate_element(starts, position)),
+        failures)
+
+
+def _locate_element(starts, position):
+    """Return the position of the array holding the element at `position`
+    and the element's index in it.
+
+    `starts` holds the position of the first element of each array.
+
+    """
+    owner = bisect_right(starts, position) - 1
+    return owner, position - starts[owner]
+
+
+def _only_instances(column, type_, failures):
+    """Return a column of the values of `column` which are instances of
+    `type_`, adding a failure for each of the others."""
+    invalid = _invalid_types(type_, column.values)
+    if not invalid:
+        return column
+    for position in invalid:
+        failures.append(_type_failure(column, position, type_))
+
+    invalid = set(invalid)
+    owners = [position for position in xrange(len(column.values))
+              if position not in invalid]
+    return _Column(
+        [column.values[position] for position in owners],
+        column,
+        lambda position: (owners[position], None))
+
+
+def _check_leaves(expected_type, column, failures):
+    values = column.values
+    if isinstance(expected_type, IS):
+        invalid = _invalid_values(expected_type, values)
+    elif _is_type_check(expected_type):
+        accepted_type = expected_type
+        if (isinstance(expected_type, type)
+                and issubclass(expected_type, SchemaDocument)):
+            # Embedded documents are wrapped in the declared class when
+            # they're accessed, so validate() accepts any dict.
+            accepted_type = dict
+        invalid = _invalid_types(accepted_type, values)
+    else:
+        is_valid = make_field_check(expected_type)
+        invalid = [position for position, value in enumerate(values)
+                   if not is_valid(value)]
+
+    for position in invalid:
+        failures.append(_type_failure(column, position, expected_type))
+
+
+def _invalid_values(is_operator, values):
+    """Return the positions of `values` that `is_operator` rejects."""
+    try:
+        invalid = set(values)
+    except TypeError:
+        return [position for position, value in enumerate(values)
+                if not is_operator.evaluate(value)]
+    invalid.difference_update(is_operator.valid_values)
+    if not invalid:
+        return []
+    return [position for position, value in enumerate(values)
+            if value in invalid]
+
+
+def _is_type_check(expected_type):
+    """Return ``True`` if `expected_type` is checked by ``isinstance`` of
+    new-style classes, which values can be grouped by."""
+    if isinstance(expected_type, OR):
+        return all(isinstance(type_, type)
+                   for type_ in expected_type.valid_types)
+    return isinstance(expected_type, type)
+
+
+def _invalid_types(expected_type, values):
+    """Return the positions of `values` which aren't instances of
+    `expected_type`.
+
+    Each distinct type of value is only checked once.
+
+    """
+    if isinstance(expected_type, OR):
+        expected_type = expected_type.valid_types
+    invalid = set([type_ for type_ in set(map(type, values))
+                   if not issubclass(type_, expected_type)])
+    if not invalid:
+        return []
+    return [position for position, value in enumerate(values)
+            if type(value) in invalid]
+
+
+def _type_failure(column, position, expected_type):
+    index, path = column.origin(position)
+    return ValidationFailure(index, path, _message(
+        validate_single_field, path, column.values[position], expected_type))
+
+
+def _message(validate, *args):
+    """Return the message of the :class:`ValidationError` raised by calling
+    `validate` with `args`."""
+    try:
+        validate(*args)
+    except ValidationError as ex:
+        return str(ex)
+    raise AssertionError('{0!r} accepted {1!r}'.format(validate, args))
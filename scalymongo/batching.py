@@ -0,0 +1,153 @@
+"""
+Batching
+========
+
+Combine many :meth:`~scalymongo.document.Document.find_one` lookups into a few
+queries.
+
+"""
+
+
+class BatchedLookup(object):
+    """The pending result of a lookup made through a :class:`FindOneBatch`."""
+
+    def __init__(self, batch):
+        self.__batch = batch
+        self.__done = False
+        self.__result = None
+        self.__exception = None
+
+    def done(self):
+        """Return ``True`` if the lookup has been resolved."""
+        return self.__done
+
+    def result(self):
+        """Return the found document (or ``None``).
+
+        If the lookup is still pending all pending lookups of the batch are
+        run first.  Any exception raised by the query is re-raised.
+
+        """
+        if not self.__done:
+            self.__batch.flush()
+        if self.__exception is not None:
+            raise self.__exception
+        return self.__result
+
+    def _resolve(self, result):
+        self.__done = True
+        self.__result = result
+
+    def _fail(self, exception):
+        self.__done = True
+        self.__exception = exception
+
+
+class FindOneBatch(object):
+    """Collect lookups and run them as one ``$in`` query per shard.
+
+    Lookups by exactly the shard key and ``_id`` are grouped by model and
+    shard key value.  Each group is fetched with a single query on its shard
+    key and ``_id: {'$in': [...]}`` so that it is still routed to one shard.
+    Any other lookups are run individually.  If the model has a
+    :attr:`~scalymongo.document.Document.cache` it is consulted (and filled)
+    as well.
+
+    Lookups are run when the first :meth:`BatchedLookup.result` is needed, on
+    :meth:`flush`, or when leaving the batch as a context manager:
+
+    .. code-block:: python
+
+        with FindOneBatch() as batch:
+            author = batch.find_one(User, {'org': org, '_id': author_id})
+            editor = batch.find_one(User, {'org': org, '_id': editor_id})
+        render(author.result(), editor.result())
+
+    """
+
+    def __init__(self):
+        self.__pending = []
+
+    def find_one(self, cls, spec, allow_global=False):
+        """Queue a lookup of a document of type `cls` matching `spec`.
+
+        The query is checked with
+        :meth:`~scalymongo.document.Document.check_query_sharding`
+        immediately unless `allow_global` is ``True``.
+
+        Returns a :class:`BatchedLookup`.
+
+        """
+        if not allow_global:
+            cls.check_query_sharding(spec)
+        lookup = BatchedLookup(self)
+        self.__pending.append((cls, spec, allow_global, lookup))
+        return lookup
+
+    def flush(self):
+        """Run all pending lookups."""
+        pending, self.__pending = self.__pending, []
+
+        groups = {}
+        for cls, spec, allow_global, lookup in pending:
+            key = cls._cache_key(spec)
+            if key is None:
+                _run_single(cls, spec, allow_global, lookup)
+                continue
+
+            if cls.cache is not None:
+                cached = cls.cache.get(key)
+                if cached is not None:
+                    lookup._resolve(cls(cached))
+                    continue
+
+            # The key is the `_id` followed by the shard key values.
+            group = groups.setdefault((cls, key[1:]), [])
+            group.append((key, lookup))
+
+        for (cls, shard_values), group in groups.iteritems():
+            _run_group(cls, shard_values, group)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+
+def _run_single(cls, spec, allow_global, lookup):
+    try:
+        lookup._resolve(cls.find_one(spec, allow_global=allow_global))
+    except Exception as ex:
+        lookup._fail(ex)
+
+
+def _run_group(cls, shard_values, group):
+    """Fetch the documents for all lookups in `group` with one query."""
+    ids = []
+    seen = set()
+    for key, _ in group:
+        if key[0] not in seen:
+            seen.add(key[0])
+            ids.append(key[0])
+    spec = cls._spec_for_keys(shard_values, ids)
+
+    if cls.cache is not None:
+        generation = cls.cache.generation
+    try:
+        found = dict(
+            (result['_id'], result) for result in cls.collection.find(spec))
+    except Exception as ex:
+        for _, lookup in group:
+            lookup._fail(ex)
+        return
+
+    for key, lookup in group:
+        result = found.get(key[0])
+        if result is None:
+            lookup._resolve(None)
+            continue
+        if cls.cache is not None:
+            cls.cache.set(key, result, generation)
+        lookup._resolve(cls(result))
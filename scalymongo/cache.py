@@ -0,0 +1,125 @@
+"""
+Cache
+=====
+
+A read-through cache for point lookups of documents.
+
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from bson import BSON
+
+
+class DocumentCache(object):
+    """A thread-safe LRU cache of documents with an optional TTL.
+
+    Assign an instance to :attr:`~scalymongo.document.Document.cache` to
+    serve :meth:`~scalymongo.document.Document.find_one` lookups by shard key
+    and ``_id`` from memory.  Documents are stored encoded as BSON so that
+    cached copies can't be modified through the returned documents and so that
+    the memory used can be bounded.
+
+    :param max_entries: is the maximum number of cached documents.
+    :param max_bytes: (optional) is the maximum total size of the cached BSON.
+    :param ttl: (optional) is the number of seconds a document may be served
+        from the cache after it was fetched.
+    :param clock: (optional) returns the current time in seconds.
+
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None,
+                 clock=time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self.generation = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key):
+        """Return the document cached for `key` or ``None``."""
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data, expires = entry
+            if expires is not None and expires <= self.clock():
+                self.size -= len(data)
+                self.misses += 1
+                return None
+
+            # Re-insert to mark it most recently used.
+            self.__entries[key] = entry
+            self.hits += 1
+        return BSON(data).decode()
+
+    def set(self, key, document, generation=None):
+        """Cache `document` for `key`.
+
+        If `generation` is given the document is only cached if nothing was
+        discarded since :attr:`generation` had that value.  This prevents
+        caching a document read before a concurrent write invalidated it.
+
+        """
+        data = BSON.encode(document)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            self.discard(key)
+            return
+
+        expires = None
+        if self.ttl is not None:
+            expires = self.clock() + self.ttl
+
+        with self.__lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.__remove(key)
+            self.__entries[key] = (data, expires)
+            self.size += len(data)
+            while (len(self.__entries) > self.max_entries
+                   or (self.max_bytes is not None
+                       and self.size > self.max_bytes)):
+                _, (evicted, _) = self.__entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def discard(self, key):
+        """Remove any document cached for `key`."""
+        with self.__lock:
+            self.generation += 1
+            self.__remove(key)
+
+    def clear(self):
+        """Remove all cached documents."""
+        with self.__lock:
+            self.generation += 1
+            self.__entries.clear()
+            self.size = 0
+
+    def __remove(self, key):
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def stats(self):
+        """Return a :class:`dict` of the cache's counters."""
+        with self.__lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.__entries),
+                'bytes': self.size,
+            }
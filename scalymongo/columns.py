@@ -0,0 +1,166 @@
+"""
+Columns
+=======
+
+Read query results into NumPy_ arrays, one per field.
+
+NumPy is optional and only needed to call :func:`to_columns`.
+
+.. _NumPy: http://www.numpy.org/
+
+"""
+from collections import Mapping
+from datetime import datetime
+
+try:
+    import numpy
+except ImportError:  # numpy is optional.
+    numpy = None
+
+from scalymongo.schema_operators import IS, OR
+
+
+_DTYPES = [
+    (bool, 'bool'),
+    (int, 'int64'),
+    (long, 'int64'),
+    (float, 'float64'),
+    (datetime, 'datetime64[ms]'),
+]
+"""The NumPy dtype used for each field type, in the order they are checked.
+
+:class:`bool` comes first since it is a subclass of :class:`int`.  Fields of
+any other type are stored as Python objects.
+
+"""
+
+INITIAL_CAPACITY = 1024
+"""The number of rows allocated for each column before it has to grow."""
+
+
+def column_dtype(structure, path):
+    """Return the name of the NumPy dtype for the field at `path`.
+
+    :param structure: is the structure of a
+        :class:`~scalymongo.document.Document`.
+    :param path: is the field's name, with embedded fields separated by
+        ``.``.
+
+    Fields which aren't declared, are declared as lists or dictionaries, or
+    may be one of several types use ``'object'``.
+
+    """
+    field_type = structure
+    for part in path.split('.'):
+        if not isinstance(field_type, dict) or part not in field_type:
+            return 'object'
+        field_type = field_type[part]
+
+    if isinstance(field_type, IS):
+        value_types = set(type(value) for value in field_type.valid_values)
+        if len(value_types) != 1:
+            return 'object'
+        field_type, = value_types
+    elif isinstance(field_type, OR):
+        dtypes = set(
+            column_dtype({'value': value_type}, 'value')
+            for value_type in field_type.valid_types)
+        if len(dtypes) != 1:
+            return 'object'
+        dtype, = dtypes
+        return dtype
+
+    if not isinstance(field_type, type):
+        return 'object'
+    for value_type, dtype in _DTYPES:
+        if issubclass(field_type, value_type):
+            return dtype
+    return 'object'
+
+
+class ColumnBuilder(object):
+    """A growable array of values of one field and a mask of missing values.
+
+    :param dtype: is the NumPy dtype of the values.
+    :param capacity: is the number of rows to allocate initially.  The
+        arrays double in size whenever they fill up.
+
+    """
+
+    def __init__(self, dtype, capacity=INITIAL_CAPACITY):
+        if numpy is None:
+            raise ImportError('Columns require numpy.')
+        self.dtype = numpy.dtype(dtype)
+        self.length = 0
+        self.__values = numpy.zeros(max(capacity, 1), dtype=self.dtype)
+        self.__mask = numpy.ones(max(capacity, 1), dtype=bool)
+
+    def append(self, value):
+        """Append `value`, or a missing value if `value` is ``None``."""
+        if self.length == len(self.__values):
+            self.__grow()
+        if value is not None:
+            if self.dtype.kind == 'M':
+                value = _naive_utc(value)
+            self.__values[self.length] = value
+            self.__mask[self.length] = False
+        self.length += 1
+
+    def __grow(self):
+        capacity = 2 * len(self.__values)
+        values = numpy.zeros(capacity, dtype=self.dtype)
+        values[:self.length] = self.__values[:self.length]
+        mask = numpy.ones(capacity, dtype=bool)
+        mask[:self.length] = self.__mask[:self.length]
+        self.__values = values
+        self.__mask = mask
+
+    def build(self):
+        """Return the values appended so far as a masked array."""
+        return numpy.ma.MaskedArray(
+            self.__values[:self.length].copy(),
+            mask=self.__mask[:self.length].copy())
+
+
+def to_columns(documents, fields, structure, capacity=INITIAL_CAPACITY):
+    """Read the `fields` of each of `documents` into masked arrays.
+
+    :param documents: is an iterable of the documents as returned by PyMongo
+        (either :class:`dict` or raw BSON documents).
+    :param fields: is a list of field names.  Embedded fields are named by
+        their dotted path (e.g. ``'author.name'``).
+    :param structure: is the structure the documents follow.  It determines
+        the dtype of each column (see :func:`column_dtype`).
+    :param capacity: is the number of rows to allocate initially.
+
+    Returns a :class:`dict` mapping each field to a
+    :class:`numpy.ma.MaskedArray`.  Rows where a field is missing or ``None``
+    are masked.
+
+    """
+    columns = [
+        (field.split('.'),
+         ColumnBuilder(column_dtype(structure, field), capacity))
+        for field in fields]
+
+    for document in documents:
+        for path, column in columns:
+            value = document
+            for part in path:
+                if not isinstance(value, Mapping):
+                    value = None
+                    break
+                value = value.get(part)
+            column.append(value)
+
+    return dict(
+        (field, column.build())
+        for field, (_, column) in zip(fields, columns))
+
+
+def _naive_utc(value):
+    """Return timezone aware datetimes as naive datetimes in UTC."""
+    offset = value.utcoffset()
+    if offset is None:
+        return value
+    return (value - offset).replace(tzinfo=None)
@@ -3,29 +3,78 @@ Connection
 ==========
 
 """
+import threading
 import warnings
 
 from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
 
-from scalymongo.document import get_concrete_classes
+from scalymongo.document import get_registration_log
 
 
-class Connection(MongoClient):
-    """A connection to a MongoDB database.
+class ConnectedDocumentCache(object):
+    """Mixin caching the connected types made for each model.
 
-    This is a wrapper for a :class:`pymongo.mongo_client.MongoClient`.
+    Classes using this mixin must call :meth:`__init__` and implement
+    ``_make_connected_document(document)``, which returns a new subclass of
+    `document` bound to the connection.
 
     """
 
+    def __init__(self):
+        self._connected_documents = {}
+        self._connected_documents_lock = threading.Lock()
+
     def connect_document(self, document):
         """Connect a document by creating a new type and injecting the
         connection.
 
+        Connected types are cached per connection so that only the first
+        lookup of a given `document` pays for building the new class.  If
+        `document` has been redefined (i.e. a different class with the same
+        module and name has been connected before) the stale entry is
+        discarded.
+
         """
+        try:
+            return self._connected_documents[document]
+        except KeyError:
+            pass
+
+        with self._connected_documents_lock:
+            connected = self._connected_documents.get(document)
+            if connected is None:
+                self._discard_redefined_documents(document)
+                connected = self._make_connected_document(document)
+                self._connected_documents[document] = connected
+        return connected
+
+    def _discard_redefined_documents(self, document):
+        for cached in self._connected_documents.keys():
+            if (cached.__module__ == document.__module__
+                    and cached.__name__ == document.__name__):
+                del self._connected_documents[cached]
+
+
+class Connection(ConnectedDocumentCache, MongoClient):
+    """A connection to a MongoDB database.
+
+    This is a wrapper for a :class:`pymongo.mongo_client.MongoClient`.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        ConnectedDocumentCache.__init__(self)
+        self.__models = DocumentProxy(self, get_registration_log())
+        MongoClient.__init__(self, *args, **kwargs)
+
+    def _make_connected_document(self, document):
+        """Create a new subclass of `document` bound to this connection."""
+        database = self[document.__database__]
         attrs = {
             'connection': self,
-            'database': self[document.__database__],
-            'collection': self[document.__database__][document.__collection__],
+            'database': database,
+            'collection': get_document_collection(database, document),
         }
         return type('Connected{0}'.format(document.__name__),
                     (document,),
@@ -33,22 +82,89 @@ class Connection(MongoClient):
 
     @property
     def models(self):
-        return DocumentProxy(self, get_concrete_classes())
+        """The :class:`DocumentProxy` for all models on this connection.
+
+        The same proxy is returned on every access.  It picks up any models
+        declared after the connection was created.
+
+        """
+        return self.__models
+
+
+def _replace_or_append(classes, cls):
+    """Put `cls` in `classes` in place of an earlier definition of it (a
+    class with the same module and name), or at the end if there is none."""
+    for index, other in enumerate(classes):
+        if (other.__module__ == cls.__module__
+                and other.__name__ == cls.__name__):
+            classes[index] = cls
+            return
+    classes.append(cls)
+
+
+def get_document_collection(database, document):
+    """Return the collection in `database` for `document`.
+
+    If `document` has a ``write_concern_override`` the collection is a copy
+    with that write concern applied, so it only has to be done once per
+    connected class.
+
+    """
+    collection = database[document.__collection__]
+    write_concern = getattr(document, 'write_concern_override', None)
+    if write_concern is not None:
+        collection = collection.with_options(
+            write_concern=WriteConcern(**write_concern))
+    return collection
 
 
 class DocumentProxy(object):
-    """A proxy object for accessing or creating :class:`Document` models."""
+    """A proxy object for accessing or creating :class:`Document` models.
+
+    :param connection: is the :class:`Connection` models are connected to.
+    :param registered: is a list of concrete :class:`Document` classes.  The
+        list may grow after the proxy is created; any classes appended to it
+        are indexed the next time the proxy is used.
+
+    """
 
     def __init__(self, connection, registered):
         self.connection = connection
         self.registered = {}
-        for cls in registered:
-            if cls.__name__ in self.registered:
-                warnings.warn(
-                    'Multiple models have been found with the name {0}.'
-                    ' The result of connection.models[{0}] will be undefined.'
-                    .format(repr(cls.__name__)))
-            self.registered[cls.__name__] = cls
+        self.__by_collection = {}
+        self.__by_namespace = {}
+        self.__source = registered
+        self.__indexed = 0
+        self.__lock = threading.Lock()
+        self._index_new_classes()
+
+    def _index_new_classes(self):
+        """Index any classes added to the registered list since last time."""
+        if self.__indexed == len(self.__source):
+            return
+
+        with self.__lock:
+            new_classes = self.__source[self.__indexed:]
+            for cls in new_classes:
+                self._index_class(cls)
+            self.__indexed += len(new_classes)
+
+    def _index_class(self, cls):
+        if cls.__name__ in self.registered:
+            warnings.warn(
+                'Multiple models have been found with the name {0}.'
+                ' The result of connection.models[{0}] will be undefined.'
+                .format(repr(cls.__name__)))
+        self.registered[cls.__name__] = cls
+
+        collection = getattr(cls, '__collection__', None)
+        if collection is None:
+            return
+        database = getattr(cls, '__database__', None)
+        _replace_or_append(
+            self.__by_collection.setdefault(collection, []), cls)
+        _replace_or_append(
+            self.__by_namespace.setdefault((database, collection), []), cls)
 
     def __getitem__(self, name):
         cls = self._find_document_class(name)
@@ -63,12 +179,29 @@ class DocumentProxy(object):
         return cls
 
     def _find_document_class(self, name):
+        self._index_new_classes()
         cls = self.registered.get(name)
         if not cls:
             return None
         return self.connection.connect_document(cls)
 
+    def by_collection(self, collection, database=None):
+        """Return a list of the models stored in `collection`.
+
+        :param collection: is the ``__collection__`` of the models.
+        :param database: (optional) restricts the result to models whose
+            ``__database__`` is `database`.
+
+        """
+        self._index_new_classes()
+        if database is None:
+            found = self.__by_collection.get(collection, [])
+        else:
+            found = self.__by_namespace.get((database, collection), [])
+        return [self.connection.connect_document(cls) for cls in found]
+
     def __iter__(self):
         """A generator for all models registered on this connection."""
+        self._index_new_classes()
         for value in self.registered.itervalues():
             yield self.connection.connect_document(value)
@@ -1,4 +1,14 @@
 # -*- coding: utf-8 -*-
+import heapq
+import sys
+import threading
+from functools import total_ordering
+from itertools import count, islice
+from Queue import Empty, Full, Queue
+
+from pymongo.errors import InvalidOperation
+
+from scalymongo.columns import to_columns
 
 
 def _make_cursor_wrapper_method(method_name):
@@ -53,6 +63,73 @@ class Cursor(object):
     def __iter__(self):
         return self
 
+    def next_batch(self, size):
+        """Return a list of up to `size` documents from this cursor.
+
+        The documents are wrapped together (see
+        :meth:`~scalymongo.document.Document.wrap_many`).  An empty list is
+        returned once the cursor is exhausted.
+
+        """
+        return self.__wrap_many(list(islice(self.__wrapped_cursor, size)))
+
+    def iter_batches(self, size):
+        """Yield lists of up to `size` documents until the cursor is exhausted.
+
+        If iteration has not started yet the underlying cursor's batch size is
+        also set to `size` so that each list corresponds to one round trip to
+        the server.
+
+        """
+        try:
+            self.__wrapped_cursor.batch_size(size)
+        except InvalidOperation:
+            # The cursor has already been used.
+            pass
+
+        while True:
+            batch = self.next_batch(size)
+            if not batch:
+                return
+            yield batch
+
+    def prefetch(self, depth=2, batch_size=100):
+        """Return a :class:`PrefetchingCursor` reading ahead of the consumer.
+
+        A background thread fetches batches of `batch_size` documents (see
+        :meth:`iter_batches`) while earlier ones are being processed, keeping
+        at most `depth` batches waiting.  This cursor must not be used
+        directly afterwards.
+
+        """
+        return PrefetchingCursor([self], depth, batch_size)
+
+    def to_columns(self, fields):
+        """Return the remaining results as NumPy arrays, one per field.
+
+        The raw results are read straight into arrays whose dtypes are
+        derived from the document type's ``structure`` without creating a
+        :class:`~scalymongo.document.Document` for each of them.  Include
+        only `fields` in the query's projection to avoid transferring the
+        rest of each document.
+
+        :param fields: is a list of field names.  Embedded fields are named
+            by their dotted path (e.g. ``'author.name'``).
+
+        Returns a :class:`dict` mapping each field to a
+        :class:`numpy.ma.MaskedArray` in which missing values are masked.
+        See :func:`scalymongo.columns.to_columns`.
+
+        """
+        return to_columns(
+            self.__wrapped_cursor, fields, self.__document_type.structure)
+
+    def __wrap_many(self, documents):
+        wrap_many = getattr(self.__document_type, 'wrap_many', None)
+        if wrap_many is None:
+            return [self.__document_type(doc) for doc in documents]
+        return wrap_many(documents)
+
     # Wrap all methods that return a pymongo.cursor.Cursor.
     batch_size = _make_cursor_wrapper_method('batch_size')
     clone = _make_cursor_wrapper_method('clone')
@@ -67,3 +144,221 @@ class Cursor(object):
     def __getattr__(self, attr):
         """All other methods and properties are those of the wrapped cursor."""
         return getattr(self.__wrapped_cursor, attr)
+
+
+_DONE = object()
+"""Queued by the prefetching thread once the cursor is exhausted."""
+
+
+class _Failure(object):
+    """Carries an exception from the prefetching thread to the consumer.
+
+    `exc_info` is the :func:`sys.exc_info` of the exception, so that it can
+    be raised again with its original traceback.
+
+    """
+
+    def __init__(self, exc_info):
+        self.exc_info = exc_info
+
+
+class PrefetchingCursor(object):
+    """Iterate over :class:`Cursor` results while background threads fetch
+    ahead.
+
+    Each cursor is read by its own thread.  With several cursors their
+    batches are yielded in the order they arrive.  Exceptions raised while
+    fetching are re-raised from :meth:`next`.  Call :meth:`close` (or use this
+    as a context manager) when stopping early so that the threads exit and
+    the server cursors are closed.
+
+    :param cursors: is a list of the :class:`Cursor` objects to read from.
+    :param depth: is the maximum number of fetched batches waiting to be
+        consumed.
+    :param batch_size: is the number of documents in each batch.
+
+    """
+
+    poll_interval = 0.1
+    """Seconds between checks for :meth:`close` while the queue is full."""
+
+    def __init__(self, cursors, depth, batch_size):
+        self.__cursors = cursors
+        self.__batch_size = batch_size
+        self.__queue = Queue(maxsize=depth)
+        self.__current = iter(())
+        self.__stopped = threading.Event()
+        self.__finished = False
+        self.__remaining = len(cursors)
+        self.__threads = []
+        for cursor in cursors:
+            thread = threading.Thread(target=self.__fetch, args=(cursor,))
+            thread.daemon = True
+            thread.start()
+            self.__threads.append(thread)
+
+    def __fetch(self, cursor):
+        try:
+            for batch in cursor.iter_batches(self.__batch_size):
+                if not self.__put(batch):
+                    return
+        except Exception:
+            self.__put(_Failure(sys.exc_info()))
+        else:
+            self.__put(_DONE)
+
+    def __put(self, item):
+        """Queue `item` unless closed first.  Returns ``False`` if closed."""
+        while not self.__stopped.is_set():
+            try:
+                self.__queue.put(item, timeout=self.poll_interval)
+                return True
+            except Full:
+                pass
+        return False
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        """Return the next document."""
+        while True:
+            for document in self.__current:
+                return document
+            if self.__finished:
+                raise StopIteration()
+            self.__current = iter(self.next_batch())
+
+    def next_batch(self):
+        """Return the next fetched batch of documents.
+
+        An empty list is returned once all cursors are exhausted.
+
+        """
+        while not self.__finished:
+            item = self.__queue.get()
+            if isinstance(item, list):
+                return item
+
+            if item is _DONE:
+                self.__remaining -= 1
+                if self.__remaining:
+                    continue
+                self.close()
+                return []
+
+            self.close()
+            exc_type, exc_value, traceback = item.exc_info
+            raise exc_type, exc_value, traceback
+        return []
+
+    def close(self):
+        """Stop prefetching and close the underlying cursors."""
+        if self.__stopped.is_set():
+            return
+        self.__finished = True
+        self.__current = iter(())
+        self.__stopped.set()
+        # Unblock any thread waiting for room in the queue.
+        try:
+            while True:
+                self.__queue.get_nowait()
+        except Empty:
+            pass
+        for thread in self.__threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        for cursor in self.__cursors:
+            cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SortedMergeCursor(object):
+    """Merge the results of cursors sorted the same way into one sorted
+    stream.
+
+    Each cursor is read ahead by a :class:`PrefetchingCursor`.  Call
+    :meth:`close` (or use this as a context manager) when stopping early.
+
+    :param cursors: is a list of the :class:`Cursor` objects to merge.  Each
+        must already be sorted by `sort`.
+    :param sort: is a list of ``(key, direction)`` pairs.
+    :param depth: is the maximum number of fetched batches waiting per cursor.
+    :param batch_size: is the number of documents in each batch.
+
+    """
+
+    def __init__(self, cursors, sort, depth, batch_size):
+        self.__sources = [
+            PrefetchingCursor([cursor], depth, batch_size)
+            for cursor in cursors]
+        sort_key = _make_sort_key(sort)
+        self.__merged = heapq.merge(*[
+            _keyed(source, sort_key, index)
+            for index, source in enumerate(self.__sources)])
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        """Return the next document."""
+        try:
+            return self.__merged.next()[-1]
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Stop prefetching and close the underlying cursors."""
+        for source in self.__sources:
+            source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _keyed(documents, sort_key, index):
+    """Yield a tuple for each document which orders the same as `sort_key`.
+
+    `index` and a counter break ties so that documents are never compared.
+
+    """
+    counter = count()
+    for document in documents:
+        yield sort_key(document), index, counter.next(), document
+
+
+def _make_sort_key(sort):
+    """Return a function computing a key for documents ordered by `sort`."""
+    def _sort_key(document):
+        key = []
+        for field, direction in sort:
+            value = document
+            for part in field.split('.'):
+                value = value.get(part) if isinstance(value, dict) else None
+            key.append(_Descending(value) if direction < 0 else value)
+        return tuple(key)
+
+    return _sort_key
+
+
+@total_ordering
+class _Descending(object):
+    """Wraps a value so that it sorts in reverse order."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
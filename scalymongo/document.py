@@ -5,26 +5,51 @@ Document
 The base document models.
 
 """
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from copy import deepcopy
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
 from warnings import warn
 
-from pymongo.errors import OperationFailure
-
-from scalymongo.cursor import Cursor
+from bson import BSON, ObjectId
+from bson.errors import InvalidBSON
+try:
+    from bson.codec_options import CodecOptions
+    from bson.raw_bson import RawBSONDocument
+except ImportError:  # pragma: no cover (pymongo < 3.2)
+    CodecOptions = RawBSONDocument = None
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from scalymongo.batch_validation import validate_many
+from scalymongo.cursor import Cursor, PrefetchingCursor, SortedMergeCursor
 from scalymongo.errors import (
     GlobalQueryException,
     ModifyFailedError,
+    UnindexedSortException,
     UnsafeBehaviorError,
+    ValidationError,
 )
 from scalymongo.helpers import (
     ClassDefault,
+    ConversionDict,
     is_update_modifier,
+    outermost_paths,
     value_or_result,
 )
+from scalymongo.json_schema import make_json_schema
+from scalymongo.lazy import LazyDocumentMixin, inflated
+from scalymongo.modifiers import (
+    apply_update_modifier,
+    check_local_update_modifier,
+    modified_fields,
+)
 from scalymongo.schema import (
     SchemaDocument,
     SchemaMetaclass,
     validate_update_modifier,
 )
+from scalymongo.validation import ALWAYS
 
 
 class DocumentMetaclass(SchemaMetaclass):
@@ -36,12 +61,21 @@ class DocumentMetaclass(SchemaMetaclass):
     """
 
     concrete_classes = set()
+    registration_log = []
+    """Every concrete class in the order it was registered.
+
+    This is only ever appended to so that registries such as
+    :class:`~scalymongo.connection.DocumentProxy` can index new classes
+    incrementally.
+
+    """
 
     def __new__(mcs, name, bases, attrs):
         rv = SchemaMetaclass.__new__(mcs, name, bases, attrs)
         attrs['abstract'] = attrs.get('abstract', False)
         if not attrs['abstract'] and not attrs.get('connection'):
             mcs.concrete_classes.add(rv)
+            mcs.registration_log.append(rv)
         if attrs.get('safe_insert') is not None:
             warn(
                 ("safe_insert is deprecated. Use the write_concern_override "
@@ -52,11 +86,63 @@ class DocumentMetaclass(SchemaMetaclass):
         return rv
 
 
+DEFAULT_INSERT_CHUNK_BYTES = 16 * 1024 * 1024
+"""The default BSON byte budget for each chunk of :meth:`Document.insert_many`.
+"""
+
+
+class Page(object):
+    """One page of results returned by :meth:`Document.paginate`."""
+
+    def __init__(self, documents, next_token):
+        self.documents = documents
+        """A list of the documents on this page."""
+        self.next_token = next_token
+        """An opaque token for the following page, or ``None`` if this is
+        the last page."""
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    def __len__(self):
+        return len(self.documents)
+
+
+class BulkInsertResult(object):
+    """The outcome of a :meth:`Document.insert_many` call.
+
+    Every index in :attr:`documents` appears in at most one of
+    :attr:`inserted` and :attr:`errors`.  Documents appearing in neither
+    were skipped because an ordered insert stopped at an earlier failure.
+
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        """The documents to be inserted.  :meth:`Document.insert_many`
+        wraps them in the model class."""
+        self.inserted = []
+        """A list of the indexes of inserted documents."""
+        self.errors = {}
+        """A :class:`dict` mapping indexes of rejected documents to the
+        exception describing why they were rejected."""
+
+
 def get_concrete_classes():
     """Return a set of all non-abstract :class:`Document` subclasses."""
     return DocumentMetaclass.concrete_classes
 
 
+def get_registration_log():
+    """Return a list of all non-abstract :class:`Document` subclasses.
+
+    Classes are listed in the order they were declared and new classes are
+    appended to the same list as they are declared.
+
+    """
+    return DocumentMetaclass.registration_log
+
+
 class Document(SchemaDocument):
     """The base document class all user models should extend.
 
@@ -86,8 +172,31 @@ class Document(SchemaDocument):
     """A :class:`dict` overriding the default write_concern for all instances.
 
     If not overridden, the default from :class:`pymongo.collection.Collection`
-    is used (w=1). Otherwise this will override the default write_concern for
-    all instances of the collection.
+    is used (w=1).  Otherwise the :attr:`collection` of connected classes is
+    configured with this write concern when the class is connected.  Write
+    concern options passed to individual writes (e.g. ``w=0``) take
+    precedence.
+
+    """
+
+    validation_policy = ALWAYS
+    """Decides whether documents are validated before they are written.
+
+    This is one of the policies from :mod:`scalymongo.validation`.  It
+    applies to :meth:`save`, :meth:`insert_many`, :meth:`update`,
+    :meth:`find_and_modify` and the methods built on them.  Each of those
+    also takes a `validation` argument overriding the policy for that call.
+
+    """
+
+    cache = None
+    """An optional :class:`~scalymongo.cache.DocumentCache` for this model.
+
+    When set, :meth:`find_one` lookups by exactly the shard key and ``_id``
+    are served from the cache where possible.  Writes through :meth:`update`,
+    :meth:`remove`, :meth:`find_and_modify` and :meth:`modify` invalidate the
+    affected entries.  Writes made by other processes are only picked up once
+    the cache's TTL expires.
 
     """
 
@@ -95,17 +204,50 @@ class Document(SchemaDocument):
         SchemaDocument.__init__(self, *args, **kwargs)
         for key, value in self.default_values.iteritems():
             self.setdefault(key, value_or_result(value))
-        if self.write_concern_override is not None:
-            self.collection.write_concern = self.write_concern_override
 
-    def save(self, **kwargs):
+    @classmethod
+    def wrap_many(cls, documents):
+        """Return a list of instances of this class wrapping `documents`.
+
+        This is equivalent to ``[cls(doc) for doc in documents]`` but the
+        class's conversions and :attr:`default_values` are only looked up
+        once for the whole batch.
+
+        """
+        if cls.__init__.__func__ is not Document.__init__.__func__:
+            # Subclasses with their own constructor are built one by one.
+            return [cls(document) for document in documents]
+
+        conversions = cls._conversions
+        defaults = cls.default_values.items()
+        wrapped = []
+        for content in documents:
+            document = cls.__new__(cls)
+            ConversionDict.__init__(
+                document, inflated(content), conversions)
+            missing = [(key, value) for key, value in defaults
+                       if key not in content]
+            if missing:
+                for key, value in missing:
+                    dict.__setitem__(document, key, value_or_result(value))
+                object.__setattr__(
+                    document, '_dirty_paths',
+                    set((key,) for key, _ in missing))
+            wrapped.append(document)
+        return wrapped
+
+    def save(self, validation=None, **kwargs):
         """Save this document.
 
         If this document has already been saved an :class:`UnsafeBehaviorError`
-        will be raised.  The document will be validated before saving.
+        will be raised.  The document will be validated before saving
+        according to `validation` or, if it isn't given, the class's
+        :attr:`validation_policy`.
 
         All additional keyword arguments will be passed to
-        :meth:`pymongo.collection.Collection.save`.
+        :meth:`pymongo.collection.Collection.save`.  This includes write
+        concern options (e.g. ``w=0``) overriding the class's write concern
+        for this write only.
 
         """
         if '_id' in self:
@@ -113,8 +255,216 @@ class Document(SchemaDocument):
                 'This document has already been saved once.'
                 ' Further alterations should use modify.')
 
-        self.validate()
-        self.collection.save(self, **kwargs)
+        self._validation_policy(validation).run(self.validate)
+        self.collection.save(inflated(self), **kwargs)
+        self.mark_clean()
+
+    def get_changes(self):
+        """Return an update modifier for the changes made to this document.
+
+        The modifier contains a ``$set`` for every field changed since this
+        document was loaded (or last saved) and an ``$unset`` for every field
+        removed.  Fields nested in a changed field are not listed separately.
+        An empty :class:`dict` is returned if nothing has changed.
+
+        Changes made in place to the embedded documents and arrays declared
+        in :attr:`structure` are recorded too (e.g. ``doc.tags.append(x)``).
+        Values of fields declared with a plain type such as :class:`dict` or
+        :class:`list`, and values stored under type keys (e.g. the arrays of
+        ``{basestring: [int]}``) are not tracked.  Changes made to them in
+        place are not noticed, so such values must be reassigned instead.
+
+        """
+        set_fields = {}
+        unset_fields = {}
+        for path in outermost_paths(self.get_dirty_paths()):
+            name = '.'.join([
+                part if isinstance(part, basestring) else str(part)
+                for part in path])
+            value = _lookup_path(self, path)
+            if value is _MISSING:
+                unset_fields[name] = 1
+            else:
+                set_fields[name] = value
+
+        changes = {}
+        if set_fields:
+            changes['$set'] = set_fields
+        if unset_fields:
+            changes['$unset'] = unset_fields
+        return changes
+
+    def save_changes(self, query=None, **kwargs):
+        """Save only the changes made since this document was loaded.
+
+        The changes from :meth:`get_changes` are validated and sent using
+        :meth:`update`.  If no document was updated a
+        :class:`~scalymongo.errors.ModifyFailedError` is raised.
+
+        :param query: A query specification for any additional parameters to
+            be used in the update.  This document's ``_id`` field and it's
+            shard key fields (where applicable) are always included.
+
+        All additional keyword arguments are passed to :meth:`update`.
+
+        Only changes recorded by :meth:`get_changes` are saved.  Changes
+        made in place to values it doesn't track are silently left out.
+
+        """
+        if '_id' not in self:
+            raise UnsafeBehaviorError(
+                'This document has never been saved.  Use save instead.')
+
+        changes = self.get_changes()
+        if not changes:
+            return
+
+        full_query = self.shard_key
+        if query:
+            full_query.update(query)
+        full_query['_id'] = self['_id']
+        # Call the classmethod `update` not the one from `dict`.
+        result = type(self).update(full_query, changes, **kwargs)
+        if result is not None and not result.get('n'):
+            raise ModifyFailedError(
+                'Failed to update document.  The document was not found'
+                ' based on the criteria {0}.  Document was {1}.'.format(
+                query, self),
+            )
+        self.mark_clean()
+
+    @classmethod
+    def insert_many(cls, documents, ordered=True,
+                    chunk_bytes=DEFAULT_INSERT_CHUNK_BYTES, validation=None,
+                    **kwargs):
+        """Insert many new documents using bulk writes.
+
+        Each document is wrapped in this class (applying
+        :attr:`default_values`) and validated.  Documents which already have
+        an ``_id`` or fail validation are reported in the result rather than
+        aborting the whole batch.  The remaining documents are written in
+        chunks of at most `chunk_bytes` of BSON.
+
+        :param documents: an iterable of :class:`dict` or instances of this
+            class.
+        :param ordered: If ``True`` documents are inserted in order and no
+            further documents are inserted after a write error.  Otherwise
+            the server may insert them in any order and continues past write
+            errors.
+        :param chunk_bytes: The BSON byte budget for a single bulk write.  A
+            document larger than the budget is written on its own.
+        :param validation: (optional): The validation policy to use instead
+            of :attr:`validation_policy`.
+        :param kwargs: (optional): The write concern for the bulk writes.
+
+        Returns a :class:`BulkInsertResult`.
+
+        """
+        result = BulkInsertResult(
+            [inflated(doc) if isinstance(doc, cls) else cls(doc)
+             for doc in documents])
+
+        policy = cls._validation_policy(validation)
+        pending = []
+        for index, document in enumerate(result.documents):
+            if '_id' in document:
+                result.errors[index] = UnsafeBehaviorError(
+                    'This document has already been saved once.'
+                    ' Further alterations should use modify.')
+                continue
+            try:
+                policy.run(document.validate)
+            except ValidationError as ex:
+                result.errors[index] = ex
+                continue
+            pending.append(index)
+
+        return cls._insert_chunks(
+            result, _chunk_by_bson_size(
+                result.documents, pending, chunk_bytes),
+            ordered, kwargs or None)
+
+    @classmethod
+    def insert_prepared(cls, documents, sizes=None, ordered=True,
+                        chunk_bytes=DEFAULT_INSERT_CHUNK_BYTES, **kwargs):
+        """Insert new documents which are ready to be written as they are.
+
+        Unlike :meth:`insert_many` the documents are neither wrapped in this
+        class nor validated, e.g. because that was already done in another
+        process.  Documents which already have an ``_id`` are reported in
+        the result as they are by :meth:`insert_many`.
+
+        :param documents: a list of :class:`dict`.
+        :param sizes: (optional): a list of the size of each document in
+            BSON.  If it isn't given each document is encoded to find it.
+        :param ordered: See :meth:`insert_many`.
+        :param chunk_bytes: See :meth:`insert_many`.
+        :param kwargs: (optional): The write concern for the bulk writes.
+
+        Returns a :class:`BulkInsertResult`.
+
+        """
+        result = BulkInsertResult(documents)
+        pending = []
+        for index, document in enumerate(documents):
+            if '_id' in inflated(document):
+                result.errors[index] = UnsafeBehaviorError(
+                    'This document has already been saved once.'
+                    ' Further alterations should use modify.')
+            else:
+                pending.append(index)
+
+        return cls._insert_chunks(
+            result, _chunk_by_bson_size(
+                documents, pending, chunk_bytes, sizes),
+            ordered, kwargs or None)
+
+    @classmethod
+    def _insert_chunks(cls, result, chunks, ordered, write_concern):
+        """Insert each of `chunks` with :meth:`_insert_chunk`.
+
+        Returns `result`.
+
+        """
+        for chunk in chunks:
+            completed = cls._insert_chunk(
+                result, chunk, ordered, write_concern)
+            if ordered and not completed:
+                break
+        return result
+
+    @classmethod
+    def _insert_chunk(cls, result, chunk, ordered, write_concern):
+        """Insert the documents at the indexes in `chunk` in one bulk write.
+
+        Returns ``False`` if any document could not be inserted.
+
+        """
+        bulk = cls._bulk_insert_op(result, chunk, ordered)
+        try:
+            bulk.execute(write_concern)
+        except BulkWriteError as ex:
+            write_errors = ex.details.get('writeErrors')
+            if not write_errors:
+                # Only the write concern failed so nothing can be said about
+                # individual documents.
+                raise
+            _record_write_errors(result, chunk, ordered, write_errors)
+            return False
+        _record_inserted(result, chunk)
+        return True
+
+    @classmethod
+    def _bulk_insert_op(cls, result, chunk, ordered):
+        """Return a bulk operation inserting the documents at the indexes in
+        `chunk`."""
+        if ordered:
+            bulk = cls.collection.initialize_ordered_bulk_op()
+        else:
+            bulk = cls.collection.initialize_unordered_bulk_op()
+        for index in chunk:
+            bulk.insert(result.documents[index])
+        return bulk
 
     def reload(self):
         """Reload this document.
@@ -127,8 +477,10 @@ class Document(SchemaDocument):
         spec['_id'] = self['_id']
         # Call the parent `update` not the classmethod.
         SchemaDocument.update(self, self.find_one(spec))
+        self.mark_clean()
 
-    def modify(self, update, query=None):
+    def modify(self, update, query=None, apply_locally=False,
+               validation=None, **write_concern):
         """Modify this document using :meth:`find_and_modify`.
 
         If the document could not be updated a
@@ -145,12 +497,35 @@ class Document(SchemaDocument):
             included in addition to any parameters specified in the
             `query`.
 
+        :param apply_locally: If ``True`` the document is changed with
+            :meth:`update` instead and `update` is then applied to this copy
+            in memory (see :mod:`scalymongo.modifiers`), so the updated
+            document isn't sent back by the server.  The result is only
+            correct if this copy was up to date.  If the update fails this
+            copy is left unchanged rather than reloaded.
+
+        :param validation: The validation policy to use instead of
+            :attr:`validation_policy`.
+
+        Any additional keyword arguments (e.g. ``w=2``) are sent as the write
+        concern for this update only.
+
         """
         full_query = self.shard_key
         if query:
             full_query.update(query)
         full_query['_id'] = self['_id']
-        result = self.find_and_modify(full_query, update, new=True)
+        if apply_locally:
+            self.__modify_locally(
+                full_query, update, query, validation, write_concern)
+            return
+
+        options = {'new': True}
+        if validation is not None:
+            options['validation'] = validation
+        if write_concern:
+            options['writeConcern'] = write_concern
+        result = self.find_and_modify(full_query, update, **options)
         if result is None:
             self.reload()
             raise ModifyFailedError(
@@ -163,6 +538,51 @@ class Document(SchemaDocument):
         self.clear()
         # Call the parent `update` not the classmethod.
         SchemaDocument.update(self, result)
+        self.mark_clean()
+
+    def __modify_locally(self, full_query, update, query, validation,
+                         write_concern):
+        if is_update_modifier(update):
+            check_local_update_modifier(update)
+        # Call the classmethod `update` not the one from `dict`.
+        result = type(self).update(
+            full_query, update, validation=validation, **write_concern)
+        if result is not None and not result.get('n'):
+            raise ModifyFailedError(
+                'Failed to update document.  The document was not found'
+                ' based on the criteria {0}.  Document was {1}.'.format(
+                query, self),
+            )
+        self._apply_update(update)
+
+    def _apply_update(self, update):
+        """Apply the successful `update` to this copy and mark the fields it
+        changed clean."""
+        if not is_update_modifier(update):
+            document_id = self['_id']
+            self.clear()
+            SchemaDocument.update(self, update)
+            self['_id'] = document_id
+            self.mark_clean()
+            return
+
+        fields = modified_fields(update)
+        values = {}
+        for field in fields:
+            if field in self:
+                # Decode the field first if this is a lazy document.
+                self.get(field)
+                # The raw value may be shared with the caller's result.
+                values[field] = deepcopy(dict.__getitem__(self, field))
+        apply_update_modifier(values, update)
+        for field in fields:
+            if field in values:
+                self[field] = values[field]
+            elif field in self:
+                del self[field]
+        if self._dirty_paths:
+            self._dirty_paths.difference_update([
+                path for path in self._dirty_paths if path[0] in fields])
 
     @classmethod
     def ensure_indexes(cls, **kwargs):
@@ -179,7 +599,32 @@ class Document(SchemaDocument):
             cls.collection.ensure_index(index['fields'], **kwargs)
 
     @classmethod
-    def find_one(cls, spec=None, allow_global=False, **kwargs):
+    def json_schema(cls):
+        """Return a ``$jsonSchema`` validator for this model's collection.
+
+        The schema describes the same :attr:`structure` and
+        ``required_fields`` that :meth:`validate` checks so that the server
+        can enforce them (see :mod:`scalymongo.manage.install_validators`).
+
+        """
+        return make_json_schema(cls.structure, cls.required_fields)
+
+    @classmethod
+    def validate_many(cls, documents):
+        """Validate a batch of `documents` of this type at once.
+
+        This makes the same checks as :meth:`validate` for each document but
+        checks the whole batch one field at a time, which is much faster for
+        large imports.  No documents are wrapped in this class.
+
+        Returns a :class:`~scalymongo.batch_validation.ValidationReport` of
+        every failure found.
+
+        """
+        return validate_many(documents, cls.structure, cls.required_fields)
+
+    @classmethod
+    def find_one(cls, spec=None, allow_global=False, lazy=False, **kwargs):
         """Find and return one matching document of this type.
 
         :param spec: (optional): Is a query to find the matching document.
@@ -187,14 +632,35 @@ class Document(SchemaDocument):
           this value to be a dictionary including at a bare minimum the shard
           key for this models collection.
 
+        :param lazy: (optional): If ``True`` the document is returned as an
+          instance of :meth:`lazy_class` which only decodes fields as they are
+          accessed.  This requires pymongo 3.2 or later (the ``lazy`` extra).
+
         :param kwargs: (optional): Additional keyword arguments will be
           passed to :meth:`pymongo.collection.Collection.find_one`.
 
         """
         if not allow_global:
             cls.check_query_sharding(spec)
+        if lazy:
+            result = cls._raw_collection().find_one(spec, **kwargs)
+            if result is not None:
+                return cls.lazy_class()(result)
+            return
+
+        key = None
+        if cls.cache is not None and not kwargs:
+            key = cls._cache_key(spec)
+        if key is not None:
+            cached = cls.cache.get(key)
+            if cached is not None:
+                return cls(cached)
+            generation = cls.cache.generation
+
         result = cls.collection.find_one(spec, **kwargs)
         if result is not None:
+            if key is not None:
+                cls.cache.set(key, result, generation)
             return cls(result)
 
     @classmethod
@@ -206,15 +672,286 @@ class Document(SchemaDocument):
         ``dict`` instances.  All additional arguments are passed to the
         underlying method.
 
+        If the keyword argument `lazy` is ``True`` the documents are returned
+        as instances of :meth:`lazy_class`.  This requires pymongo 3.2 or
+        later (the ``lazy`` extra).
+
         """
         if not allow_global:
             cls.check_query_sharding(spec)
+        if kwargs.pop('lazy', False):
+            result = cls._raw_collection().find(spec, *args, **kwargs)
+            return Cursor(result, cls.lazy_class())
+
         result = cls.collection.find(spec, *args, **kwargs)
         return Cursor(result, cls)
 
+    @classmethod
+    def paginate(cls, spec=None, order_by=None, page_size=20, after=None,
+                 allow_global=False, **kwargs):
+        """Return one :class:`Page` of the documents matching `spec`.
+
+        Unlike paging with :meth:`~pymongo.cursor.Cursor.skip` each page is
+        found by seeking past the last document of the previous one, so the
+        cost of a page doesn't grow with its depth.
+
+        :param spec: (optional): is a query for the documents to page
+          through.
+        :param order_by: is a list of field names or ``(field, direction)``
+          pairs.  ``_id`` is appended if it isn't included so that the order
+          is total.  The fields and directions must match the start of one
+          of :attr:`indexes` (or just ``_id``), either as declared or with
+          every direction reversed.  Otherwise
+          :class:`~scalymongo.errors.UnindexedSortException` is raised.
+          The fields should be present in every document.
+        :param page_size: is the maximum number of documents per page.
+        :param after: (optional): is the :attr:`Page.next_token` of the
+          previous page.  The first page is returned if it isn't given.
+        :param kwargs: (optional): Additional keyword arguments will be
+          passed to :meth:`pymongo.collection.Collection.find`.
+
+        """
+        if spec is None:
+            spec = {}
+        if not allow_global:
+            cls.check_query_sharding(spec)
+        order_by = cls._keyset_order(order_by)
+
+        query = spec
+        if after is not None:
+            values = _decode_page_token(after, order_by)
+            query = _keyset_spec(order_by, values)
+            if spec:
+                query = {'$and': [spec, query]}
+
+        results = list(cls.collection.find(query, **kwargs)
+                       .sort(order_by).limit(page_size + 1))
+        next_token = None
+        if len(results) > page_size:
+            del results[page_size:]
+            next_token = _encode_page_token(order_by, results[-1])
+        return Page(cls.wrap_many(results), next_token)
+
+    @classmethod
+    def _keyset_order(cls, order_by):
+        """Return `order_by` as a list of ``(field, direction)`` pairs
+        ending in ``_id`` after checking that an index supports it.
+        """
+        order = _sort_pairs(order_by or [])
+        fields = [field for field, _ in order]
+        if fields in ([], ['_id']):
+            return order or [('_id', 1)]
+
+        for index in cls.indexes:
+            for key in _index_scans(index['fields']):
+                if key[:len(order)] != order:
+                    continue
+                if '_id' in fields:
+                    return order
+                following = key[len(order):len(order) + 1]
+                if following and following[0][0] == '_id':
+                    return order + following
+        raise UnindexedSortException(
+            'No index starts with the fields {0} and _id in that'
+            ' order.'.format(', '.join(fields)))
+
+    @classmethod
+    def find_parallel(cls, spec=None, field=None, boundaries=None,
+                      workers=4, sort=None, depth=2, batch_size=100,
+                      **kwargs):
+        """Scan all documents matching `spec` with concurrent queries.
+
+        This is meant for full collection passes which would otherwise be a
+        single global query.  The query is split into disjoint ranges of
+        `field`, each range is read by its own thread and the results are
+        merged.  No shard key check is done.
+
+        :param spec: (optional): is the query for the documents to scan.
+        :param field: (optional): is the field to split on.  Defaults to the
+            first shard key field, or ``_id`` for unsharded models.  All
+            documents must have a value of the same type for this field,
+            except that documents where it is missing or ``None`` are read by
+            an extra query.
+        :param boundaries: (optional): is a sorted list of values of `field`
+            where one range ends and the next starts.  By default `workers`
+            ranges of roughly the same span are made between the lowest and
+            highest value.  This requires numbers, dates or
+            :class:`~bson.objectid.ObjectId` values; for other types a single
+            range is used.
+        :param workers: is the number of ranges made by default.
+        :param sort: (optional): is a list of ``(key, direction)`` pairs.  If
+            given each range is sorted by the server and the results are
+            merged in order.  Otherwise documents are returned as they
+            arrive.
+        :param depth: is the maximum number of fetched batches waiting per
+            range.
+        :param batch_size: is the number of documents fetched at a time.
+        :param kwargs: (optional): Additional keyword arguments will be
+          passed to :meth:`pymongo.collection.Collection.find`.
+
+        Returns a :class:`~scalymongo.cursor.PrefetchingCursor` or, if `sort`
+        was given, a :class:`~scalymongo.cursor.SortedMergeCursor`.  Either
+        should be closed if iteration stops early.
+
+        """
+        if field is None:
+            if cls.shard_index:
+                field = cls.shard_index['fields'][0]
+            else:
+                field = '_id'
+        if boundaries is None:
+            boundaries = cls._parallel_boundaries(spec, field, workers)
+        if sort is not None:
+            if isinstance(sort, basestring):
+                sort = [(sort, 1)]
+            kwargs['sort'] = sort
+
+        bounds = [None] + list(boundaries) + [None]
+        conditions = []
+        for low, high in zip(bounds, bounds[1:]):
+            condition = {}
+            if low is not None:
+                condition['$gte'] = low
+            if high is not None:
+                condition['$lt'] = high
+            conditions.append(condition)
+        if len(conditions) > 1:
+            # Ranges never match a missing or null value, but this does.
+            conditions.append(None)
+
+        cursors = []
+        for condition in conditions:
+            range_spec = spec
+            if len(conditions) > 1:
+                range_spec = {field: condition}
+                if spec:
+                    range_spec = {'$and': [spec, range_spec]}
+            cursors.append(
+                Cursor(cls.collection.find(range_spec, **kwargs), cls))
+
+        if sort is not None:
+            return SortedMergeCursor(cursors, sort, depth, batch_size)
+        return PrefetchingCursor(cursors, depth * len(cursors), batch_size)
+
+    @classmethod
+    def _parallel_boundaries(cls, spec, field, parts):
+        """Return values of `field` splitting the documents matching `spec`
+        into `parts` ranges of roughly the same span.
+        """
+        path = field.split('.')
+        ends = []
+        for direction in (1, -1):
+            found = list(cls.collection.find(spec, [field])
+                         .sort(field, direction).limit(1))
+            if not found:
+                return []
+            ends.append(_lookup_path(found[0], path))
+        return _split_range(ends[0], ends[1], parts)
+
+    @classmethod
+    def lazy_class(cls):
+        """Return the lazily decoded variant of this class.
+
+        Instances are created from raw BSON and only decode each top-level
+        field when it is first accessed.  This makes loading documents much
+        cheaper when only a few of their fields are used.  The class is a
+        subclass of this one and is created once per class.
+
+        """
+        lazy = cls.__dict__.get('_lazy_class')
+        if lazy is None:
+            lazy = type(
+                'Lazy{0}'.format(cls.__name__),
+                (LazyDocumentMixin, cls),
+                {'abstract': True, '__module__': cls.__module__},
+            )
+            cls._lazy_class = lazy
+        return lazy
+
+    @classmethod
+    def _raw_collection(cls):
+        """Return :attr:`collection` configured to return raw BSON."""
+        if RawBSONDocument is None:
+            raise ImportError(
+                'Lazy documents require pymongo 3.2 or later.')
+        return cls.collection.with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument))
+
+    @classmethod
+    def find_many_by_keys(cls, keys, chunk_size=100, max_workers=4):
+        """Find the documents identified by each of `keys`.
+
+        Each key must be a :class:`dict` of exactly the shard key fields and
+        ``_id``.  Duplicate keys are fetched once.  Keys are grouped by shard
+        key value so that every query is routed to a single shard, and each
+        group is fetched in chunks of at most `chunk_size` ``_id`` values.
+        The queries are run concurrently on up to `max_workers` threads.
+
+        Returns a list with the document for each key in the order of `keys`
+        (or ``None`` where no document was found).
+
+        """
+        lookups = []
+        for spec in keys:
+            cls.check_query_sharding(spec)
+            key = cls._cache_key(spec)
+            if key is None:
+                raise GlobalQueryException(
+                    'Keys must contain exactly the shard key and _id with'
+                    ' single values.  Key was {0}.'.format(spec))
+            lookups.append(key)
+
+        groups = {}
+        seen = set()
+        for key in lookups:
+            if key not in seen:
+                seen.add(key)
+                groups.setdefault(key[1:], []).append(key[0])
+        tasks = []
+        for shard_values, ids in groups.iteritems():
+            for start in xrange(0, len(ids), chunk_size):
+                tasks.append((shard_values, ids[start:start + chunk_size]))
+
+        if len(tasks) > 1 and max_workers > 1:
+            pool = ThreadPool(min(max_workers, len(tasks)))
+            try:
+                results = pool.map(cls._fetch_by_ids, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = map(cls._fetch_by_ids, tasks)
+
+        found = {}
+        for (shard_values, _), documents in zip(tasks, results):
+            for document in documents:
+                found[(document['_id'],) + shard_values] = document
+        return [cls(found[key]) if key in found else None for key in lookups]
+
+    @classmethod
+    def _fetch_by_ids(cls, task):
+        """Return a list of the raw documents for `task`.
+
+        :param task: is a tuple of the shard key values and a list of
+            ``_id`` values.
+
+        """
+        shard_values, ids = task
+        return list(cls.collection.find(cls._spec_for_keys(shard_values, ids)))
+
+    @classmethod
+    def _spec_for_keys(cls, shard_values, ids):
+        """Return a query for the documents with the given shard key values
+        and any of `ids`.
+        """
+        spec = {'_id': ids[0] if len(ids) == 1 else {'$in': ids}}
+        if cls.shard_index:
+            spec.update(zip(cls.shard_index['fields'], shard_values))
+        return spec
+
     @classmethod
     def find_and_modify(cls, query=ClassDefault, update=None,
-                        allow_global=False, **kwargs):
+                        allow_global=False, validation=None, **kwargs):
         """Find and atomically update a single document.
 
         .. note::
@@ -227,6 +964,8 @@ class Document(SchemaDocument):
         :param update: see second argument to :meth:`update` (no default)
         :keyword allow_global: If ``True`` the query will not be checked to
             ensure that it contains the full shard key.  (default ``False``)
+        :keyword validation: The validation policy to use instead of
+            :attr:`validation_policy`.
         :param sort: priority if multiple objects match (default ``{}``)
         :param remove: remove rather than updating (default ``False``)
         :param new: return updated rather than original object
@@ -245,7 +984,7 @@ class Document(SchemaDocument):
         if not allow_global:
             cls.check_query_sharding(query)
 
-        cls._validate_update(update)
+        cls._validate_update(update, validation)
 
         try:
             # Use the `command` operation since `find_and_modify` is only
@@ -255,6 +994,8 @@ class Document(SchemaDocument):
                 query=query, update=update, **kwargs)
         except OperationFailure:
             return None
+        finally:
+            cls._invalidate_cache(query)
 
         if returned['value'] is None:
             return None
@@ -262,11 +1003,16 @@ class Document(SchemaDocument):
         return cls(returned['value'])
 
     @classmethod
-    def update(cls, spec, document, allow_global=False, **kwargs):
+    def update(cls, spec, document, allow_global=False, validation=None,
+               **kwargs):
         """Update a document matching `spec` using `document`.
 
-        Additional keyword arguments are passed to
-        :meth:`pymongo.collection.Collection.update`.
+        `document` is validated according to `validation` or, if it isn't
+        given, :attr:`validation_policy`.  Additional keyword arguments are
+        passed to
+        :meth:`pymongo.collection.Collection.update`.  This includes write
+        concern options (e.g. ``w=0``) overriding the class's write concern
+        for this update only.
 
         :param spec: is a document specification (i.e. query) for the document
             to be updated.  if more than one document matches only the first
@@ -280,36 +1026,102 @@ class Document(SchemaDocument):
         if not allow_global:
             cls.check_query_sharding(spec)
 
-        cls._validate_update(document)
+        cls._validate_update(document, validation)
 
-        return cls.collection.update(spec, document, **kwargs)
+        try:
+            return cls.collection.update(spec, document, **kwargs)
+        finally:
+            cls._invalidate_cache(spec)
 
     @classmethod
     def remove(cls, spec, allow_global=False, **kwargs):
         """Find and remove documents matching `spec`.
 
         Additional keywords are passed to
-        :meth:`pymongo.collection.Collection.remove`.
+        :meth:`pymongo.collection.Collection.remove`.  This includes write
+        concern options (e.g. ``w=0``) overriding the class's write concern
+        for this removal only.
 
         """
         if not allow_global:
             cls.check_query_sharding(spec)
 
-        return cls.collection.remove(spec, **kwargs)
+        try:
+            return cls.collection.remove(spec, **kwargs)
+        finally:
+            cls._invalidate_cache(spec)
+
+    @classmethod
+    def _cache_key(cls, spec, exact=True):
+        """Return the :attr:`cache` key for the document matched by `spec`.
+
+        The key is made of the ``_id`` and shard key values.  ``None`` is
+        returned if `spec` doesn't select a single document by those values.
+        If `exact` is ``True`` `spec` must not contain any other fields.
+
+        """
+        if not spec:
+            return None
+
+        fields = ['_id']
+        if cls.shard_index:
+            for field, _ in _sort_pairs(cls.shard_index['fields']):
+                if field not in fields:
+                    fields.append(field)
+        if exact and len(spec) != len(fields):
+            return None
+
+        try:
+            key = tuple([spec[field] for field in fields])
+            hash(key)
+        except (KeyError, TypeError):
+            # A field is missing or matched by an operator.
+            return None
+        for value in key:
+            if isinstance(value, _PATTERN_TYPE):
+                return None
+        return key
+
+    @classmethod
+    def _invalidate_cache(cls, spec):
+        """Discard any cached documents which may be affected by a write to
+        documents matching `spec`.
+        """
+        if cls.cache is None:
+            return
+
+        key = cls._cache_key(spec, exact=False)
+        if key is None:
+            cls.cache.clear()
+        else:
+            cls.cache.discard(key)
 
     @classmethod
-    def _validate_update(cls, document):
+    def _validate_update(cls, document, validation=None):
         """Validate an update described in `document`.
 
         :param document: is expected to be either a new document or an update
             modifier.
+        :param validation: is the validation policy to use instead of
+            :attr:`validation_policy`.
 
         """
+        policy = cls._validation_policy(validation)
         if is_update_modifier(document):
-            validate_update_modifier(document, cls.structure)
+            policy.run(
+                lambda: validate_update_modifier(document, cls.structure))
         else:
-            # It's a full document replace.
-            cls(document).validate()
+            # It's a full document replace.  Decode everything before it's
+            # sent to the server.
+            inflated(document)
+            policy.run(lambda: cls(document).validate())
+
+    @classmethod
+    def _validation_policy(cls, validation):
+        """Return `validation` or, if it is ``None``, the class's policy."""
+        if validation is None:
+            return cls.validation_policy
+        return validation
 
     @classmethod
     def check_query_sharding(cls, spec):
@@ -336,3 +1148,166 @@ class Document(SchemaDocument):
         for key in self.shard_index['fields']:
             key_dict[key] = self[key]
         return key_dict
+
+
+_PATTERN_TYPE = type(re.compile(''))
+
+
+def _split_range(low, high, parts):
+    """Return a sorted list of values splitting `low` to `high` into `parts`
+    ranges of the same span.
+
+    Only numbers, dates and :class:`~bson.objectid.ObjectId` values can be
+    split.  For anything else an empty list is returned.
+
+    """
+    if isinstance(low, ObjectId) and isinstance(high, ObjectId):
+        return [ObjectId.from_datetime(point) for point in _split_range(
+            low.generation_time, high.generation_time, parts)]
+
+    if isinstance(low, datetime) and isinstance(high, datetime):
+        span = high - low
+        points = [low + span * i // parts for i in xrange(1, parts)]
+    elif (isinstance(low, (int, long, float))
+          and isinstance(high, (int, long, float))
+          and not isinstance(low, bool) and not isinstance(high, bool)):
+        if isinstance(low, float) or isinstance(high, float):
+            points = [low + (high - low) * i / float(parts)
+                      for i in xrange(1, parts)]
+        else:
+            points = [low + (high - low) * i // parts
+                      for i in xrange(1, parts)]
+    else:
+        return []
+
+    return sorted(set(point for point in points if low < point <= high))
+
+
+def _sort_pairs(fields):
+    """Return `fields`, a field name or list of field names or
+    ``(field, direction)`` pairs, as a list of ``(field, direction)``
+    pairs."""
+    if isinstance(fields, basestring):
+        fields = [fields]
+    return [(field, 1) if isinstance(field, basestring) else tuple(field)
+            for field in fields]
+
+
+def _index_scans(fields):
+    """Return the orders an index on `fields` can be scanned in."""
+    key = _sort_pairs(fields)
+    if not all(isinstance(direction, (int, long)) for _, direction in key):
+        return [key]
+    return [key, [(field, -direction) for field, direction in key]]
+
+
+def _keyset_spec(order_by, values):
+    """Return a query for the documents after `values` in `order_by`."""
+    clauses = []
+    for i, (field, direction) in enumerate(order_by):
+        clause = dict(
+            (previous, value)
+            for (previous, _), value in zip(order_by[:i], values))
+        operator = '$gt' if direction > 0 else '$lt'
+        clause[field] = {operator: values[i]}
+        clauses.append(clause)
+    if len(clauses) == 1:
+        return clauses[0]
+    return {'$or': clauses}
+
+
+def _encode_page_token(order_by, document):
+    """Return a token recording where `document` is in `order_by`."""
+    values = []
+    for field, _ in order_by:
+        value = _lookup_path(document, field.split('.'))
+        values.append(None if value is _MISSING else value)
+    data = BSON.encode({
+        'order': [[field, direction] for field, direction in order_by],
+        'values': values,
+    })
+    return urlsafe_b64encode(data)
+
+
+def _decode_page_token(token, order_by):
+    """Return the values recorded in `token` for `order_by`.
+
+    A :class:`ValueError` is raised if `token` is malformed or was made for a
+    different order.
+
+    """
+    try:
+        decoded = BSON(urlsafe_b64decode(str(token))).decode()
+        order = [tuple(pair) for pair in decoded['order']]
+        values = decoded['values']
+    except (InvalidBSON, KeyError, TypeError, ValueError):
+        raise ValueError('Invalid page token {0!r}.'.format(token))
+    if order != list(order_by) or len(values) != len(order):
+        raise ValueError('The page token is for a different order.')
+    return values
+
+
+_MISSING = object()
+
+
+def _lookup_path(body, path):
+    """Return the raw value at `path` in `body` or ``_MISSING``."""
+    for part in path:
+        if isinstance(body, dict) and dict.__contains__(body, part):
+            body = dict.__getitem__(body, part)
+        elif isinstance(body, list) and 0 <= part < len(body):
+            body = list.__getitem__(body, part)
+        else:
+            return _MISSING
+    return body
+
+
+def _record_inserted(result, indexes):
+    """Record the documents at `indexes` in `result` as inserted."""
+    result.inserted.extend(indexes)
+    for index in indexes:
+        document = result.documents[index]
+        if isinstance(document, ConversionDict):
+            # The driver sets the `_id` of each document it inserts.
+            document.mark_clean()
+
+
+def _record_write_errors(result, chunk, ordered, write_errors):
+    """Record the outcome of a bulk write of the documents at the indexes in
+    `chunk` which failed with `write_errors`."""
+    failed = {}
+    for error in write_errors:
+        failed[chunk[error['index']]] = OperationFailure(
+            error.get('errmsg'), error.get('code'), error)
+    result.errors.update(failed)
+
+    if ordered:
+        # Nothing after the first failure was attempted.
+        first_failure = min(error['index'] for error in write_errors)
+        _record_inserted(result, chunk[:first_failure])
+    else:
+        _record_inserted(
+            result, [index for index in chunk if index not in failed])
+
+
+def _chunk_by_bson_size(documents, indexes, max_bytes, sizes=None):
+    """Split `indexes` into lists whose `documents` fit in `max_bytes`.
+
+    `sizes` holds the BSON size of each of `documents` if it's known.
+
+    """
+    chunk = []
+    chunk_size = 0
+    for index in indexes:
+        if sizes is None:
+            size = len(BSON.encode(documents[index]))
+        else:
+            size = sizes[index]
+        if chunk and chunk_size + size > max_bytes:
+            yield chunk
+            chunk = []
+            chunk_size = 0
+        chunk.append(index)
+        chunk_size += size
+    if chunk:
+        yield chunk
@@ -34,6 +34,17 @@ class GlobalQueryException(Exception):
     pass
 
 
+class UnindexedSortException(Exception):
+    """Raised when results would be ordered without the help of an index.
+
+    :meth:`~scalymongo.document.Document.paginate` raises this exception when
+    its ordering isn't covered by one of the model's declared indexes, as
+    every page would then have to sort all matching documents.
+
+    """
+    pass
+
+
 class SchemaError(ValueError):
     """Raised when a ScalyMongo model has an invalid schema.
 
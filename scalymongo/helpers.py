@@ -5,6 +5,9 @@ Helpers
 Useful functions and classes that don't really fit elsewhere.
 
 """
+from copy import deepcopy
+
+from scalymongo.lazy import inflated
 
 
 def is_update_modifier(doc):
@@ -35,6 +38,19 @@ def value_or_result(potential):
     return potential
 
 
+def outermost_paths(paths):
+    """Return the `paths` which are not nested inside another of `paths`.
+
+    Each path is a tuple of keys.
+
+    """
+    outermost = set()
+    for path in sorted(paths, key=len):
+        if not any(path[:i] in outermost for i in range(1, len(path))):
+            outermost.add(path)
+    return outermost
+
+
 class ClassDefault(object):
     """A sentinel value signaling that the class default should be used.
 
@@ -63,6 +79,10 @@ class ConversionDict(dict):
         lookup.  If no conversion is present in `conversions` the value is
         returned unchanged.
 
+    Converted values are cached, so repeated lookups of a key return the same
+    object until the key is assigned or removed.  Arrays are wrapped in a
+    :class:`ConversionList` which converts elements as they are accessed.
+
     """
 
     NONKEY_ATTRS = set(['_conversions'])
@@ -74,32 +94,71 @@ class ConversionDict(dict):
 
     """
 
+    _attribute_names = frozenset()
+    """The names of all attributes of this class, as given by :func:`dir`.
+
+    :class:`~scalymongo.schema.SchemaMetaclass` keeps this up to date for the
+    classes it creates.
+
+    """
+    _dirty_paths = None
+    _parent = None
+    _parent_key = None
+    _converted_values = None
+
+    _tracking_attributes = (
+        '_dirty_paths', '_parent', '_parent_key', '_converted_values')
+    """Attributes linking an instance to its converted values and parent,
+    which copies mustn't share."""
+
     def __init__(self, content, conversions):
         dict.__init__(self, content)
         self._conversions = conversions
 
-    def __getitem__(self, key):
-        value = dict.__getitem__(self, key)
-        conversion = self.__get_conversion(key)
-        return self.__convert_value(value, conversion)
-
-    @staticmethod
-    def __convert_value(value, conversion):
-        """Convert `value` using `conversion`.
+    def __copy__(self):
+        """Return a shallow copy which tracks its changes separately.
 
-        If `conversion` is ``None`` then `value` is returned unchanged.
+        The copy isn't linked to a parent and has the same dirty paths, but
+        converts its values anew.
 
         """
+        copied = type(self).__new__(type(self))
+        copied.__dict__.update(self.__dict__)
+        for name in self._tracking_attributes:
+            copied.__dict__.pop(name, None)
+        dict.update(copied, [(key, _detached(value))
+                             for key, value in dict.iteritems(self)])
+        if self._dirty_paths:
+            object.__setattr__(copied, '_dirty_paths', set(self._dirty_paths))
+        return copied
+
+    def __deepcopy__(self, memo):
+        copied = self.__copy__()
+        memo[id(self)] = copied
+        for key, value in dict.items(copied):
+            dict.__setitem__(copied, key, deepcopy(value, memo))
+        return copied
+
+    def __getitem__(self, key):
+        conversion = self.__get_conversion(key)
         if conversion is None:
-            return value
+            return _adopt(self, key, dict.__getitem__(self, key))
 
-        if isinstance(conversion, dict):
-            return ConversionDict(value, conversion)
+        cache = self._converted_values
+        if cache is None:
+            cache = {}
+            object.__setattr__(self, '_converted_values', cache)
+        elif key in cache:
+            return cache[key]
 
-        if isinstance(value, list):
-            return [conversion(x) for x in value]
+        value = _convert_value(dict.__getitem__(self, key), conversion)
+        cache[key] = _adopt(self, key, value)
+        return value
 
-        return conversion(value)
+    def __forget_converted(self, key):
+        """Drop the cached conversion of `key` and unlink it from this dict."""
+        if self._converted_values:
+            _orphan(self, self._converted_values.pop(key, None))
 
     def __get_conversion(self, key):
         if self._conversions:
@@ -127,12 +186,89 @@ class ConversionDict(dict):
         the instance or the class (which allows the tests to dingus out methods
         on instances).
 
+        Class attributes are looked up in :attr:`_attribute_names` rather than
+        with :func:`dir` to keep assignment cheap.
+
         """
-        if name in self.NONKEY_ATTRS or name in dir(self):
+        if (name in self.NONKEY_ATTRS or name in self._attribute_names
+                or name in self.__dict__):
             object.__setattr__(self, name, value)
         else:
             self.__setitem__(name, value)
 
+    def __setitem__(self, key, value):
+        self.__forget_converted(key)
+        dict.__setitem__(self, key, _unwrap(value))
+        self._mark_dirty((key,))
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.__forget_converted(key)
+        self._mark_dirty((key,))
+
+    def update(self, *args, **kwargs):
+        """Update this dictionary, recording each updated key as dirty."""
+        other = dict(*map(inflated, args), **kwargs)
+        for key, value in other.iteritems():
+            self.__forget_converted(key)
+            dict.__setitem__(self, key, _unwrap(value))
+            self._mark_dirty((key,))
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *args):
+        present = key in self
+        value = dict.pop(self, key, *args)
+        if present:
+            self.__forget_converted(key)
+            self._mark_dirty((key,))
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self.__forget_converted(key)
+        self._mark_dirty((key,))
+        return key, value
+
+    def clear(self):
+        keys = self.keys()
+        dict.clear(self)
+        for key in keys:
+            self.__forget_converted(key)
+            self._mark_dirty((key,))
+
+    def _mark_dirty(self, path):
+        """Record that the value at `path` (a tuple of keys) has changed."""
+        if self._dirty_paths is None:
+            object.__setattr__(self, '_dirty_paths', set())
+        self._dirty_paths.add(path)
+
+        if self._parent is not None:
+            self._parent._child_changed(self._parent_key, self, path)
+
+    def _child_changed(self, key, child, path):
+        """Store the adopted `child` at `key` after it changed at `path`."""
+        dict.__setitem__(self, key, child)
+        self._mark_dirty((key,) + path)
+
+    def get_dirty_paths(self):
+        """Return a :class:`frozenset` of the paths changed since this
+        dictionary was created or last marked clean.
+
+        Each path is a tuple of keys leading from this dictionary to the
+        changed (or removed) value.  Changes made through embedded
+        :class:`ConversionDict` values are included.
+
+        """
+        return frozenset(self._dirty_paths or ())
+
+    def mark_clean(self):
+        """Forget all changes recorded by :meth:`get_dirty_paths`."""
+        object.__setattr__(self, '_dirty_paths', None)
+
     def iteritems(self):
         """Iterate the items in this :class:`ConversionDict`.
 
@@ -140,9 +276,8 @@ class ConversionDict(dict):
         values returned by this generator are converted to appropriate types.
 
         """
-        for key, value in dict.iteritems(self):
-            conversion = self.__get_conversion(key)
-            yield key, self.__convert_value(value, conversion)
+        for key in dict.iterkeys(self):
+            yield key, self.__getitem__(key)
 
     def itervalues(self):
         """Iterate the values in this :class:`ConversionDict`.
@@ -162,6 +297,263 @@ class ConversionDict(dict):
         return [value for value in self.itervalues()]
 
 
+ConversionDict._attribute_names = frozenset(dir(ConversionDict))
+
+
+class ConversionList(list):
+    """A :class:`list` whose elements are converted as they are accessed.
+
+    The list itself holds the unconverted elements, so it can be used
+    anywhere the original array could (e.g. it is encoded to BSON or JSON
+    unchanged).  Indexing, iterating and the other list methods return the
+    converted elements instead.  Elements are converted the first time they
+    are accessed and the converted values are cached.  Taking the length or a
+    slice of a :class:`ConversionList` does not convert any elements.
+
+    >>> cl = ConversionList(['1', '2'], int)
+    >>> cl[1]
+    2
+    >>> cl.append('3')
+    >>> cl[1:]
+    ConversionList(['2', '3'])
+
+    :param values: is the list of elements to copy.
+    :param conversion: is the conversion applied to each element.  It takes
+        the same form as the values of :attr:`ConversionDict._conversions`.
+
+    """
+
+    _parent = None
+    _parent_key = None
+
+    def __init__(self, values, conversion):
+        if isinstance(values, ConversionList):
+            # Only a ConversionList may hold adopted wrappers in its storage.
+            values = [_unwrap(value) for value in list.__iter__(values)]
+        list.__init__(self, values)
+        self._conversion = conversion
+        self._converted_values = {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ConversionList(
+                list.__getitem__(self, index), self._conversion)
+
+        value = list.__getitem__(self, index)
+        if index < 0:
+            index += len(self)
+        try:
+            return self._converted_values[index]
+        except KeyError:
+            pass
+
+        converted = _adopt(
+            self, index, _convert_value(value, self._conversion))
+        self._converted_values[index] = converted
+        return converted
+
+    def __getslice__(self, start, stop):
+        return self.__getitem__(slice(start, stop))
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def __reversed__(self):
+        for index in reversed(xrange(len(self))):
+            yield self[index]
+
+    def __contains__(self, value):
+        return any(element == value for element in self)
+
+    def index(self, value, *args):
+        return list(self).index(value, *args)
+
+    def count(self, value):
+        return list(self).count(value)
+
+    def __add__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(other) + list(self)
+
+    def __mul__(self, count):
+        return list(self) * count
+
+    __rmul__ = __mul__
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            list.__setitem__(self, index, _raw_elements(value))
+            self._reset()
+            return
+
+        list.__setitem__(self, index, _unwrap(value))
+        if index < 0:
+            index += len(self)
+        _orphan(self, self._converted_values.pop(index, None))
+        self._mark_dirty((index,))
+
+    def __setslice__(self, start, stop, values):
+        self.__setitem__(slice(start, stop), values)
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._reset()
+
+    def __delslice__(self, start, stop):
+        self.__delitem__(slice(start, stop))
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def __imul__(self, count):
+        list.__imul__(self, count)
+        self._reset()
+        return self
+
+    def append(self, value):
+        list.append(self, _unwrap(value))
+        self._mark_dirty(())
+
+    def extend(self, values):
+        list.extend(self, _raw_elements(values))
+        self._mark_dirty(())
+
+    def insert(self, index, value):
+        list.insert(self, index, _unwrap(value))
+        self._reset()
+
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def reverse(self):
+        list.reverse(self)
+        self._reset()
+
+    def sort(self, *args, **kwargs):
+        """Sort the converted elements in place."""
+        elements = list(self)
+        elements.sort(*args, **kwargs)
+        list.__setitem__(self, slice(None), _raw_elements(elements))
+        self._reset()
+
+    def __repr__(self):
+        return 'ConversionList({0!r})'.format(_raw_elements(self))
+
+    def __reduce__(self):
+        # Copies and pickles are plain lists of the unconverted elements.
+        return list, (_raw_elements(self),)
+
+    def _reset(self):
+        """Forget all converted elements after the indexes have shifted."""
+        for value in self._converted_values.itervalues():
+            _orphan(self, value)
+        self._converted_values.clear()
+        self._mark_dirty(())
+
+    def _mark_dirty(self, path):
+        if self._parent is not None:
+            self._parent._child_changed(self._parent_key, self, path)
+
+    def _child_changed(self, index, child, path):
+        """Store the adopted `child` at `index` after it changed at `path`."""
+        list.__setitem__(self, index, child)
+        self._mark_dirty((index,) + path)
+
+
+def _convert_value(value, conversion):
+    """Convert `value` using `conversion`.
+
+    If `conversion` is ``None`` or `value` is ``None`` then `value` is
+    returned unchanged.  So are values other than :class:`dict`\ s when
+    `conversion` wraps embedded documents.
+
+    """
+    if conversion is None or value is None:
+        return value
+
+    if isinstance(value, list):
+        return ConversionList(value, conversion)
+
+    if _wraps_documents(conversion) and not isinstance(value, dict):
+        return value
+
+    if isinstance(conversion, dict):
+        return ConversionDict(value, conversion)
+
+    return conversion(value)
+
+
+def _wraps_documents(conversion):
+    """Return ``True`` if `conversion` wraps a :class:`dict` in another."""
+    if isinstance(conversion, dict):
+        return True
+    return isinstance(conversion, type) and issubclass(conversion, dict)
+
+
+def _adopt(parent, key, value):
+    """Link `value` to `parent` if it is a :class:`ConversionDict` or
+    :class:`ConversionList`.
+
+    Changes made to an adopted value are written back to `key` in `parent` and
+    recorded as dirty paths of `parent`.
+
+    """
+    if isinstance(value, (ConversionDict, ConversionList)):
+        object.__setattr__(value, '_parent', parent)
+        object.__setattr__(value, '_parent_key', key)
+    return value
+
+
+def _orphan(parent, value):
+    """Unlink `value` from `parent` if it was adopted by `parent`."""
+    if getattr(value, '_parent', None) is parent:
+        object.__setattr__(value, '_parent', None)
+
+
+def _detached(value):
+    """Return `value` with any :class:`ConversionDict` or
+    :class:`ConversionList` in it replaced by a plain copy, so that it isn't
+    linked to a parent."""
+    if isinstance(value, ConversionDict):
+        return dict((key, _detached(item))
+                    for key, item in dict.iteritems(value))
+    if isinstance(value, ConversionList):
+        return [_detached(item) for item in list.__iter__(value)]
+    return value
+
+
+def _unwrap(value):
+    """Return the value that should be stored in place of `value`.
+
+    A :class:`ConversionList` is copied so that it isn't shared with the
+    parent it was adopted by.
+
+    """
+    if isinstance(value, ConversionList):
+        return list.__getitem__(value, slice(None))
+    return value
+
+
+def _raw_elements(values):
+    """Return a list of the unconverted elements of `values`."""
+    if isinstance(values, ConversionList):
+        return list.__getitem__(values, slice(None))
+    return [_unwrap(value) for value in values]
+
+
 def dot_expand_dict(body):
     """Create nested dictionary structure from every key in ``body``.
 
@@ -0,0 +1,111 @@
+"""
+JSON Schema
+===========
+
+Translate document structures into ``$jsonSchema`` collection validators so
+that the server can enforce them as well.
+
+"""
+from datetime import datetime
+from inspect import isclass
+from uuid import UUID
+
+from bson import Binary, ObjectId
+
+from scalymongo.schema_operators import IS, OR
+
+
+BSON_TYPES = [
+    (bool, ['bool']),
+    (int, ['int', 'long']),
+    (long, ['int', 'long']),
+    (float, ['double']),
+    (basestring, ['string']),
+    (datetime, ['date']),
+    (ObjectId, ['objectId']),
+    (Binary, ['binData']),
+    (UUID, ['binData']),
+    (dict, ['object']),
+    (list, ['array']),
+]
+"""The BSON types accepted for values of each Python type.
+
+:class:`bool` comes first since it is a subclass of :class:`int`.  Python
+integers may be stored as either 32 or 64 bit integers depending on their
+size.
+
+"""
+
+
+def make_json_schema(structure, required_fields=()):
+    """Return a ``$jsonSchema`` equivalent to `structure`.
+
+    Like client-side validation the schema rejects any fields not declared in
+    `structure` (except ``_id``) and requires the top-level
+    `required_fields`.  Values declared with types which have no BSON
+    equivalent are not restricted.
+
+    """
+    schema = _object_schema(structure)
+    schema['properties'].setdefault('_id', {})
+    if required_fields:
+        schema['required'] = sorted(required_fields)
+    return schema
+
+
+def field_schema(field_type):
+    """Return the ``$jsonSchema`` for values declared as `field_type`."""
+    if isinstance(field_type, dict):
+        return _object_schema(field_type)
+    if isinstance(field_type, list):
+        return {'bsonType': 'array', 'items': field_schema(field_type[0])}
+    if isinstance(field_type, IS):
+        return {'enum': sorted(field_type.valid_values)}
+    if isinstance(field_type, OR):
+        return _any_of([field_schema(type_)
+                        for type_ in field_type.valid_types])
+    if isclass(field_type):
+        for value_type, bson_types in BSON_TYPES:
+            if issubclass(field_type, value_type):
+                return _bson_type(bson_types)
+    return {}
+
+
+def _object_schema(structure):
+    properties = {}
+    type_key_schemas = []
+    for field, field_type in structure.iteritems():
+        if isclass(field):
+            # All field names in BSON are strings so any type key describes
+            # the remaining fields.
+            type_key_schemas.append(field_schema(field_type))
+        else:
+            properties[field] = field_schema(field_type)
+
+    schema = {'bsonType': 'object', 'properties': properties}
+    if type_key_schemas:
+        schema['additionalProperties'] = _any_of(type_key_schemas)
+    else:
+        schema['additionalProperties'] = False
+    return schema
+
+
+def _any_of(schemas):
+    """Return a schema matching any of `schemas`."""
+    if {} in schemas:
+        return {}
+    bson_types = []
+    for schema in schemas:
+        if schema.keys() != ['bsonType']:
+            return {'anyOf': schemas}
+        types = schema['bsonType']
+        for bson_type in types if isinstance(types, list) else [types]:
+            if bson_type not in bson_types:
+                bson_types.append(bson_type)
+    return _bson_type(bson_types)
+
+
+def _bson_type(bson_types):
+    if len(bson_types) == 1:
+        return {'bsonType': bson_types[0]}
+    return {'bsonType': list(bson_types)}
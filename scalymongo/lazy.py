@@ -0,0 +1,259 @@
+"""
+Lazy
+====
+
+Documents which decode their fields from raw BSON as they are accessed.
+
+"""
+import struct
+
+from bson import BSON
+
+
+_INT32 = struct.Struct('<i')
+
+_FIXED_SIZES = {
+    '\x01': 8,   # double
+    '\x06': 0,   # undefined
+    '\x07': 12,  # ObjectId
+    '\x08': 1,   # boolean
+    '\x09': 8,   # UTC datetime
+    '\x0A': 0,   # null
+    '\x10': 4,   # int32
+    '\x11': 8,   # timestamp
+    '\x12': 8,   # int64
+    '\x13': 16,  # decimal128
+    '\xFF': 0,   # min key
+    '\x7F': 0,   # max key
+}
+"""Map BSON element types to the size of their values in bytes."""
+
+_STRING_TYPES = frozenset(['\x02', '\x0D', '\x0E'])
+"""BSON types whose values are an int32 length followed by that many bytes."""
+
+_DOCUMENT_TYPES = frozenset(['\x03', '\x04', '\x0F'])
+"""BSON types whose values start with an int32 of their total size."""
+
+
+class RawFields(object):
+    """The not yet decoded top-level fields of a BSON document.
+
+    Fields are located by scanning the document only as far as needed and
+    each field is decoded on its own.
+
+    :param data: is the encoded BSON document.
+
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.offsets = {}
+        self.position = 4
+        self.end = len(data) - 1
+
+    def __contains__(self, key):
+        return key in self.offsets or self._scan(key)
+
+    def keys(self):
+        """Return a list of all remaining field names."""
+        self._scan(None)
+        return self.offsets.keys()
+
+    def __len__(self):
+        self._scan(None)
+        return len(self.offsets)
+
+    def pop(self, key):
+        """Decode and return the value of `key`, removing it from the fields.
+        """
+        if key not in self:
+            raise KeyError(key)
+        start, end = self.offsets.pop(key)
+        element = self.data[start:end]
+        document = _INT32.pack(len(element) + 5) + element + '\x00'
+        return BSON(document).decode().values()[0]
+
+    def discard(self, key):
+        """Remove `key` from the fields without decoding it."""
+        if key in self:
+            del self.offsets[key]
+
+    def _scan(self, wanted):
+        """Index elements until `wanted` is found or the document ends.
+
+        Returns ``True`` iff `wanted` was found.
+
+        """
+        data = self.data
+        position = self.position
+        while position < self.end:
+            start = position
+            element_type = data[position]
+            name_end = data.index('\x00', position + 1)
+            key = data[position + 1:name_end].decode('utf-8')
+            position = _skip_value(data, element_type, name_end + 1)
+            self.offsets[key] = (start, position)
+            if key == wanted:
+                self.position = position
+                return True
+        self.position = position
+        return False
+
+
+def _skip_value(data, element_type, position):
+    """Return the position just after the value starting at `position`."""
+    size = _FIXED_SIZES.get(element_type)
+    if size is not None:
+        return position + size
+
+    if element_type in _STRING_TYPES:
+        return position + 4 + _INT32.unpack_from(data, position)[0]
+
+    if element_type in _DOCUMENT_TYPES:
+        return position + _INT32.unpack_from(data, position)[0]
+
+    if element_type == '\x05':  # binary
+        return position + 5 + _INT32.unpack_from(data, position)[0]
+
+    if element_type == '\x0B':  # regular expression
+        position = data.index('\x00', position) + 1
+        return data.index('\x00', position) + 1
+
+    if element_type == '\x0C':  # DBPointer
+        return position + 16 + _INT32.unpack_from(data, position)[0]
+
+    raise ValueError(
+        'Unknown BSON element type {0!r}'.format(element_type))
+
+
+class LazyDocumentMixin(object):
+    """Mixin for documents loaded from raw BSON.
+
+    Each top-level field is decoded the first time it is used and is then
+    handled exactly as in a regular document.  Operations involving the whole
+    document (iteration, comparison, validation, ...) decode any remaining
+    fields first.
+
+    Undecoded fields are not in the underlying :class:`dict`, which C code
+    such as ``dict(doc)``, :func:`json.dumps` and :meth:`bson.BSON.encode`
+    reads directly.  Such code must be given the document only after
+    :meth:`inflate` or :func:`inflated`.  ScalyMongo does so itself when
+    documents are wrapped, saved, inserted or used to update others.
+
+    This should only be mixed into a
+    :class:`~scalymongo.document.Document` subclass via
+    :meth:`~scalymongo.document.Document.lazy_class`.
+
+    :param raw: is the encoded BSON document, or an object such as
+        :class:`bson.raw_bson.RawBSONDocument` with the encoded document in its
+        ``raw`` attribute.
+
+    """
+
+    _raw_fields = None
+
+    def __init__(self, raw):
+        data = getattr(raw, 'raw', raw)
+        object.__setattr__(self, '_raw_fields', RawFields(data))
+        super(LazyDocumentMixin, self).__init__()
+
+    def _inflate_key(self, key):
+        """Decode `key` into the dictionary if it has not been yet."""
+        fields = self._raw_fields
+        if fields is not None and key in fields:
+            dict.__setitem__(self, key, fields.pop(key))
+
+    def inflate(self):
+        """Decode all remaining fields.
+
+        This must be done before handing the document to code which reads the
+        underlying :class:`dict` directly.
+
+        """
+        fields = self._raw_fields
+        if fields is None:
+            return
+        for key in fields.keys():
+            dict.__setitem__(self, key, fields.pop(key))
+        object.__setattr__(self, '_raw_fields', None)
+
+    def __getitem__(self, key):
+        self._inflate_key(key)
+        return super(LazyDocumentMixin, self).__getitem__(key)
+
+    def get(self, key, default=None):
+        self._inflate_key(key)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        fields = self._raw_fields
+        return dict.__contains__(self, key) or (
+            fields is not None and key in fields)
+
+    has_key = __contains__
+
+    def __len__(self):
+        fields = self._raw_fields
+        return dict.__len__(self) + (len(fields) if fields is not None else 0)
+
+    def __delitem__(self, key):
+        self._inflate_key(key)
+        super(LazyDocumentMixin, self).__delitem__(key)
+
+    def setdefault(self, key, default=None):
+        self._inflate_key(key)
+        return super(LazyDocumentMixin, self).setdefault(key, default)
+
+    def pop(self, key, *args):
+        self._inflate_key(key)
+        return super(LazyDocumentMixin, self).pop(key, *args)
+
+    def clear(self):
+        self.inflate()
+        super(LazyDocumentMixin, self).clear()
+
+    def __eq__(self, other):
+        self.inflate()
+        if isinstance(other, LazyDocumentMixin):
+            other.inflate()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        self.inflate()
+        return super(LazyDocumentMixin, self).__repr__()
+
+    def _mark_dirty(self, path):
+        # Any key written by a mutator must not be decoded over later.
+        if self._raw_fields is not None:
+            self._raw_fields.discard(path[0])
+        super(LazyDocumentMixin, self)._mark_dirty(path)
+
+
+def inflated(document):
+    """Return `document` after decoding any of its undecoded fields.
+
+    Values other than lazy documents are returned unchanged.
+
+    """
+    if isinstance(document, LazyDocumentMixin):
+        document.inflate()
+    return document
+
+
+def _make_inflating_method(name):
+    """Make a method which inflates the document before calling `name`."""
+    def _method(self, *args, **kwargs):
+        self.inflate()
+        return getattr(super(LazyDocumentMixin, self), name)(*args, **kwargs)
+
+    _method.__name__ = name
+    return _method
+
+
+for _name in ['__iter__', 'iterkeys', 'keys', 'iteritems', 'items',
+              'itervalues', 'values', 'popitem', 'copy', '__copy__',
+              '__deepcopy__']:
+    setattr(LazyDocumentMixin, _name, _make_inflating_method(_name))
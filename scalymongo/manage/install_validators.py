@@ -0,0 +1,86 @@
+from optparse import OptionParser
+
+from scalymongo.connection import Connection
+
+
+def parse_arguments():
+    """Parse and validate the arguments.
+
+    This returns a tuple like ``(options, module_name, endpoint)``.
+
+    """
+    parser = OptionParser()
+    parser.usage = '%prog [options] MODULE ENDPOINT'
+    parser.add_option(
+        '--validation-level', choices=['strict', 'moderate'],
+        help='which documents are validated: strict or moderate'
+             ' [default: %default]',
+    )
+    parser.add_option(
+        '--validation-action', choices=['error', 'warn'],
+        help='what to do with invalid documents: error or warn'
+             ' [default: %default]',
+    )
+    parser.set_defaults(validation_level='strict', validation_action='error')
+
+    options, arguments = parser.parse_args()
+
+    if len(arguments) != 2:
+        parser.print_help()
+        exit(1)
+
+    module_name, endpoint = arguments
+    return options, module_name, endpoint
+
+
+def main():
+    options, module_name, endpoint = parse_arguments()
+
+    # Import the models so that they get registered with Connection.
+    __import__(module_name)
+
+    connection = Connection(endpoint)
+    install_validators(connection, options)
+
+
+def install_validators(connection, options):
+    """Install a ``$jsonSchema`` validator on each model's collection.
+
+    Collections shared by several models accept documents matching any of
+    their schemas.
+
+    """
+    schemas = {}
+    databases = {}
+    for model in connection.models:
+        key = (model.__database__, model.__collection__)
+        schemas.setdefault(key, []).append(model.json_schema())
+        databases[key] = model.database
+
+    for key, model_schemas in schemas.iteritems():
+        if len(model_schemas) == 1:
+            schema = model_schemas[0]
+        else:
+            schema = {'anyOf': model_schemas}
+        install_validator(databases[key], key[1], schema, options)
+
+
+def install_validator(database, collection, schema, options):
+    """Set `schema` as the validator of `collection` in `database`.
+
+    The collection is created if it doesn't exist yet.
+
+    """
+    kwargs = {
+        'validator': {'$jsonSchema': schema},
+        'validationLevel': options.validation_level,
+        'validationAction': options.validation_action,
+    }
+    if collection in database.collection_names():
+        database.command('collMod', collection, **kwargs)
+    else:
+        database.create_collection(collection, **kwargs)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,253 @@
+"""
+Modifiers
+=========
+
+Apply update modifiers to documents in memory the same way the server would.
+
+This lets :meth:`~scalymongo.document.Document.modify` update the local copy
+of a document without having the server send the whole document back.
+
+"""
+
+_MISSING = object()
+
+
+def check_local_update_modifier(update):
+    """Raise a :class:`ValueError` if `update` can't be applied locally.
+
+    Only the modifiers in :data:`LOCAL_MODIFIERS` are supported.  The
+    positional operator (``$``) and modifiers of ``$push`` or ``$addToSet``
+    other than ``$each`` can't be applied either.  ``$pull`` conditions may
+    only match literal values, so they can't use query operators or dotted
+    field names at any depth.
+
+    """
+    for modifier, args in update.iteritems():
+        if modifier not in LOCAL_MODIFIERS:
+            raise ValueError(
+                'The {0} modifier cannot be applied locally.'.format(modifier))
+        for path, value in args.iteritems():
+            if '$' in path.split('.'):
+                raise ValueError(
+                    'The positional operator in {0!r} cannot be applied'
+                    ' locally.'.format(path))
+            if modifier in ('$push', '$addToSet'):
+                operators = set(_operators(value))
+                operators.discard('$each')
+                if operators:
+                    raise ValueError(
+                        'The {0} operator of {1} cannot be applied'
+                        ' locally.'.format(operators.pop(), modifier))
+            if modifier == '$pull':
+                for key in _condition_keys(value):
+                    if key.startswith('$') or '.' in key:
+                        raise ValueError(
+                            'The condition {0!r} of $pull cannot be applied'
+                            ' locally.'.format(key))
+
+
+def modified_fields(update):
+    """Return a :class:`set` of the top-level fields changed by `update`."""
+    fields = set()
+    for modifier, args in update.iteritems():
+        for path, value in args.iteritems():
+            fields.add(path.split('.')[0])
+            if modifier == '$rename':
+                fields.add(value.split('.')[0])
+    return fields
+
+
+def apply_update_modifier(document, update):
+    """Apply the update modifier `update` to `document` in place.
+
+    `document` should contain plain :class:`dict` and :class:`list` values.
+    `update` should have been checked with
+    :func:`check_local_update_modifier`.
+
+    """
+    for modifier, args in update.iteritems():
+        apply_modifier = LOCAL_MODIFIERS[modifier]
+        for path, value in args.iteritems():
+            apply_modifier(document, path.split('.'), value)
+
+
+def _set(document, path, value):
+    _put(_container(document, path, True), path[-1], value)
+
+
+def _unset(document, path, value):
+    container = _container(document, path, False)
+    if container is None:
+        return
+    key = path[-1]
+    if isinstance(container, list):
+        # Unsetting an array element leaves a null in its place.
+        if int(key) < len(container):
+            container[int(key)] = None
+    else:
+        container.pop(key, None)
+
+
+def _inc(document, path, value):
+    container = _container(document, path, True)
+    current = _get(container, path[-1])
+    if current is not _MISSING:
+        value += current
+    _put(container, path[-1], value)
+
+
+def _push(document, path, value):
+    _array(document, path).extend(_each(value))
+
+
+def _push_all(document, path, values):
+    _array(document, path).extend(values)
+
+
+def _add_to_set(document, path, value):
+    array = _array(document, path)
+    for item in _each(value):
+        if item not in array:
+            array.append(item)
+
+
+def _pop(document, path, value):
+    array = _existing_array(document, path)
+    if array:
+        del array[-1 if value > 0 else 0]
+
+
+def _pull(document, path, condition):
+    array = _existing_array(document, path)
+    if array:
+        array[:] = [item for item in array
+                    if not _pull_matches(item, condition)]
+
+
+def _pull_all(document, path, values):
+    array = _existing_array(document, path)
+    if array:
+        array[:] = [item for item in array if item not in values]
+
+
+def _rename(document, path, new_name):
+    container = _container(document, path, False)
+    if container is None or path[-1] not in container:
+        return
+    value = container.pop(path[-1])
+    _set(document, new_name.split('.'), value)
+
+
+LOCAL_MODIFIERS = {
+    '$set': _set,
+    '$unset': _unset,
+    '$inc': _inc,
+    '$push': _push,
+    '$pushAll': _push_all,
+    '$addToSet': _add_to_set,
+    '$pop': _pop,
+    '$pull': _pull,
+    '$pullAll': _pull_all,
+    '$rename': _rename,
+}
+"""The update modifiers that can be applied locally and how to apply each."""
+
+
+def _container(document, path, create):
+    """Return the :class:`dict` or :class:`list` holding the field at
+    `path`.
+
+    Missing embedded documents are created if `create` is ``True``, otherwise
+    ``None`` is returned.
+
+    """
+    container = document
+    for key in path[:-1]:
+        child = _get(container, key)
+        if child is _MISSING or child is None:
+            if not create:
+                return None
+            child = {}
+            _put(container, key, child)
+        container = child
+    return container
+
+
+def _get(container, key):
+    if isinstance(container, list):
+        index = int(key)
+        if index < len(container):
+            return container[index]
+        return _MISSING
+    return container.get(key, _MISSING)
+
+
+def _put(container, key, value):
+    if isinstance(container, list):
+        index = int(key)
+        # Setting past the end of an array pads it with nulls.
+        container.extend([None] * (index + 1 - len(container)))
+        container[index] = value
+    else:
+        container[key] = value
+
+
+def _array(document, path):
+    """Return the array at `path`, creating an empty one if it's missing."""
+    container = _container(document, path, True)
+    array = _get(container, path[-1])
+    if array is _MISSING:
+        array = []
+        _put(container, path[-1], array)
+    return array
+
+
+def _existing_array(document, path):
+    """Return the array at `path` or ``None`` if it's missing."""
+    container = _container(document, path, False)
+    if container is None:
+        return None
+    array = _get(container, path[-1])
+    if array is _MISSING:
+        return None
+    return array
+
+
+def _each(value):
+    """Return the values added by a ``$push`` or ``$addToSet`` of `value`."""
+    if isinstance(value, dict) and '$each' in value:
+        return value['$each']
+    return [value]
+
+
+def _operators(value):
+    if not isinstance(value, dict):
+        return []
+    return [key for key in value if key.startswith('$')]
+
+
+def _condition_keys(condition):
+    """Yield the keys of all documents nested anywhere in `condition`."""
+    if isinstance(condition, dict):
+        for key, value in condition.iteritems():
+            yield key
+            for nested_key in _condition_keys(value):
+                yield nested_key
+    elif isinstance(condition, list):
+        for value in condition:
+            for nested_key in _condition_keys(value):
+                yield nested_key
+
+
+def _pull_matches(item, condition):
+    """Return ``True`` if `item` should be removed by a ``$pull`` of
+    `condition`.
+
+    A document `condition` matches embedded documents having all of its
+    fields.  Anything else matches equal values.
+
+    """
+    if isinstance(condition, dict) and isinstance(item, dict):
+        return all(item.get(key, _MISSING) == value
+                   for key, value in condition.iteritems())
+    return item == condition
@@ -0,0 +1,268 @@
+"""
+Pipeline
+========
+
+Prepare documents for bulk imports in a pool of worker processes.
+
+Applying :attr:`~scalymongo.document.Document.default_values` to and
+validating each document is pure Python work bound to a single core.
+:func:`bulk_import` spreads that work across a :mod:`multiprocessing` pool
+while the parent process writes the prepared batches:
+
+.. code-block:: python
+
+    stats = bulk_import(connection.models.User, read_users(), w=1)
+    print '{0:.0f} documents/s'.format(stats.documents_per_second())
+
+"""
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+
+from bson import BSON
+from bson.errors import BSONError
+
+from scalymongo.errors import ValidationError
+
+
+DEFAULT_BATCH_SIZE = 1000
+"""The number of documents sent to a worker process at a time."""
+
+
+class PreparedBatch(object):
+    """A batch of documents prepared by :func:`prepare_documents`.
+
+    Documents are identified by their index in the whole import.
+
+    """
+
+    def __init__(self, start, count, indexes, documents, errors, seconds,
+                 sizes=None):
+        self.start = start
+        """The index of the first document of the batch."""
+        self.count = count
+        """The number of documents in the batch."""
+        self.indexes = indexes
+        """A list of the indexes of the :attr:`documents`."""
+        self.documents = documents
+        """A list of the documents which passed validation as :class:`dict`\ s
+        with default values applied."""
+        self.errors = errors
+        """A :class:`dict` mapping the indexes of rejected documents to the
+        exception describing why they were rejected."""
+        self.seconds = seconds
+        """The time spent preparing the batch."""
+        self.sizes = sizes
+        """A list of the size in BSON of each of the :attr:`documents`, or
+        ``None`` if it isn't known."""
+
+
+class ImportStats(object):
+    """Counters describing a :func:`bulk_import`."""
+
+    def __init__(self):
+        self.documents = 0
+        """The number of documents read."""
+        self.written = 0
+        """The number of documents written."""
+        self.batches = 0
+        """The number of batches written."""
+        self.errors = {}
+        """A :class:`dict` mapping the indexes of documents which failed
+        validation or could not be written to the exception describing
+        why."""
+        self.prepare_seconds = 0.0
+        """The time spent by all workers preparing documents."""
+        self.write_seconds = 0.0
+        """The time spent writing documents."""
+        self.elapsed = 0.0
+        """The time taken by the whole import."""
+
+    def documents_per_second(self):
+        """Return the number of documents read per second of the import."""
+        if not self.elapsed:
+            return 0.0
+        return self.documents / self.elapsed
+
+    def __repr__(self):
+        return ('<ImportStats documents={0} written={1} errors={2}'
+                ' elapsed={3:.3f}>'.format(
+                    self.documents, self.written, len(self.errors),
+                    self.elapsed))
+
+
+def prepare_documents(model, documents, start=0, validate=True):
+    """Apply the default values of `model` to `documents` and validate them.
+
+    Each valid document is also encoded as BSON to find its size, so that
+    documents which can't be encoded are rejected here too.
+
+    :param model: is the :class:`~scalymongo.document.Document` subclass
+        the documents belong to.
+    :param documents: is a list of :class:`dict`\ s.
+    :param start: (optional) is the index of the first document in the
+        import.
+    :param validate: (optional) if ``False`` the documents aren't validated.
+
+    Returns a :class:`PreparedBatch`.
+
+    """
+    began = time.time()
+    prepared = [dict(document) for document in model.wrap_many(documents)]
+
+    errors = {}
+    if validate:
+        report = model.validate_many(prepared)
+        for index, failures in report.errors().iteritems():
+            errors[start + index] = ValidationError(failures[0].message)
+        valid = report.valid_indexes()
+    else:
+        valid = range(len(prepared))
+
+    indexes = []
+    sizes = []
+    for index in valid:
+        try:
+            sizes.append(len(BSON.encode(prepared[index])))
+        except BSONError as ex:
+            errors[start + index] = ex
+        else:
+            indexes.append(index)
+
+    return PreparedBatch(
+        start, len(prepared), [start + index for index in indexes],
+        [prepared[index] for index in indexes], errors, time.time() - began,
+        sizes)
+
+
+def prepare_batches(model, documents, batch_size=DEFAULT_BATCH_SIZE,
+                    processes=None, validate=True):
+    """Prepare `documents` with :func:`prepare_documents` in a process pool.
+
+    `model` is sent to each worker process once when it starts and only
+    the documents are sent with each batch.  At most two batches per
+    process are in flight so that `documents` is read no faster than the
+    batches are consumed.
+
+    :param processes: (optional) is the number of worker processes.  It
+        defaults to the number of CPUs.
+
+    Yields a :class:`PreparedBatch` for every `batch_size` documents in the
+    order they were read.
+
+    """
+    processes = processes or cpu_count()
+    pool = Pool(processes, _init_worker, (model, validate))
+    finished = False
+    try:
+        pending = deque()
+        for task in _numbered_batches(documents, batch_size):
+            pending.append(pool.apply_async(_prepare_batch, (task,)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        finished = True
+    finally:
+        if finished:
+            pool.close()
+        else:
+            # Don't leave workers preparing batches nobody will read.
+            pool.terminate()
+        pool.join()
+
+
+def bulk_import(model, documents, writer=None, batch_size=DEFAULT_BATCH_SIZE,
+                processes=None, validate=True, on_batch=None, **kwargs):
+    """Prepare `documents` in a process pool and write them in batches.
+
+    :param model: is the :class:`~scalymongo.document.Document` subclass to
+        import documents of.
+    :param documents: is an iterable of :class:`dict`\ s.
+    :param writer: (optional) is called with each :class:`PreparedBatch`
+        in order and should return the number of documents it wrote.  Any
+        documents it could not write should be added to the batch's
+        :attr:`~PreparedBatch.errors`.  It defaults to
+        :func:`insert_batch`.
+    :param batch_size: (optional) is the number of documents in each
+        batch.
+    :param processes: (optional) is the number of worker processes.
+    :param validate: (optional) if ``False`` documents aren't validated.
+    :param on_batch: (optional) is called with the :class:`ImportStats`
+        after each batch is written, e.g. to report progress.
+    :param kwargs: (optional) is the write concern for the default writer.
+
+    Returns the :class:`ImportStats` of the import.
+
+    """
+    if writer is None:
+        writer = lambda batch: insert_batch(model, batch, **kwargs)
+
+    stats = ImportStats()
+    began = time.time()
+    for batch in prepare_batches(
+            model, documents, batch_size, processes, validate):
+        write_began = time.time()
+        written = writer(batch)
+        stats.write_seconds += time.time() - write_began
+
+        stats.documents += batch.count
+        stats.written += written
+        stats.batches += 1
+        stats.errors.update(batch.errors)
+        stats.prepare_seconds += batch.seconds
+        stats.elapsed = time.time() - began
+        if on_batch is not None:
+            on_batch(stats)
+
+    stats.elapsed = time.time() - began
+    return stats
+
+
+def insert_batch(model, batch, **kwargs):
+    """Insert the documents of `batch` with
+    :meth:`~scalymongo.document.Document.insert_prepared`.
+
+    The documents are written as the workers prepared them, without being
+    wrapped, validated or encoded to find their size again.  The insert is
+    unordered so that a write error doesn't stop the rest of the batch.  Any
+    documents which could not be inserted are added to the batch's
+    :attr:`~PreparedBatch.errors`.
+
+    Returns the number of documents inserted.
+
+    """
+    result = model.insert_prepared(
+        batch.documents, batch.sizes, ordered=False, **kwargs)
+    for position, error in result.errors.iteritems():
+        batch.errors[batch.indexes[position]] = error
+    return len(result.inserted)
+
+
+def _numbered_batches(documents, batch_size):
+    """Yield ``(start, batch)`` for each `batch_size` of `documents`."""
+    documents = iter(documents)
+    start = 0
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            return
+        yield start, batch
+        start += len(batch)
+
+
+_worker_model = None
+_worker_validate = True
+
+
+def _init_worker(model, validate):
+    global _worker_model, _worker_validate
+    _worker_model = model
+    _worker_validate = validate
+
+
+def _prepare_batch(task):
+    start, documents = task
+    return prepare_documents(
+        _worker_model, documents, start, _worker_validate)
@@ -7,8 +7,13 @@ The core schema validation logic.
 """
 
 from scalymongo.errors import SchemaError, ValidationError
-from scalymongo.helpers import ConversionDict, dot_expand_dict
-from scalymongo.structure_walker import StructureWalker
+from scalymongo.helpers import (
+    ConversionDict,
+    dot_expand_dict,
+    outermost_paths,
+)
+from scalymongo.lazy import inflated
+from scalymongo.structure_walker import CompiledStructure, StructureWalker
 
 
 class UpdatingList(list):
@@ -50,9 +55,34 @@ class SchemaMetaclass(type):
 
         if name != 'SchemaDocument' and 'structure' in attrs:
             attrs['_conversions'] = make_conversion_dict(attrs['structure'])
+            attrs['_compiled_structure'] = compile_structure(
+                attrs['structure'])
 
         return type.__new__(cls, name, bases, attrs)
 
+    def __init__(cls, name, bases, attrs):
+        type.__init__(cls, name, bases, attrs)
+        cls._refresh_attribute_names()
+
+    def __setattr__(cls, name, value):
+        type.__setattr__(cls, name, value)
+        cls._refresh_attribute_names()
+
+    def __delattr__(cls, name):
+        type.__delattr__(cls, name)
+        cls._refresh_attribute_names()
+
+    def _refresh_attribute_names(cls):
+        """Recompute ``_attribute_names`` for this class and its subclasses.
+
+        :meth:`~scalymongo.helpers.ConversionDict.__setattr__` relies on this
+        to tell attributes from keys without calling :func:`dir`.
+
+        """
+        type.__setattr__(cls, '_attribute_names', frozenset(dir(cls)))
+        for subclass in type.__subclasses__(cls):
+            subclass._refresh_attribute_names()
+
 
 def make_conversion_dict(structure):
     """Build a default conversion dictionary for `structure`
@@ -64,7 +94,7 @@ def make_conversion_dict(structure):
     conversions = {}
     for key, value in structure.iteritems():
         conversion = _make_single_conversion(value)
-        if conversion:
+        if conversion is not None:
             conversions[key] = conversion
 
     if conversions:
@@ -73,15 +103,27 @@ def make_conversion_dict(structure):
 
 def _make_single_conversion(value):
     if isinstance(value, list):
-        return _make_single_conversion(value[0])
+        conversion = _make_single_conversion(value[0])
+        if conversion is None:
+            # Arrays of plain values are still wrapped so that changes made
+            # to them in place are recorded on the parent.
+            return _unconverted
+        return conversion
 
     if isinstance(value, dict):
-        return make_conversion_dict(value)
+        # Embedded dictionaries are always wrapped so that changes made
+        # through them are recorded on the parent.
+        return make_conversion_dict(value) or {}
 
     if isinstance(value, type) and issubclass(value, SchemaDocument):
         return value
 
 
+def _unconverted(value):
+    """The conversion of elements of arrays of plain values."""
+    return value
+
+
 def find_shard_index(indexes):
     """Find the shard key and validate index properties."""
     shard_key_indexes = [index for index in indexes
@@ -121,14 +163,58 @@ class SchemaDocument(ConversionDict):
     NONKEY_ATTRS = set(['collection', 'database', 'connection']) & \
         ConversionDict.NONKEY_ATTRS
 
+    incremental_validation = False
+    """If ``True`` :meth:`validate` only re-checks changed fields.
+
+    After a document first passes validation it remembers the paths changed
+    since (see :meth:`~scalymongo.helpers.ConversionDict.get_dirty_paths`)
+    and later validations only walk those values and check the required
+    fields.  Like :meth:`~scalymongo.document.Document.get_changes` this
+    relies on changes being made through the document, so values it doesn't
+    track must be replaced rather than modified in place.
+
+    """
+
+    _unvalidated_paths = None
+    """The paths changed since this document last passed validation, or
+    ``None`` if it must be validated in full."""
+
+    _tracking_attributes = ConversionDict._tracking_attributes + (
+        '_unvalidated_paths',)
+
     def __init__(self, *args, **kwargs):
-        content = dict(*args, **kwargs)
+        content = dict(*map(inflated, args), **kwargs)
         ConversionDict.__init__(self, content, self._conversions)
 
     def validate(self):
-        validate_structure(self, self.structure)
+        paths = self._unvalidated_paths
+        if paths is None or not self.incremental_validation:
+            self._compiled_structure.validate(self)
+        else:
+            self._compiled_structure.validate_paths(
+                self, outermost_paths(paths))
         validate_required_fields(self, self.required_fields)
 
+        if self.incremental_validation:
+            object.__setattr__(self, '_unvalidated_paths', set())
+
+    def _mark_dirty(self, path):
+        ConversionDict._mark_dirty(self, path)
+        if self._unvalidated_paths is not None:
+            self._unvalidated_paths.add(path)
+
+
+def compile_structure(structure):
+    """Return a :class:`~scalymongo.structure_walker.CompiledStructure` for
+    `structure`.
+
+    The result raises the same errors as :func:`validate_structure`, but
+    avoids interpreting `structure` each time a document is validated.
+
+    """
+    return CompiledStructure(
+        structure, make_field_check, validate_single_field)
+
 
 def validate_structure(body, structure):
     StructureWalker(validate_single_field).walk_dict(body, structure)
@@ -157,6 +243,16 @@ def is_field_of_expected_type(value, expected_type):
     return isinstance(value, expected_type)
 
 
+def make_field_check(expected_type):
+    """Return a predicate equivalent to :func:`is_field_of_expected_type` for
+    the fixed type description `expected_type`.
+    """
+    if hasattr(expected_type, 'evaluate'):
+        return expected_type.evaluate
+
+    return lambda value: isinstance(value, expected_type)
+
+
 def validate_required_fields(fields, required):
     """Ensure that all `required` fields are present in `fields`."""
     missing = required.difference(fields.keys())
@@ -31,7 +31,11 @@ class IS(object):
 
     def evaluate(self, value):
         """Determine if `value` meets this operator's criteria."""
-        return value in self.valid_values
+        try:
+            return value in self.valid_values
+        except TypeError:
+            # Unhashable values can't be one of the valid values.
+            return False
 
     def __eq__(self, other):
         """An equality predicate to simplify unit testing."""
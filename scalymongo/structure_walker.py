@@ -111,3 +111,209 @@ def _join(head, tail):
     if head is None:
         return tail
     return '{0}.{1}'.format(head, tail)
+
+
+def _join_all(parts):
+    """Join all of `parts` with dots or return ``None`` if there are none."""
+    path = None
+    for part in parts:
+        path = _join(path, part)
+    return path
+
+
+def _field_structure(structure, key):
+    """Return the structure `key` is declared with in `structure`.
+
+    ``None`` is returned if `key` isn't declared.
+
+    """
+    if key in structure:
+        return structure[key]
+    for field, sub_structure in structure.iteritems():
+        if isclass(field) and isinstance(key, field):
+            return sub_structure
+    return None
+
+
+class CompiledStructure(object):
+    """A validator specialized for a single structure.
+
+    This performs the same checks as walking a body with a
+    :class:`StructureWalker`, but the structure is only interpreted once when
+    the :class:`CompiledStructure` is created.  Paths to fields are only built
+    if validation fails so that the error messages match those raised while
+    walking the structure.
+
+    :param structure: is the structure bodies will be validated against.
+    :param make_field_check: should be a function mapping a field's declared
+        type to a predicate returning ``True`` iff a value is valid.
+    :param field_validator: is called as ``field_validator(path, value,
+        type_)`` for any value rejected by its predicate and should raise the
+        appropriate :class:`ValidationError`.
+
+    """
+
+    def __init__(self, structure, make_field_check, field_validator):
+        self.structure = structure
+        self.__make_field_check = make_field_check
+        self.__field_validator = field_validator
+        self.__check = self._compile_field(structure)
+        self.__sub_checks = {}
+
+    def validate(self, body):
+        """Validate `body` in accordance with the compiled structure."""
+        self.__run(self.__check, body, ())
+
+    def validate_paths(self, body, paths):
+        """Validate only the values at `paths` in `body`.
+
+        Each path is a tuple of keys (or array indexes) leading from `body`
+        to a value.  The rest of `body` is assumed to be valid already.
+        Paths to values which no longer exist are skipped.
+
+        """
+        for path in paths:
+            self.__validate_path(body, path)
+
+    def __validate_path(self, body, path):
+        structure = self.structure
+        value = body
+        for depth, key in enumerate(path):
+            if isinstance(structure, list):
+                structure = structure[0]
+            elif isinstance(structure, dict):
+                sub_structure = _field_structure(structure, key)
+                if sub_structure is None:
+                    # Raises the error for the unknown field.
+                    _check_for_unknown_fields(
+                        value, structure, _join_all(path[:depth]))
+                structure = sub_structure
+            else:
+                # The path leads into a value declared as a plain type.
+                path = path[:depth]
+                break
+            try:
+                value = value[key]
+            except (IndexError, KeyError, TypeError):
+                # The value was removed.
+                return
+
+        check = self.__sub_checks.get(id(structure))
+        if check is None:
+            check = self.__sub_checks[id(structure)] = self._compile_field(
+                structure)
+        self.__run(check, value, path)
+
+    def __run(self, check, value, path):
+        try:
+            check(value)
+        except _CheckFailed as failure:
+            failure.raise_error(
+                _join_all(path + tuple(reversed(failure.path_parts))))
+
+    def _compile_field(self, sub_structure):
+        if isinstance(sub_structure, list):
+            assert len(sub_structure) == 1
+            return _compile_list(self._compile_field(sub_structure[0]))
+
+        if isinstance(sub_structure, dict):
+            steps = [(field, self._compile_field(value), isclass(field))
+                     for field, value in sub_structure.iteritems()]
+            return _compile_dict(sub_structure, steps)
+
+        return _compile_leaf(
+            sub_structure,
+            self.__make_field_check(sub_structure),
+            self.__field_validator,
+        )
+
+
+class _CheckFailed(Exception):
+    """Raised internally by compiled checks when a value fails validation.
+
+    `path_parts` is built up in reverse as the failure propagates out of the
+    compiled checks.  `raise_error` is called with the full path to raise the
+    public :class:`ValidationError`.
+
+    """
+
+    def __init__(self, raise_error):
+        Exception.__init__(self)
+        self.raise_error = raise_error
+        self.path_parts = []
+
+
+def _compile_leaf(expected_type, is_valid, field_validator):
+    def check(value):
+        if not is_valid(value):
+            raise _CheckFailed(
+                lambda path: field_validator(path, value, expected_type))
+    return check
+
+
+def _compile_list(check_element):
+    def check(value):
+        if isinstance(value, dict):
+            # See StructureWalker._recurse_or_validate_field.
+            for key, element in value.iteritems():
+                assert key.isdigit() or key == '$'
+                try:
+                    check_element(element)
+                except _CheckFailed as failure:
+                    failure.path_parts.append(key)
+                    raise
+        else:
+            for i, element in enumerate(value):
+                try:
+                    check_element(element)
+                except _CheckFailed as failure:
+                    failure.path_parts.append(i)
+                    raise
+    return check
+
+
+def _compile_dict(structure, steps):
+    known_fields = frozenset(structure)
+    has_type_keys = any(is_type for _, _, is_type in steps)
+    field_steps = [(field, check) for field, check, _ in steps]
+
+    def check_unknown_fields(body):
+        if not known_fields.issuperset(body):
+            try:
+                _check_for_unknown_fields(body, structure, None)
+            except ValidationError:
+                raise _CheckFailed(
+                    lambda path: _check_for_unknown_fields(
+                        body, structure, path))
+
+    def check_fields(body):
+        check_unknown_fields(body)
+        for field, check_field in field_steps:
+            if field in body:
+                try:
+                    check_field(body[field])
+                except _CheckFailed as failure:
+                    failure.path_parts.append(field)
+                    raise
+
+    def check_fields_and_type_keys(body):
+        check_unknown_fields(body)
+        for field, check_field, is_type in steps:
+            if is_type:
+                for key, value in body.iteritems():
+                    if isinstance(key, field):
+                        try:
+                            check_field(value)
+                        except _CheckFailed as failure:
+                            failure.path_parts.append(key)
+                            raise
+            if field in body:
+                try:
+                    check_field(body[field])
+                except _CheckFailed as failure:
+                    failure.path_parts.append(field)
+                    raise
+
+    if has_type_keys:
+        return check_fields_and_type_keys
+    return check_fields
@@ -0,0 +1,102 @@
+"""
+Validation Policies
+===================
+
+Policies deciding whether documents are validated before they are written.
+
+Assign one to :attr:`~scalymongo.document.Document.validation_policy` or pass
+it as the `validation` argument of a single write.
+
+"""
+import random
+import threading
+
+from scalymongo.errors import ValidationError
+
+
+class ValidationPolicy(object):
+    """Validate every write and raise any :class:`ValidationError`."""
+
+    def run(self, validate):
+        """Call `validate` if this policy requires it."""
+        validate()
+
+    def __repr__(self):
+        return '<{0}>'.format(type(self).__name__)
+
+
+class NeverValidate(ValidationPolicy):
+    """Skip validation entirely.
+
+    Only use this for writers whose documents are known to be valid, e.g.
+    when the server enforces the schema (see
+    :mod:`scalymongo.manage.install_validators`).
+
+    """
+
+    def run(self, validate):
+        pass
+
+
+class SampledValidation(ValidationPolicy):
+    """Validate a random sample of writes.
+
+    Failures are counted and passed to `on_failure` instead of being raised
+    so that a trusted writer keeps going while the problem is reported.
+
+    :param rate: is the fraction of writes to validate, between 0 and 1.
+    :param on_failure: (optional) is called with each
+        :class:`ValidationError` found.
+    :param raise_failures: (optional) if ``True`` failures are raised after
+        they are counted and reported.
+    :param random: (optional) returns a random number in ``[0, 1)``.
+
+    """
+
+    def __init__(self, rate, on_failure=None, raise_failures=False,
+                 random=random.random):
+        self.rate = rate
+        self.on_failure = on_failure
+        self.raise_failures = raise_failures
+        self.random = random
+        self.checked = 0
+        self.skipped = 0
+        self.failures = 0
+        self.__lock = threading.Lock()
+
+    def run(self, validate):
+        if self.random() >= self.rate:
+            with self.__lock:
+                self.skipped += 1
+            return
+
+        with self.__lock:
+            self.checked += 1
+        try:
+            validate()
+        except ValidationError as ex:
+            with self.__lock:
+                self.failures += 1
+            if self.on_failure is not None:
+                self.on_failure(ex)
+            if self.raise_failures:
+                raise
+
+    def stats(self):
+        """Return a :class:`dict` of the policy's counters."""
+        with self.__lock:
+            return {
+                'checked': self.checked,
+                'skipped': self.skipped,
+                'failures': self.failures,
+            }
+
+    def __repr__(self):
+        return '<SampledValidation rate={0!r}>'.format(self.rate)
+
+
+ALWAYS = ValidationPolicy()
+"""Validate every write.  This is the default."""
+
+NEVER = NeverValidate()
+"""Never validate writes."""
@@ -18,12 +18,17 @@ setup(
     author_email='allan.caffee@gmail.com',
     license='BSD',
     packages=['scalymongo', 'scalymongo.manage'],
-    install_requires=['pymongo>=2.4'],
+    install_requires=['pymongo>=2.9'],
+    extras_require={
+        'async': ['motor>=1.0,<2.0'],
+        'lazy': ['pymongo>=3.2'],
+    },
     test_suite='tests',
     long_description=read('README.rst'),
     entry_points={
       'console_scripts': [
           'scalymongo-ensure-indexes = scalymongo.manage.ensure_indexes:main',
+          'scalymongo-install-validators = scalymongo.manage.install_validators:main',
       ],
     },
     zip_safe=True,
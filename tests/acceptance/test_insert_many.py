@@ -0,0 +1,63 @@
+from scalymongo import Document, ObjectId
+from scalymongo.errors import UnsafeBehaviorError, ValidationError
+from tests.acceptance.base_acceptance_test import BaseAcceptanceTest
+
+
+class InsertManyExample(Document):
+    structure = {
+        'name': basestring,
+        'age': int,
+    }
+    indexes = [{
+        'fields': ['name'],
+        'unique': True,
+    }]
+
+    __database__ = 'test'
+    __collection__ = __name__
+
+
+class BaseInsertManyTest(BaseAcceptanceTest):
+
+    @classmethod
+    def setup_class(cls):
+        BaseAcceptanceTest.setup_class()
+        cls.model = cls.connection.models.InsertManyExample
+        cls.model.collection.drop()
+        cls.model.ensure_indexes()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.model.collection.drop()
+        super(BaseInsertManyTest, cls).teardown_class()
+
+
+class WhenInsertingManyUnordered(BaseInsertManyTest):
+
+    @classmethod
+    def setup_class(cls):
+        BaseInsertManyTest.setup_class()
+        cls.result = cls.model.insert_many([
+            {'name': 'Alice', 'age': 32},
+            {'name': 'Bob', 'age': 'thirty'},
+            {'name': 'Alice', 'age': 33},
+            {'name': 'Carl', 'age': 41, '_id': ObjectId()},
+            {'name': 'Donna', 'age': 35},
+        ], ordered=False)
+
+    def should_insert_valid_documents(self):
+        assert self.result.inserted == [0, 4]
+        assert self.model.find({}, allow_global=True).count() == 2
+
+    def should_set_ids_on_inserted_documents(self):
+        for index in self.result.inserted:
+            assert isinstance(self.result.documents[index]['_id'], ObjectId)
+
+    def should_report_validation_error(self):
+        assert isinstance(self.result.errors[1], ValidationError)
+
+    def should_report_duplicate_key_error(self):
+        assert self.result.errors[2].code == 11000
+
+    def should_refuse_saved_document(self):
+        assert isinstance(self.result.errors[3], UnsafeBehaviorError)
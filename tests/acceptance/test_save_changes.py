@@ -0,0 +1,53 @@
+from scalymongo import Document
+from tests.acceptance.base_acceptance_test import BaseAcceptanceTest
+
+
+class SaveChangesExample(Document):
+
+    __collection__ = __name__
+    __database__ = 'test'
+    structure = {
+        'author': {
+            'name': basestring,
+            'email_address': basestring,
+        },
+        'title': basestring,
+        'body': basestring,
+        'views': int,
+    }
+
+
+class BaseSaveChangesTest(BaseAcceptanceTest):
+
+    def setup(self):
+        self.model = self.connection.models.SaveChangesExample
+        self.doc = self.model({
+            'author': {'name': 'Alice', 'email_address': 'alice@example.com'},
+            'title': 'Partial Updates',
+            'body': 'Only send what changed.',
+            'views': 0,
+        })
+        self.doc.save()
+
+    def teardown(self):
+        self.model.collection.drop()
+
+    def fetch(self):
+        return self.model.find_one({'_id': self.doc['_id']})
+
+
+class WhenSavingChangedFields(BaseSaveChangesTest):
+
+    def setup(self):
+        BaseSaveChangesTest.setup(self)
+        self.doc.author.name = 'Bob'
+        self.doc.views = 3
+        del self.doc['body']
+
+        self.doc.save_changes()
+
+    def should_persist_changes(self):
+        assert self.fetch() == self.doc
+
+    def should_have_no_pending_changes(self):
+        assert self.doc.get_changes() == {}
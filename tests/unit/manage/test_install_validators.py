@@ -0,0 +1,193 @@
+from deterministic_dingus import DingusWhitelistTestCase, Dingus
+from nose.tools import assert_raises, assert_equals
+
+from scalymongo.manage.install_validators import (
+    install_validator,
+    install_validators,
+    main,
+    parse_arguments,
+)
+import scalymongo.manage.install_validators as mod
+
+
+####
+##
+## parse_arguments
+##
+####
+
+class BaseParseArgumentsTestCase(DingusWhitelistTestCase):
+
+    module = mod
+    module_mocks = ['OptionParser']
+    additional_mocks = ['options']
+
+    def setup(self):
+        DingusWhitelistTestCase.setup(self)
+        self.parser = self.module.OptionParser()
+
+
+class WhenArgumentsParseSuccessfully(BaseParseArgumentsTestCase):
+
+    additional_mocks = ['options', 'module_name', 'endpoint']
+
+    def setup(self):
+        BaseParseArgumentsTestCase.setup(self)
+        self.arguments = (self.module_name, self.endpoint)
+        self.parser.parse_args.return_value = (self.options, self.arguments)
+
+        self.returned = parse_arguments()
+
+    def should_set_up_usage_string(self):
+        assert self.parser.usage == '%prog [options] MODULE ENDPOINT'
+
+    def should_add_validation_level_option(self):
+        assert self.parser.calls(
+            'add_option', '--validation-level',
+            choices=['strict', 'moderate'],
+            help='which documents are validated: strict or moderate'
+                 ' [default: %default]',
+        )
+
+    def should_add_validation_action_option(self):
+        assert self.parser.calls(
+            'add_option', '--validation-action', choices=['error', 'warn'],
+            help='what to do with invalid documents: error or warn'
+                 ' [default: %default]',
+        )
+
+    def should_default_to_strict_errors(self):
+        assert self.parser.calls(
+            'set_defaults', validation_level='strict',
+            validation_action='error')
+
+    def should_return_options_module_name_and_endpoint(self):
+        assert_equals(
+            self.returned,
+            (self.options, self.module_name, self.endpoint),
+        )
+
+
+class WhenWrongNumberOfPositionalArguments(BaseParseArgumentsTestCase):
+
+    additional_mocks = ['options', 'arguments']
+
+    def setup(self):
+        BaseParseArgumentsTestCase.setup(self)
+        self.parser.parse_args.return_value = (self.options, self.arguments)
+
+        assert_raises(SystemExit, parse_arguments)
+
+    def should_print_help(self):
+        assert self.parser.calls('print_help')
+
+
+####
+##
+## main
+##
+####
+
+class DescribeMain(DingusWhitelistTestCase):
+
+    module = mod
+    module_mocks = [
+        'parse_arguments', '__import__', 'Connection', 'install_validators']
+    additional_mocks = ['options', 'module_name', 'endpoint']
+
+    def run(self):
+        self.module.parse_arguments.return_value = (
+            self.options, self.module_name, self.endpoint)
+
+        main()
+
+    def should_import_module(self):
+        assert self.module.__import__.calls('()', self.module_name)
+
+    def should_make_Connection(self):
+        assert self.module.Connection.calls('()', self.endpoint)
+
+    def should_install_validators(self):
+        assert self.module.install_validators.calls(
+            '()', self.module.Connection(), self.options)
+
+
+####
+##
+## install_validators
+##
+####
+
+class DescribeInstallValidators(DingusWhitelistTestCase):
+
+    module = mod
+    module_mocks = ['install_validator']
+    additional_mocks = [
+        'connection', 'options', 'model_a', 'model_b', 'model_c']
+
+    def run(self):
+        self.model_a.__database__ = self.model_b.__database__ = 'db'
+        self.model_a.__collection__ = self.model_b.__collection__ = 'shared'
+        self.model_c.__database__ = 'db'
+        self.model_c.__collection__ = 'other'
+        self.connection.models = [self.model_a, self.model_b, self.model_c]
+
+        install_validators(self.connection, self.options)
+
+    def should_install_schema_of_single_model(self):
+        assert self.module.install_validator.calls(
+            '()', self.model_c.database, 'other', self.model_c.json_schema(),
+            self.options).once()
+
+    def should_accept_any_schema_in_shared_collection(self):
+        assert self.module.install_validator.calls(
+            '()', self.model_b.database, 'shared',
+            {'anyOf': [self.model_a.json_schema(),
+                       self.model_b.json_schema()]},
+            self.options).once()
+
+
+####
+##
+## install_validator
+##
+####
+
+class BaseInstallValidator(object):
+
+    def setup(self):
+        self.database = Dingus('database')
+        self.schema = Dingus('schema')
+        self.options = Dingus(
+            'options', validation_level='moderate', validation_action='warn')
+
+
+class WhenInstallingValidatorOnExistingCollection(BaseInstallValidator):
+
+    def setup(self):
+        BaseInstallValidator.setup(self)
+        self.database.collection_names.return_value = ['things']
+        install_validator(self.database, 'things', self.schema, self.options)
+
+    def should_modify_collection(self):
+        assert self.database.calls(
+            'command', 'collMod', 'things',
+            validator={'$jsonSchema': self.schema},
+            validationLevel='moderate', validationAction='warn').once()
+
+    def should_not_create_collection(self):
+        assert not self.database.calls('create_collection')
+
+
+class WhenInstallingValidatorOnNewCollection(BaseInstallValidator):
+
+    def setup(self):
+        BaseInstallValidator.setup(self)
+        self.database.collection_names.return_value = []
+        install_validator(self.database, 'things', self.schema, self.options)
+
+    def should_create_collection_with_validator(self):
+        assert self.database.calls(
+            'create_collection', 'things',
+            validator={'$jsonSchema': self.schema},
+            validationLevel='moderate', validationAction='warn').once()
@@ -0,0 +1,600 @@
+from bson import BSON, ObjectId
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_raises
+from pymongo.errors import BulkWriteError, OperationFailure
+try:
+    from tornado import gen
+    from tornado.concurrent import Future
+    from tornado.ioloop import IOLoop
+except ImportError:  # Tornado is installed along with motor.
+    Future = None
+
+from scalymongo import Document
+from scalymongo.aio import *
+from scalymongo.aio import _then
+from scalymongo.cache import DocumentCache
+from scalymongo.errors import (
+    GlobalQueryException,
+    ModifyFailedError,
+    UnsafeBehaviorError,
+)
+from scalymongo.helpers import is_update_modifier
+from scalymongo.modifiers import apply_update_modifier
+import scalymongo.aio as mod
+
+
+####
+##
+## In-process stand-in for a Motor client
+##
+####
+
+def later(result=None, exception=None):
+    """Return a future resolved on a later iteration of the IO loop, as
+    Motor's are."""
+    future = Future()
+
+    def _resolve():
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    IOLoop.current().add_callback(_resolve)
+    return future
+
+
+def copy_document(document):
+    return BSON.encode(document).decode()
+
+
+class StandInCursor(object):
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    @property
+    def fetch_next(self):
+        return later(bool(self.documents))
+
+    def next_object(self):
+        if self.documents:
+            return self.documents.pop(0)
+
+    def to_list(self, length):
+        return later(self.documents[:length])
+
+    def limit(self, limit):
+        return StandInCursor(self.documents[:limit])
+
+
+class StandInBulk(object):
+
+    def __init__(self, collection, ordered):
+        self.collection = collection
+        self.ordered = ordered
+        self.documents = []
+
+    def insert(self, document):
+        # The driver assigns the `_id` of documents it inserts.
+        if '_id' not in document:
+            document['_id'] = ObjectId()
+        self.documents.append(document)
+
+    def execute(self, write_concern=None):
+        self.collection.calls.append(('execute', write_concern))
+        write_errors = []
+        for index, document in enumerate(self.documents):
+            if self.collection.matching({'_id': document['_id']}):
+                write_errors.append({
+                    'index': index, 'code': 11000, 'errmsg': 'duplicate key'})
+                if self.ordered:
+                    break
+            else:
+                self.collection.documents.append(copy_document(document))
+        if write_errors:
+            return later(exception=BulkWriteError(
+                {'writeErrors': write_errors}))
+        return later({'nInserted': len(self.documents)})
+
+
+class StandInCollection(object):
+    """Stand-in for a Motor collection keeping its documents in memory."""
+
+    def __init__(self, name):
+        self.name = name
+        self.documents = []
+        self.calls = []
+
+    def matching(self, spec):
+        return [document for document in self.documents
+                if all(document.get(key) == value
+                       for key, value in (spec or {}).iteritems())]
+
+    def modify(self, document, update):
+        if is_update_modifier(update):
+            apply_update_modifier(document, update)
+        else:
+            document_id = document['_id']
+            document.clear()
+            document.update(copy_document(update))
+            document['_id'] = document_id
+
+    def find_one(self, spec=None, **kwargs):
+        self.calls.append(('find_one', spec, kwargs))
+        found = self.matching(spec)
+        return later(copy_document(found[0]) if found else None)
+
+    def find(self, spec=None, **kwargs):
+        self.calls.append(('find', spec, kwargs))
+        return StandInCursor(map(copy_document, self.matching(spec)))
+
+    def save(self, document, **kwargs):
+        self.calls.append(('save', kwargs))
+        document['_id'] = ObjectId()
+        self.documents.append(copy_document(document))
+        return later(document['_id'])
+
+    def update(self, spec, document, multi=False, **kwargs):
+        self.calls.append(('update', kwargs))
+        matching = self.matching(spec)
+        if not multi:
+            matching = matching[:1]
+        for found in matching:
+            self.modify(found, document)
+        return later({'n': len(matching)})
+
+    def remove(self, spec, **kwargs):
+        self.calls.append(('remove', kwargs))
+        matching = self.matching(spec)
+        self.documents = [document for document in self.documents
+                          if document not in matching]
+        return later({'n': len(matching)})
+
+    def initialize_ordered_bulk_op(self):
+        return StandInBulk(self, True)
+
+    def initialize_unordered_bulk_op(self):
+        return StandInBulk(self, False)
+
+
+class StandInDatabase(object):
+
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, StandInCollection(name))
+
+    def command(self, name, collection_name, query=None, update=None,
+                new=False):
+        assert name == 'findandmodify'
+        matching = self[collection_name].matching(query)
+        if not matching:
+            return later({'value': None})
+        before = copy_document(matching[0])
+        self[collection_name].modify(matching[0], update)
+        return later({'value': copy_document(matching[0]) if new else before})
+
+
+class StandInClient(object):
+
+    def __init__(self):
+        self.databases = {}
+
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, StandInDatabase())
+
+
+class User(Document):
+    __database__ = 'test'
+    __collection__ = 'users'
+    structure = {'owner': basestring, 'x': int}
+    indexes = [{'fields': ['owner'], 'shard_key': True}]
+    abstract = True
+
+
+class BaseAsyncTest(object):
+
+    def setup(self):
+        if Future is None:
+            raise SkipTest('tornado is not installed')
+        self.io_loop = IOLoop()
+        self.io_loop.make_current()
+        self.connection = AsyncConnection(client=StandInClient())
+        self.User = self.connection.connect_document(User)
+        self.collection = self.User.collection
+        self.collection.documents = [
+            {'_id': 1, 'owner': 'a', 'x': 1},
+            {'_id': 2, 'owner': 'a', 'x': 2},
+            {'_id': 3, 'owner': 'b', 'x': 3},
+        ]
+
+    def teardown(self):
+        if Future is not None:
+            self.io_loop.clear_current()
+            self.io_loop.close()
+
+    def wait(self, future):
+        return self.io_loop.run_sync(lambda: future)
+
+
+####
+##
+## AsyncConnection
+##
+####
+
+class DescribeAsyncConnection(BaseAsyncTest):
+
+    def should_subclass_document(self):
+        assert issubclass(self.User, User)
+
+    def should_mix_in_asynchronous_methods(self):
+        assert issubclass(self.User, AsyncDocumentMixin)
+
+    def should_bind_collection(self):
+        assert self.User.collection is \
+            self.connection.client['test']['users']
+
+    def should_bind_connection(self):
+        assert self.User.connection is self.connection
+
+    def should_cache_connected_class(self):
+        assert self.connection.connect_document(User) is self.User
+
+    def should_resolve_values(self):
+        assert self.wait(self.connection.resolved(5)) == 5
+
+
+class WhenMotorIsNotInstalled(object):
+
+    def setup(self):
+        self.MotorClient = mod.MotorClient
+        mod.MotorClient = None
+
+    def teardown(self):
+        mod.MotorClient = self.MotorClient
+
+    def should_raise_ImportError(self):
+        assert_raises(ImportError, AsyncConnection, 'localhost')
+
+
+####
+##
+## AsyncDocumentMixin
+##
+####
+
+class WhenFindingOneAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.returned = self.wait(self.User.find_one({'owner': 'b'}))
+
+    def should_resolve_to_document(self):
+        assert isinstance(self.returned, self.User)
+        assert self.returned == {'_id': 3, 'owner': 'b', 'x': 3}
+
+    def should_resolve_to_None_if_nothing_matches(self):
+        assert self.wait(self.User.find_one({'owner': 'c'})) is None
+
+    def should_check_query_sharding(self):
+        assert_raises(GlobalQueryException, self.User.find_one, {'x': 1})
+
+    def should_allow_global_queries(self):
+        assert self.wait(
+            self.User.find_one({'x': 1}, allow_global=True))['_id'] == 1
+
+    def should_refuse_lazy_documents(self):
+        assert_raises(
+            TypeError, self.User.find_one, {'owner': 'b'},
+            lazy=True)
+
+
+class WhenFindingOneAsynchronouslyWithCache(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.User.cache = DocumentCache()
+        self.spec = {'_id': 3, 'owner': 'b'}
+        self.first = self.wait(self.User.find_one(self.spec))
+        self.second = self.wait(self.User.find_one(self.spec))
+
+    def should_query_collection_once(self):
+        assert self.collection.calls == [('find_one', self.spec, {})]
+
+    def should_resolve_to_cached_document(self):
+        assert isinstance(self.second, self.User)
+        assert self.second == self.first
+        assert self.second is not self.first
+
+    def should_query_again_after_write(self):
+        self.wait(self.User.update(self.spec, {'$set': {'x': 4}}))
+        assert self.wait(self.User.find_one(self.spec))['x'] == 4
+
+
+class WhenFindingAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.cursor = self.User.find({'owner': 'a'})
+
+    def should_iterate_documents_in_coroutine(self):
+        @gen.coroutine
+        def collect(cursor):
+            found = []
+            while (yield cursor.fetch_next):
+                found.append(cursor.next_object())
+            raise gen.Return(found)
+
+        found = self.wait(collect(self.cursor))
+        assert [document['_id'] for document in found] == [1, 2]
+        assert all(isinstance(document, self.User) for document in found)
+
+    def should_list_documents(self):
+        found = self.wait(self.cursor.to_list(5))
+        assert [document['x'] for document in found] == [1, 2]
+        assert all(isinstance(document, self.User) for document in found)
+
+    def should_wrap_chained_cursors(self):
+        limited = self.cursor.limit(1)
+        assert isinstance(limited, AsyncCursor)
+        assert len(self.wait(limited.to_list(5))) == 1
+
+    def should_check_query_sharding(self):
+        assert_raises(GlobalQueryException, self.User.find, {'x': 1})
+
+    def should_refuse_lazy_documents(self):
+        assert_raises(
+            TypeError, self.User.find, {'owner': 'a'}, lazy=True)
+
+
+class WhenSavingAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.doc = self.User({'owner': 'c', 'x': 4})
+        self.wait(self.doc.save(w=0))
+
+    def should_store_document(self):
+        assert self.collection.matching({'owner': 'c'}) == [self.doc]
+
+    def should_pass_write_concern(self):
+        assert self.collection.calls == [('save', {'w': 0})]
+
+    def should_mark_document_clean(self):
+        assert not self.doc.get_dirty_paths()
+
+    def should_refuse_saved_documents(self):
+        assert_raises(UnsafeBehaviorError, self.doc.save)
+
+
+class WhenSavingChangesAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.doc = self.wait(self.User.find_one({'owner': 'b'}))
+        self.doc['x'] = 5
+        self.returned = self.wait(self.doc.save_changes())
+
+    def should_update_changed_fields(self):
+        assert self.collection.matching({'_id': 3})[0]['x'] == 5
+
+    def should_mark_document_clean(self):
+        assert self.returned is None
+        assert not self.doc.get_dirty_paths()
+
+    def should_resolve_at_once_without_changes(self):
+        assert self.wait(self.doc.save_changes()) is None
+
+
+class WhenSavingChangesAsynchronouslyFails(BaseAsyncTest):
+
+    def should_fail_with_ModifyFailedError(self):
+        doc = self.wait(self.User.find_one({'owner': 'b'}))
+        self.collection.documents = []
+        doc['x'] = 5
+        assert_raises(ModifyFailedError, self.wait, doc.save_changes())
+
+
+class WhenModifyingAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.doc = self.User({'_id': 1, 'owner': 'a', 'x': 1, 'y': 2})
+        self.wait(self.doc.modify({'$inc': {'x': 2}}))
+
+    def should_modify_stored_document(self):
+        assert self.collection.matching({'_id': 1})[0]['x'] == 3
+
+    def should_replace_document_with_result(self):
+        assert self.doc == {'_id': 1, 'owner': 'a', 'x': 3}
+        assert not self.doc.get_dirty_paths()
+
+
+class WhenModifyingAsynchronouslyFindsNothing(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.doc = self.User({'_id': 1, 'owner': 'a', 'x': 1})
+        self.returned = self.doc.modify(
+            {'$inc': {'x': 2}}, query={'x': 5})
+
+    def should_fail_with_ModifyFailedError(self):
+        assert_raises(ModifyFailedError, self.wait, self.returned)
+
+    def should_reload_document(self):
+        assert_raises(ModifyFailedError, self.wait, self.returned)
+        assert self.doc == {'_id': 1, 'owner': 'a', 'x': 1}
+
+
+class WhenModifyingLocallyAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.doc = self.User({'_id': 2, 'owner': 'a', 'x': 2})
+        self.returned = self.doc.modify(
+            {'$inc': {'x': 2}}, apply_locally=True, w=2)
+
+    def should_update_with_write_concern(self):
+        self.wait(self.returned)
+        assert self.collection.calls == [('update', {'w': 2})]
+
+    def should_apply_update_to_both_copies(self):
+        self.wait(self.returned)
+        assert self.doc['x'] == 4
+        assert self.collection.matching({'_id': 2})[0]['x'] == 4
+
+    def should_fail_if_nothing_matches(self):
+        doc = self.User({'_id': 9, 'owner': 'a', 'x': 1})
+        assert_raises(
+            ModifyFailedError, self.wait,
+            doc.modify({'$inc': {'x': 2}}, apply_locally=True))
+        assert doc['x'] == 1
+
+
+class WhenFindAndModifyFailsAsynchronously(BaseAsyncTest):
+
+    def should_resolve_to_None(self):
+        def fail(*args, **kwargs):
+            return later(exception=OperationFailure('failed'))
+        self.User.database.command = fail
+        assert self.wait(self.User.find_and_modify(
+            {'owner': 'a'}, {'$set': {'x': 1}})) is None
+
+
+class WhenUpdatingAndRemovingAsynchronously(BaseAsyncTest):
+
+    def should_update_documents(self):
+        returned = self.wait(self.User.update(
+            {'owner': 'a'}, {'$set': {'x': 0}}, multi=True))
+        assert returned == {'n': 2}
+        assert [doc['x'] for doc in self.collection.documents] == [0, 0, 3]
+
+    def should_remove_documents(self):
+        assert self.wait(self.User.remove({'owner': 'a'})) == {'n': 2}
+        assert [doc['_id'] for doc in self.collection.documents] == [3]
+
+    def should_check_query_sharding(self):
+        assert_raises(
+            GlobalQueryException, self.User.update, {'x': 1}, {'x': 2})
+        assert_raises(GlobalQueryException, self.User.remove, {'x': 1})
+
+
+class WhenInsertingManyAsynchronously(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.returned = self.User.insert_many(
+            [{'owner': 'c', 'x': 4}, {'owner': 'c', 'x': 'five'},
+             {'owner': 'd', 'x': 6}],
+            chunk_bytes=30, w=2)
+        self.result = self.wait(self.returned)
+
+    def should_return_future(self):
+        assert isinstance(self.returned, Future)
+
+    def should_insert_valid_documents(self):
+        assert self.result.inserted == [0, 2]
+        assert len(self.collection.matching({'owner': 'c'})) == 1
+        assert len(self.collection.matching({'owner': 'd'})) == 1
+
+    def should_report_invalid_documents(self):
+        assert list(self.result.errors) == [1]
+
+    def should_write_each_chunk_with_write_concern(self):
+        assert self.collection.calls == [
+            ('execute', {'w': 2}), ('execute', {'w': 2})]
+
+    def should_mark_inserted_documents_clean(self):
+        assert not self.result.documents[0].get_dirty_paths()
+
+
+class WhenInsertingManyAsynchronouslyHasDuplicateKey(BaseAsyncTest):
+
+    def setup(self):
+        BaseAsyncTest.setup(self)
+        self.collection.initialize_ordered_bulk_op = lambda: self.bulk(True)
+        self.collection.initialize_unordered_bulk_op = lambda: self.bulk(
+            False)
+        self.collection.documents.append({'_id': 5, 'owner': 'c', 'x': 5})
+        self.documents = [
+            {'owner': 'c', 'x': 4}, {'owner': 'c', 'x': 5},
+            {'owner': 'c', 'x': 6}]
+
+    def bulk(self, ordered):
+        # Use `x` as the `_id` so that the second document is a duplicate.
+        bulk = StandInBulk(self.collection, ordered)
+        bulk.insert = lambda document: bulk.documents.append(
+            dict(document, _id=document['x']))
+        return bulk
+
+    def insert(self, **kwargs):
+        return self.wait(self.User.insert_prepared(self.documents, **kwargs))
+
+    def should_report_duplicate_key(self):
+        result = self.insert()
+        assert result.errors.keys() == [1]
+        assert result.errors[1].code == 11000
+
+    def should_stop_ordered_insert_at_duplicate(self):
+        result = self.insert(chunk_bytes=1)
+        assert result.inserted == [0]
+        assert len(self.collection.calls) == 2
+
+    def should_continue_unordered_insert_past_duplicate(self):
+        result = self.insert(ordered=False, chunk_bytes=1)
+        assert result.inserted == [0, 2]
+        assert len(self.collection.calls) == 3
+
+
+class WhenCallingBlockingMethodsAsynchronously(BaseAsyncTest):
+
+    def should_refuse_paginate(self):
+        assert_raises(
+            TypeError, self.User.paginate, {'owner': 'a'})
+
+    def should_refuse_find_parallel(self):
+        assert_raises(TypeError, self.User.find_parallel)
+
+    def should_refuse_find_many_by_keys(self):
+        assert_raises(
+            TypeError, self.User.find_many_by_keys,
+            [{'owner': 'a', '_id': 1}])
+
+
+####
+##
+## _then
+##
+####
+
+class DescribeThen(BaseAsyncTest):
+
+    def should_apply_callback_to_result(self):
+        assert self.wait(_then(later(1), lambda x: x + 1)) == 2
+
+    def should_propagate_exceptions(self):
+        chained = _then(later(exception=ValueError()), lambda x: x)
+        assert_raises(ValueError, self.wait, chained)
+
+    def should_apply_error_callback(self):
+        chained = _then(
+            later(exception=ValueError()), lambda x: x,
+            on_error=lambda exception: 5)
+        assert self.wait(chained) == 5
+
+    def should_fail_if_callback_raises(self):
+        chained = _then(later(1), lambda x: x / 0)
+        assert_raises(ZeroDivisionError, self.wait, chained)
+
+    def should_follow_returned_futures(self):
+        assert self.wait(_then(later(1), lambda x: later(x + 2))) == 3
+
+    def should_wait_for_pending_futures(self):
+        future = Future()
+        chained = _then(future, lambda x: x * 2)
+        assert not chained.done()
+        future.set_result(4)
+        assert self.wait(chained) == 8
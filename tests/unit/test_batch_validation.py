@@ -0,0 +1,203 @@
+from scalymongo.batch_validation import *
+from scalymongo.errors import ValidationError
+from scalymongo.schema import (
+    SchemaDocument,
+    validate_required_fields,
+    validate_structure,
+)
+from scalymongo.schema_operators import IS, OR
+from tests.helpers import assert_raises_with_message
+
+
+STRUCTURE = {
+    'name': basestring,
+    'rank': OR(int, long),
+    'state': IS('new', 'done'),
+    'tags': [basestring],
+    'author': {'name': basestring, 'age': int},
+    'comments': [{'text': basestring}],
+    'counts': {basestring: int},
+}
+REQUIRED_FIELDS = set(['name'])
+
+
+def single_document_error(document):
+    """Return the message `document`'s first failure is raised with."""
+    try:
+        validate_structure(document, STRUCTURE)
+        validate_required_fields(document, REQUIRED_FIELDS)
+    except ValidationError as ex:
+        return str(ex)
+
+
+####
+##
+## validate_many
+##
+####
+
+class BaseValidateMany(object):
+
+    documents = []
+
+    def setup(self):
+        self.report = validate_many(
+            self.documents, STRUCTURE, REQUIRED_FIELDS)
+
+    def assert_failure(self, index, path):
+        failures = self.report.errors()[index]
+        assert len(failures) == 1, failures
+        assert failures[0].path == path
+        assert failures[0].message == single_document_error(
+            self.documents[index])
+
+
+class WhenAllDocumentsAreValid(BaseValidateMany):
+
+    documents = [
+        {'name': 'a', 'rank': 1, 'state': 'new', 'tags': ['x', 'y']},
+        {'name': 'b', 'author': {'name': 'c', 'age': 3},
+         'comments': [{'text': 'hi'}], 'counts': {'x': 1}},
+        {'name': 'd', 'rank': 2L, 'state': 'done'},
+    ]
+
+    def should_report_count(self):
+        assert self.report.count == 3
+
+    def should_be_valid(self):
+        assert self.report.is_valid()
+        assert self.report.failures == []
+
+    def should_report_all_indexes_valid(self):
+        assert self.report.valid_indexes() == [0, 1, 2]
+
+    def should_not_raise(self):
+        self.report.raise_first()
+
+
+class WhenSomeDocumentsAreInvalid(BaseValidateMany):
+
+    documents = [
+        {'name': 'a'},
+        {'name': 1},
+        {'name': 'b', 'tags': ['x', 2]},
+        {'name': 'c', 'state': 'gone'},
+        {'name': 'd', 'author': {'name': 'e', 'age': 'old'}},
+        {'name': 'f', 'comments': [{'text': 'ok'}, {'text': None}]},
+        {'name': 'g', 'counts': {'x': 1, 'y': 'two'}},
+        {'name': 'h', 'color': 'red'},
+        {'name': 'i', 'author': {'email': 'j@example.com'}},
+        {'rank': 1},
+        {'name': 'k', 'rank': 1.5},
+    ]
+
+    def should_not_be_valid(self):
+        assert not self.report.is_valid()
+
+    def should_report_valid_indexes(self):
+        assert self.report.valid_indexes() == [0]
+
+    def should_order_failures_by_document(self):
+        indexes = [failure.index for failure in self.report.failures]
+        assert indexes == range(1, len(self.documents))
+
+    def should_report_wrong_type(self):
+        self.assert_failure(1, 'name')
+
+    def should_report_wrong_type_in_array(self):
+        self.assert_failure(2, 'tags.1')
+
+    def should_report_value_not_in_IS(self):
+        self.assert_failure(3, 'state')
+
+    def should_report_wrong_type_in_embedded_document(self):
+        self.assert_failure(4, 'author.age')
+
+    def should_report_wrong_type_in_array_of_documents(self):
+        self.assert_failure(5, 'comments.1.text')
+
+    def should_report_wrong_type_under_type_key(self):
+        self.assert_failure(6, 'counts.y')
+
+    def should_report_unknown_field(self):
+        self.assert_failure(7, None)
+
+    def should_report_unknown_field_in_embedded_document(self):
+        self.assert_failure(8, 'author')
+
+    def should_report_missing_required_field(self):
+        self.assert_failure(9, None)
+
+    def should_report_value_not_of_OR_types(self):
+        self.assert_failure(10, 'rank')
+
+    def should_raise_first_failure(self):
+        assert_raises_with_message(
+            ValidationError, single_document_error(self.documents[1]),
+            self.report.raise_first)
+
+
+class WhenDocumentHasSeveralFailures(BaseValidateMany):
+
+    documents = [{'name': 1, 'state': 'gone', 'color': 'red'}]
+
+    def should_report_every_failure(self):
+        assert sorted(failure.path for failure in self.report.failures) == [
+            None, 'name', 'state']
+
+
+class WhenValuesAreNotDocumentsOrArrays(BaseValidateMany):
+
+    documents = [
+        {'name': 'a', 'author': 'b'},
+        {'name': 'c', 'tags': 'd'},
+        {'name': 'e', 'comments': ['f']},
+    ]
+
+    def should_report_value_instead_of_document(self):
+        assert self.report.errors()[0][0].path == 'author'
+
+    def should_report_value_instead_of_array(self):
+        assert self.report.errors()[1][0].path == 'tags'
+
+    def should_report_value_instead_of_embedded_document(self):
+        assert self.report.errors()[2][0].path == 'comments.0'
+
+
+class WhenIsValuesAreUnhashable(BaseValidateMany):
+
+    documents = [{'name': 'a', 'state': 'new'}, {'name': 'b', 'state': []}]
+
+    def should_report_unhashable_value(self):
+        assert self.report.valid_indexes() == [0]
+        assert self.report.errors()[1][0].path == 'state'
+
+
+class WhenValidatingDocumentsFromIterator(BaseValidateMany):
+
+    def setup(self):
+        self.report = validate_many(
+            iter([{'name': 'a'}, {'name': 1}]), STRUCTURE, REQUIRED_FIELDS)
+
+    def should_validate_each_document(self):
+        assert self.report.count == 2
+        assert self.report.valid_indexes() == [0]
+
+
+class EmbeddedDocument(SchemaDocument):
+    structure = {'text': basestring}
+
+
+class WhenFieldsAreDeclaredAsSchemaDocuments(object):
+
+    def setup(self):
+        self.report = validate_many(
+            [{'embedded': {'text': 'a'}, 'all': [{'text': 'b'}]},
+             {'embedded': 'c'}],
+            {'embedded': EmbeddedDocument, 'all': [EmbeddedDocument]})
+
+    def should_accept_documents_as_validate_does(self):
+        assert self.report.valid_indexes() == [0]
+
+    def should_reject_other_values(self):
+        assert self.report.errors()[1][0].path == 'embedded'
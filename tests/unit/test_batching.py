@@ -0,0 +1,159 @@
+from dingus import Dingus, exception_raiser
+from nose.tools import assert_raises
+
+from scalymongo import Document
+from scalymongo.batching import *
+from scalymongo.cache import DocumentCache
+from scalymongo.errors import GlobalQueryException
+
+
+class FakeCollection(object):
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, spec):
+        self.queries.append(spec)
+        ids = spec['_id']
+        ids = ids['$in'] if isinstance(ids, dict) else [ids]
+        return [doc for doc in self.documents
+                if doc['_id'] in ids and doc['org'] == spec['org']]
+
+
+class BaseFindOneBatchTest(object):
+
+    def setup(self):
+        self.collection = FakeCollection([
+            {'_id': 1, 'org': u'a'},
+            {'_id': 2, 'org': u'a'},
+            {'_id': 3, 'org': u'b'},
+        ])
+
+        class User(Document):
+            structure = {'org': basestring, 'name': basestring}
+            indexes = [{'fields': ['org'], 'shard_key': True}]
+            abstract = True
+            collection = self.collection
+        self.User = User
+        self.batch = FindOneBatch()
+
+
+class WhenFlushingBatch(BaseFindOneBatchTest):
+
+    def setup(self):
+        BaseFindOneBatchTest.setup(self)
+        self.lookups = [
+            self.batch.find_one(self.User, {'org': u'a', '_id': 1}),
+            self.batch.find_one(self.User, {'org': u'b', '_id': 3}),
+            self.batch.find_one(self.User, {'org': u'a', '_id': 2}),
+            self.batch.find_one(self.User, {'org': u'a', '_id': 1}),
+            self.batch.find_one(self.User, {'org': u'a', '_id': 9}),
+        ]
+        self.batch.flush()
+
+    def should_run_one_query_per_shard_key_value(self):
+        assert len(self.collection.queries) == 2
+        assert {'org': u'a', '_id': {'$in': [1, 2, 9]}} in \
+            self.collection.queries
+        assert {'org': u'b', '_id': 3} in self.collection.queries
+
+    def should_resolve_each_lookup(self):
+        assert [lookup.result() for lookup in self.lookups] == [
+            {'_id': 1, 'org': u'a'},
+            {'_id': 3, 'org': u'b'},
+            {'_id': 2, 'org': u'a'},
+            {'_id': 1, 'org': u'a'},
+            None,
+        ]
+
+    def should_return_documents_of_class(self):
+        assert isinstance(self.lookups[0].result(), self.User)
+
+    def should_give_each_lookup_its_own_document(self):
+        assert self.lookups[0].result() is not self.lookups[3].result()
+
+
+class WhenGettingPendingResult(BaseFindOneBatchTest):
+
+    def setup(self):
+        BaseFindOneBatchTest.setup(self)
+        self.first = self.batch.find_one(self.User, {'org': u'a', '_id': 1})
+        self.second = self.batch.find_one(self.User, {'org': u'a', '_id': 2})
+        self.returned = self.first.result()
+
+    def should_flush_batch(self):
+        assert self.second.done()
+        assert len(self.collection.queries) == 1
+
+    def should_return_document(self):
+        assert self.returned == {'_id': 1, 'org': u'a'}
+
+
+class WhenUsingBatchAsContextManager(BaseFindOneBatchTest):
+
+    def setup(self):
+        BaseFindOneBatchTest.setup(self)
+        with self.batch as batch:
+            self.lookup = batch.find_one(self.User, {'org': u'a', '_id': 1})
+            self.done_in_scope = self.lookup.done()
+
+    def should_defer_queries_within_scope(self):
+        assert not self.done_in_scope
+
+    def should_flush_on_exit(self):
+        assert self.lookup.done()
+
+
+class WhenLookingUpWithoutShardKey(BaseFindOneBatchTest):
+
+    def should_raise_GlobalQueryException(self):
+        assert_raises(
+            GlobalQueryException, self.batch.find_one, self.User, {'_id': 1})
+
+
+class WhenLookingUpByOtherFields(BaseFindOneBatchTest):
+
+    def setup(self):
+        BaseFindOneBatchTest.setup(self)
+        self.User.find_one = Dingus('find_one')
+        self.spec = {'org': u'a', 'name': u'x'}
+        self.lookup = self.batch.find_one(self.User, self.spec)
+        self.batch.flush()
+
+    def should_run_lookup_individually(self):
+        assert self.User.find_one.calls('()', self.spec, allow_global=False)
+        assert self.lookup.result() is self.User.find_one()
+
+
+class WhenBatchedQueryFails(BaseFindOneBatchTest):
+
+    def setup(self):
+        BaseFindOneBatchTest.setup(self)
+        self.collection.find = exception_raiser(ValueError('failed'))
+        self.lookup = self.batch.find_one(self.User, {'org': u'a', '_id': 1})
+        self.batch.flush()
+
+    def should_raise_exception_from_result(self):
+        assert self.lookup.done()
+        assert_raises(ValueError, self.lookup.result)
+
+
+class WhenBatchingCachedModel(BaseFindOneBatchTest):
+
+    def setup(self):
+        BaseFindOneBatchTest.setup(self)
+        self.User.cache = DocumentCache()
+        self.User.cache.set((1, u'a'), {'_id': 1, 'org': u'a', 'name': u'c'})
+        self.cached = self.batch.find_one(self.User, {'org': u'a', '_id': 1})
+        self.fetched = self.batch.find_one(self.User, {'org': u'a', '_id': 2})
+        self.batch.flush()
+
+    def should_serve_cached_documents(self):
+        assert self.cached.result()['name'] == u'c'
+
+    def should_only_query_misses(self):
+        assert self.collection.queries == [{'org': u'a', '_id': 2}]
+
+    def should_cache_fetched_documents(self):
+        assert self.User.cache.get((2, u'a')) == {'_id': 2, 'org': u'a'}
@@ -0,0 +1,156 @@
+from bson import BSON
+
+from scalymongo.cache import *
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class BaseDocumentCacheTest(object):
+
+    max_entries = 2
+    max_bytes = None
+    ttl = None
+
+    def setup(self):
+        self.clock = FakeClock()
+        self.cache = DocumentCache(
+            max_entries=self.max_entries, max_bytes=self.max_bytes,
+            ttl=self.ttl, clock=self.clock)
+
+
+class WhenGettingMissingKey(BaseDocumentCacheTest):
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        self.returned = self.cache.get(('a',))
+
+    def should_return_None(self):
+        assert self.returned is None
+
+    def should_count_miss(self):
+        assert self.cache.stats()['misses'] == 1
+
+
+class WhenGettingCachedKey(BaseDocumentCacheTest):
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        self.document = {'_id': 1, 'name': u'x'}
+        self.cache.set((1,), self.document)
+        self.returned = self.cache.get((1,))
+
+    def should_return_equal_document(self):
+        assert self.returned == self.document
+
+    def should_return_copy(self):
+        self.returned['name'] = u'changed'
+        assert self.cache.get((1,))['name'] == u'x'
+
+    def should_count_hit(self):
+        assert self.cache.stats()['hits'] == 1
+
+    def should_account_for_size(self):
+        assert self.cache.stats()['bytes'] == len(BSON.encode(self.document))
+
+
+class WhenExceedingMaxEntries(BaseDocumentCacheTest):
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        self.cache.set((1,), {'_id': 1})
+        self.cache.set((2,), {'_id': 2})
+        # Using the first entry makes the second the least recently used.
+        self.cache.get((1,))
+        self.cache.set((3,), {'_id': 3})
+
+    def should_evict_least_recently_used(self):
+        assert self.cache.get((2,)) is None
+
+    def should_keep_recently_used(self):
+        assert self.cache.get((1,)) == {'_id': 1}
+        assert self.cache.get((3,)) == {'_id': 3}
+
+    def should_count_eviction(self):
+        assert self.cache.stats()['evictions'] == 1
+        assert len(self.cache) == 2
+
+
+class WhenExceedingMaxBytes(BaseDocumentCacheTest):
+
+    max_entries = 10
+    max_bytes = 40
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        # Each document is 14 bytes of BSON.
+        for i in range(3):
+            self.cache.set((i,), {'_id': i})
+
+    def should_evict_until_within_bound(self):
+        assert self.cache.stats()['bytes'] == 28
+        assert self.cache.get((0,)) is None
+        assert self.cache.stats()['evictions'] == 1
+
+    def should_not_cache_documents_over_bound(self):
+        self.cache.set((9,), {'_id': 9, 'big': 'x' * 100})
+        assert self.cache.get((9,)) is None
+
+
+class WhenEntryExpires(BaseDocumentCacheTest):
+
+    ttl = 10
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        self.cache.set((1,), {'_id': 1})
+
+    def should_serve_before_expiry(self):
+        self.clock.now += 9
+        assert self.cache.get((1,)) == {'_id': 1}
+
+    def should_not_serve_after_expiry(self):
+        self.clock.now += 10
+        assert self.cache.get((1,)) is None
+        assert len(self.cache) == 0
+        assert self.cache.stats()['bytes'] == 0
+
+
+class WhenDiscardingKey(BaseDocumentCacheTest):
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        self.cache.set((1,), {'_id': 1})
+        self.generation = self.cache.generation
+        self.cache.discard((1,))
+
+    def should_remove_entry(self):
+        assert self.cache.get((1,)) is None
+        assert self.cache.stats()['bytes'] == 0
+
+    def should_not_cache_documents_read_before_discard(self):
+        self.cache.set((2,), {'_id': 2}, self.generation)
+        assert self.cache.get((2,)) is None
+
+    def should_cache_documents_read_after_discard(self):
+        self.cache.set((2,), {'_id': 2}, self.cache.generation)
+        assert self.cache.get((2,)) == {'_id': 2}
+
+
+class WhenClearing(BaseDocumentCacheTest):
+
+    def setup(self):
+        BaseDocumentCacheTest.setup(self)
+        self.cache.set((1,), {'_id': 1})
+        self.cache.set((2,), {'_id': 2})
+        self.cache.clear()
+
+    def should_remove_all_entries(self):
+        assert len(self.cache) == 0
+        assert self.cache.stats()['bytes'] == 0
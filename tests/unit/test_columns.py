@@ -0,0 +1,185 @@
+from datetime import datetime
+
+from bson import ObjectId
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_raises
+
+from scalymongo.columns import *
+from scalymongo.schema_operators import IS, OR
+import scalymongo.columns as mod
+
+
+STRUCTURE = {
+    'count': int,
+    'total': long,
+    'ratio': float,
+    'flag': bool,
+    'created': datetime,
+    'name': basestring,
+    'owner': ObjectId,
+    'tags': [basestring],
+    'author': {
+        'name': basestring,
+        'rank': int,
+    },
+    'number': OR(int, long),
+    'mixed': OR(int, basestring),
+    'state': IS(1, 2, 3),
+    'label': IS('a', 1),
+}
+
+
+####
+##
+## column_dtype
+##
+####
+
+class DescribeColumnDtype(object):
+
+    def should_use_int64_for_int(self):
+        assert column_dtype(STRUCTURE, 'count') == 'int64'
+
+    def should_use_int64_for_long(self):
+        assert column_dtype(STRUCTURE, 'total') == 'int64'
+
+    def should_use_float64_for_float(self):
+        assert column_dtype(STRUCTURE, 'ratio') == 'float64'
+
+    def should_use_bool_for_bool(self):
+        assert column_dtype(STRUCTURE, 'flag') == 'bool'
+
+    def should_use_datetime64_for_datetime(self):
+        assert column_dtype(STRUCTURE, 'created') == 'datetime64[ms]'
+
+    def should_use_object_for_strings(self):
+        assert column_dtype(STRUCTURE, 'name') == 'object'
+
+    def should_use_object_for_other_types(self):
+        assert column_dtype(STRUCTURE, 'owner') == 'object'
+
+    def should_use_object_for_lists(self):
+        assert column_dtype(STRUCTURE, 'tags') == 'object'
+
+    def should_use_object_for_embedded_documents(self):
+        assert column_dtype(STRUCTURE, 'author') == 'object'
+
+    def should_follow_dotted_paths(self):
+        assert column_dtype(STRUCTURE, 'author.rank') == 'int64'
+
+    def should_use_object_for_undeclared_fields(self):
+        assert column_dtype(STRUCTURE, 'missing') == 'object'
+
+    def should_use_object_for_paths_through_non_documents(self):
+        assert column_dtype(STRUCTURE, 'count.value') == 'object'
+
+    def should_use_common_dtype_of_OR(self):
+        assert column_dtype(STRUCTURE, 'number') == 'int64'
+
+    def should_use_object_for_OR_of_different_dtypes(self):
+        assert column_dtype(STRUCTURE, 'mixed') == 'object'
+
+    def should_use_dtype_of_IS_values(self):
+        assert column_dtype(STRUCTURE, 'state') == 'int64'
+
+    def should_use_object_for_IS_values_of_different_types(self):
+        assert column_dtype(STRUCTURE, 'label') == 'object'
+
+
+####
+##
+## ColumnBuilder
+##
+####
+
+class WhenNumpyIsMissing(object):
+
+    def setup(self):
+        self.numpy = mod.numpy
+        mod.numpy = None
+
+    def teardown(self):
+        mod.numpy = self.numpy
+
+    def should_raise_ImportError(self):
+        assert_raises(ImportError, ColumnBuilder, 'int64')
+
+
+class BaseNumpyTest(object):
+
+    def setup(self):
+        if mod.numpy is None:
+            raise SkipTest('numpy is not installed')
+
+
+class WhenAppendingPastCapacity(BaseNumpyTest):
+
+    def setup(self):
+        BaseNumpyTest.setup(self)
+        self.column = ColumnBuilder('int64', capacity=2)
+        for value in [1, None, 3, 4, 5]:
+            self.column.append(value)
+        self.returned = self.column.build()
+
+    def should_keep_all_values(self):
+        assert list(self.returned.data[[0, 2, 3, 4]]) == [1, 3, 4, 5]
+
+    def should_mask_missing_values(self):
+        assert list(self.returned.mask) == [False, True, False, False, False]
+
+    def should_use_dtype(self):
+        assert self.returned.dtype == mod.numpy.dtype('int64')
+
+
+####
+##
+## to_columns
+##
+####
+
+class WhenReadingColumns(BaseNumpyTest):
+
+    def setup(self):
+        BaseNumpyTest.setup(self)
+        self.documents = [
+            {'count': 1, 'ratio': 0.5, 'author': {'rank': 3},
+             'created': datetime(2011, 1, 2)},
+            {'count': 2, 'name': 'x', 'author': {}},
+            {'ratio': 1.5, 'name': 'y'},
+        ]
+        self.returned = to_columns(
+            self.documents,
+            ['count', 'ratio', 'name', 'author.rank', 'created'],
+            STRUCTURE, capacity=1)
+
+    def should_return_column_for_each_field(self):
+        assert sorted(self.returned.keys()) == [
+            'author.rank', 'count', 'created', 'name', 'ratio']
+
+    def should_derive_dtypes_from_structure(self):
+        assert self.returned['count'].dtype == mod.numpy.dtype('int64')
+        assert self.returned['ratio'].dtype == mod.numpy.dtype('float64')
+        assert self.returned['name'].dtype == mod.numpy.dtype('object')
+
+    def should_read_values(self):
+        assert self.returned['count'].tolist() == [1, 2, None]
+        assert self.returned['ratio'].tolist() == [0.5, None, 1.5]
+        assert self.returned['name'].tolist() == [None, 'x', 'y']
+
+    def should_read_embedded_fields(self):
+        assert self.returned['author.rank'].tolist() == [3, None, None]
+
+    def should_read_datetimes(self):
+        assert self.returned['created'][0] == mod.numpy.datetime64(
+            '2011-01-02T00:00:00.000')
+        assert list(self.returned['created'].mask) == [False, True, True]
+
+
+class WhenReadingNoDocuments(BaseNumpyTest):
+
+    def setup(self):
+        BaseNumpyTest.setup(self)
+        self.returned = to_columns([], ['count'], STRUCTURE)
+
+    def should_return_empty_column(self):
+        assert len(self.returned['count']) == 0
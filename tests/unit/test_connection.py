@@ -1,10 +1,19 @@
+import threading
+
 from dingus import Dingus, DingusTestCase
 from nose.tools import assert_raises
 
-from scalymongo.connection import DocumentProxy, Connection
+from scalymongo.connection import (
+    Connection,
+    DocumentProxy,
+    get_document_collection,
+)
 import scalymongo.connection as mod
 
 
+ORIGINAL_CONNECTION_INIT = Connection.__init__
+
+
 class DescribeConnectionClass(object):
 
     def should_extend_pymongo_connection(self):
@@ -20,6 +29,31 @@ class BaseConnectionTest(DingusTestCase(Connection)):
         Connection.__init__ = Dingus(return_value=None)
         Connection.__getitem__ = Dingus('__getitem__')
         self.connection = Connection()
+        self.connection._connected_documents = {}
+        self.connection._connected_documents_lock = \
+            threading.Lock()
+        self.connection._Connection__models = Dingus('models')
+
+
+class DescribeConnectionInit(BaseConnectionTest):
+
+    def setup(self):
+        BaseConnectionTest.setup(self)
+        self.host = Dingus('host')
+        self.port = Dingus('port')
+
+        ORIGINAL_CONNECTION_INIT(self.connection, self.host, port=self.port)
+
+    def should_init_mongo_client(self):
+        assert mod.MongoClient.calls(
+            '__init__', self.connection, self.host, port=self.port)
+
+    def should_create_document_proxy(self):
+        assert mod.DocumentProxy.calls(
+            '()', self.connection, mod.get_registration_log())
+
+    def should_save_document_proxy(self):
+        assert self.connection._Connection__models == mod.DocumentProxy()
 
 
 class DescribeConnectDocument(BaseConnectionTest):
@@ -44,8 +78,75 @@ class DescribeConnectDocument(BaseConnectionTest):
             self.document.__database__]
 
     def should_set_collection_on_returned(self):
-        assert self.returned.collection == self.connection[
-            self.document.__database__][self.document.__collection__]
+        assert self.returned.collection is mod.get_document_collection(
+            self.connection[self.document.__database__], self.document)
+
+    def should_return_cached_type_on_subsequent_calls(self):
+        assert self.connection.connect_document(self.document) \
+            is self.returned
+
+
+class BaseGetDocumentCollection(DingusTestCase(get_document_collection)):
+
+    def setup(self):
+        super(BaseGetDocumentCollection, self).setup()
+        self.database = Dingus('database')
+
+        class MyDoc(object):
+            __collection__ = 'things'
+        self.document = MyDoc
+
+
+class WhenDocumentHasNoWriteConcernOverride(BaseGetDocumentCollection):
+
+    def setup(self):
+        BaseGetDocumentCollection.setup(self)
+        self.returned = get_document_collection(self.database, self.document)
+
+    def should_return_collection_from_database(self):
+        assert self.returned is self.database['things']
+
+
+class WhenDocumentOverridesWriteConcern(BaseGetDocumentCollection):
+
+    def setup(self):
+        BaseGetDocumentCollection.setup(self)
+        self.document.write_concern_override = {'w': 0}
+        self.returned = get_document_collection(self.database, self.document)
+
+    def should_build_write_concern(self):
+        assert mod.WriteConcern.calls('()', w=0)
+
+    def should_return_collection_with_write_concern(self):
+        collection = self.database['things']
+        assert collection.calls(
+            'with_options', write_concern=mod.WriteConcern())
+        assert self.returned is collection.with_options()
+
+
+class WhenConnectingRedefinedDocument(BaseConnectionTest):
+
+    def setup(self):
+        BaseConnectionTest.setup(self)
+        self.original = self._define_document()
+        self.redefined = self._define_document()
+        self.connection.connect_document(self.original)
+
+        self.returned = self.connection.connect_document(self.redefined)
+
+    def _define_document(self):
+        class MyDoc(object):
+            __database__ = Dingus()
+            __collection__ = Dingus()
+        return MyDoc
+
+    def should_return_subclass_of_redefined(self):
+        assert issubclass(self.returned, self.redefined)
+
+    def should_discard_stale_type(self):
+        assert self.connection._connected_documents == {
+            self.redefined: self.returned,
+        }
 
 
 class DescribeModelsGetter(BaseConnectionTest):
@@ -55,13 +156,11 @@ class DescribeModelsGetter(BaseConnectionTest):
 
         self.returned = self.connection.models
 
-    def should_create_document_proxy(self):
-        assert mod.DocumentProxy.calls(
-            '()', self.connection, mod.get_concrete_classes())
+    def should_return_saved_document_proxy(self):
+        assert self.returned is self.connection._Connection__models
 
-    def should_return_document_proxy(self):
-        assert mod.DocumentProxy.calls('()').once()
-        assert self.returned == mod.DocumentProxy()
+    def should_return_same_proxy_on_every_access(self):
+        assert self.connection.models is self.returned
 
 
 class DescribeDocumentProxyInit(object):
@@ -84,6 +183,108 @@ class DescribeDocumentProxyInit(object):
         }
 
 
+class WhenClassRegisteredAfterDocumentProxyInit(object):
+
+    def setup(self):
+        self.connection = Dingus('connection')
+        self.registered = [Dingus(__name__='0')]
+        self.document_proxy = DocumentProxy(self.connection, self.registered)
+        self.new_class = Dingus(__name__='1')
+        self.registered.append(self.new_class)
+
+        self.returned = self.document_proxy['1']
+
+    def should_index_new_class(self):
+        assert self.document_proxy.registered['1'] is self.new_class
+
+    def should_connect_new_class(self):
+        assert self.connection.calls('connect_document', self.new_class)
+
+
+class BaseDocumentProxyByCollection(object):
+
+    def setup(self):
+        self.connection = Dingus('connection')
+        self.registered = [
+            Dingus(__name__='A', __database__='db0', __collection__='c0'),
+            Dingus(__name__='B', __database__='db1', __collection__='c0'),
+            Dingus(__name__='C', __database__='db0', __collection__='c1'),
+        ]
+        self.document_proxy = DocumentProxy(self.connection, self.registered)
+
+
+class WhenGettingModelsByCollection(BaseDocumentProxyByCollection):
+
+    def setup(self):
+        BaseDocumentProxyByCollection.setup(self)
+
+        self.returned = self.document_proxy.by_collection('c0')
+
+    def should_connect_models_in_collection(self):
+        assert self.connection.calls(
+            'connect_document', self.registered[0]).once()
+        assert self.connection.calls(
+            'connect_document', self.registered[1]).once()
+        assert not self.connection.calls(
+            'connect_document', self.registered[2])
+
+    def should_return_connected_models(self):
+        assert self.returned == [
+            self.connection.connect_document(),
+            self.connection.connect_document(),
+        ]
+
+
+class WhenGettingModelsByDatabaseAndCollection(BaseDocumentProxyByCollection):
+
+    def setup(self):
+        BaseDocumentProxyByCollection.setup(self)
+
+        self.returned = self.document_proxy.by_collection('c0', 'db1')
+
+    def should_connect_only_model_in_namespace(self):
+        assert self.connection.calls('connect_document').once()
+        assert self.connection.calls('connect_document', self.registered[1])
+
+    def should_return_connected_model(self):
+        assert self.returned == [self.connection.connect_document()]
+
+
+class WhenGettingModelsByUnknownCollection(BaseDocumentProxyByCollection):
+
+    def setup(self):
+        BaseDocumentProxyByCollection.setup(self)
+
+        self.returned = self.document_proxy.by_collection('c2')
+
+    def should_return_empty_list(self):
+        assert self.returned == []
+
+
+class WhenGettingModelsByCollectionAfterRedefinition(
+        BaseDocumentProxyByCollection):
+
+    def setup(self):
+        BaseDocumentProxyByCollection.setup(self)
+        self.redefined = Dingus(
+            __name__='A', __database__='db0', __collection__='c0')
+        self.registered.append(self.redefined)
+
+        self.returned = self.document_proxy.by_collection('c0')
+        self.in_namespace = self.document_proxy.by_collection('c0', 'db0')
+
+    def should_replace_earlier_definition(self):
+        assert not self.connection.calls(
+            'connect_document', self.registered[0])
+        assert len(self.connection.calls(
+            'connect_document', self.redefined)) == 2
+
+    def should_keep_order(self):
+        assert [call.args[0] for call
+                in self.connection.calls('connect_document')] == [
+            self.redefined, self.registered[1], self.redefined]
+
+
 class WhenDocumentProxyInitWithDuplicateClassNames(
     DingusTestCase(DocumentProxy)):
 
@@ -105,7 +306,7 @@ class DescribeDocumentProxy(object):
 
     def setup(self):
         self.connection = Dingus('connection')
-        self.registered = Dingus('registered')
+        self.registered = []
         self.document_proxy = DocumentProxy(self.connection, self.registered)
 
 
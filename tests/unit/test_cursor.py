@@ -1,4 +1,8 @@
+import sys
+import traceback
+
 from deterministic_dingus import DingusWhitelistTestCase, Dingus, DeterministicDingus
+from nose.tools import assert_raises
 
 from scalymongo.cursor import Cursor
 import scalymongo.cursor as mod
@@ -83,6 +87,137 @@ class WhenGettingNext(BaseCursorTestCase):
         assert self.returned is self.document_type(self.wrapped_cursor.next())
 
 
+####
+##
+## Cursor.to_columns
+##
+####
+
+class WhenGettingColumns(BaseCursorTestCase):
+
+    module_mocks = ['to_columns']
+
+    def setup(self):
+        BaseCursorTestCase.setup(self)
+        self.fields = Dingus('fields')
+
+        self.returned = self.cursor.to_columns(self.fields)
+
+    def should_read_columns_from_wrapped_cursor(self):
+        assert mod.to_columns.calls(
+            '()', self.wrapped_cursor, self.fields,
+            self.document_type.structure).once()
+
+    def should_not_wrap_documents(self):
+        assert not self.document_type.calls('()')
+
+    def should_return_columns(self):
+        assert self.returned is mod.to_columns()
+
+
+####
+##
+## Cursor.next_batch
+##
+####
+
+class FakeWrappedCursor(object):
+
+    def __init__(self, documents, started=False):
+        self.documents = iter(documents)
+        self.started = started
+        self.batch_sizes = []
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return self.documents.next()
+
+    def batch_size(self, size):
+        if self.started:
+            raise mod.InvalidOperation('cannot set options after executing')
+        self.batch_sizes.append(size)
+        return self
+
+
+class BaseBatchTestCase(object):
+
+    def setup(self):
+        self.wrapped_cursor = FakeWrappedCursor(
+            [{'a': 1}, {'a': 2}, {'a': 3}])
+        self.document_type = DeterministicDingus('document_type')
+        self.cursor = Cursor(self.wrapped_cursor, self.document_type)
+
+
+class WhenGettingNextBatch(BaseBatchTestCase):
+
+    def setup(self):
+        BaseBatchTestCase.setup(self)
+        self.returned = self.cursor.next_batch(2)
+
+    def should_wrap_documents_together(self):
+        assert self.returned is self.document_type.wrap_many(
+            [{'a': 1}, {'a': 2}])
+
+    def should_leave_remaining_documents(self):
+        assert list(self.wrapped_cursor) == [{'a': 3}]
+
+
+class WhenGettingNextBatchOfPlainType(BaseBatchTestCase):
+
+    def setup(self):
+        BaseBatchTestCase.setup(self)
+        self.cursor = Cursor(self.wrapped_cursor, tuple)
+        self.returned = self.cursor.next_batch(5)
+
+    def should_wrap_documents_one_by_one(self):
+        assert self.returned == [('a',), ('a',), ('a',)]
+
+
+class WhenGettingNextBatchFromExhaustedCursor(BaseBatchTestCase):
+
+    def setup(self):
+        BaseBatchTestCase.setup(self)
+        self.cursor = Cursor(FakeWrappedCursor([]), tuple)
+        self.returned = self.cursor.next_batch(2)
+
+    def should_return_empty_list(self):
+        assert self.returned == []
+
+
+####
+##
+## Cursor.iter_batches
+##
+####
+
+class WhenIteratingBatches(BaseBatchTestCase):
+
+    def setup(self):
+        BaseBatchTestCase.setup(self)
+        self.cursor = Cursor(self.wrapped_cursor, tuple)
+        self.returned = list(self.cursor.iter_batches(2))
+
+    def should_yield_batches_until_exhausted(self):
+        assert self.returned == [[('a',), ('a',)], [('a',)]]
+
+    def should_set_batch_size_on_wrapped_cursor(self):
+        assert self.wrapped_cursor.batch_sizes == [2]
+
+
+class WhenIteratingBatchesOfStartedCursor(BaseBatchTestCase):
+
+    def setup(self):
+        BaseBatchTestCase.setup(self)
+        self.wrapped_cursor.started = True
+        self.cursor = Cursor(self.wrapped_cursor, tuple)
+        self.returned = list(self.cursor.iter_batches(2))
+
+    def should_still_yield_batches(self):
+        assert self.returned == [[('a',), ('a',)], [('a',)]]
+
+
 ####
 ##
 ## Cursor.*
@@ -170,3 +305,171 @@ class WhenGettingOtherMethodAndAtts(BaseCursorTestCase):
         for attr in attrs:
             assert getattr(self.cursor, attr) \
                    == getattr(self.wrapped_cursor, attr)
+
+
+####
+##
+## Cursor.prefetch
+##
+####
+
+class FailingWrappedCursor(FakeWrappedCursor):
+
+    def next(self):
+        document = FakeWrappedCursor.next(self)
+        if document is None:
+            raise ValueError('Failed to fetch')
+        return document
+
+
+class BasePrefetchTestCase(object):
+
+    def setup(self):
+        self.documents = [{'a': i} for i in range(7)]
+        self.wrapped_cursor = FakeWrappedCursor(self.documents)
+        self.wrapped_cursor.close = Dingus('close')
+        self.cursor = Cursor(self.wrapped_cursor, tuple)
+
+
+class WhenPrefetching(BasePrefetchTestCase):
+
+    def setup(self):
+        BasePrefetchTestCase.setup(self)
+        self.prefetching = self.cursor.prefetch(depth=2, batch_size=3)
+        self.returned = list(self.prefetching)
+
+    def should_return_PrefetchingCursor(self):
+        assert isinstance(self.prefetching, mod.PrefetchingCursor)
+
+    def should_yield_every_document_in_order(self):
+        assert self.returned == [('a',)] * 7
+
+    def should_fetch_in_batches(self):
+        assert self.wrapped_cursor.batch_sizes == [3]
+
+    def should_close_wrapped_cursor(self):
+        assert self.wrapped_cursor.close.calls('()').once()
+
+    def should_return_empty_batches_when_exhausted(self):
+        assert self.prefetching.next_batch() == []
+
+
+class WhenGettingPrefetchedBatches(BasePrefetchTestCase):
+
+    def setup(self):
+        BasePrefetchTestCase.setup(self)
+        self.prefetching = self.cursor.prefetch(batch_size=4)
+        self.returned = [
+            self.prefetching.next_batch() for _ in range(3)]
+
+    def should_return_batches(self):
+        assert self.returned == [[('a',)] * 4, [('a',)] * 3, []]
+
+
+class WhenPrefetchingFails(BasePrefetchTestCase):
+
+    def setup(self):
+        BasePrefetchTestCase.setup(self)
+        self.wrapped_cursor = FailingWrappedCursor([{'a': 1}, None])
+        self.wrapped_cursor.close = Dingus('close')
+        self.prefetching = Cursor(self.wrapped_cursor, tuple).prefetch(
+            batch_size=1)
+
+    def should_yield_documents_before_failure(self):
+        assert self.prefetching.next() == ('a',)
+
+    def should_raise_exception_from_thread(self):
+        self.prefetching.next()
+        assert_raises(ValueError, self.prefetching.next)
+
+    def should_close_wrapped_cursor(self):
+        self.prefetching.next()
+        assert_raises(ValueError, self.prefetching.next)
+        assert self.wrapped_cursor.close.calls('()').once()
+
+    def should_stop_after_failure(self):
+        self.prefetching.next()
+        assert_raises(ValueError, self.prefetching.next)
+        assert_raises(StopIteration, self.prefetching.next)
+
+    def should_keep_traceback_from_thread(self):
+        self.prefetching.next()
+        try:
+            self.prefetching.next()
+        except ValueError:
+            frames = traceback.extract_tb(sys.exc_info()[2])
+        assert frames[-1][2] == 'next'
+        assert frames[-1][3] == "raise ValueError('Failed to fetch')"
+
+
+class WhenClosingPrefetchingCursorEarly(BasePrefetchTestCase):
+
+    def setup(self):
+        BasePrefetchTestCase.setup(self)
+        self.wrapped_cursor = FakeWrappedCursor(
+            {'a': i} for i in xrange(10 ** 6))
+        self.wrapped_cursor.close = Dingus('close')
+        with Cursor(self.wrapped_cursor, tuple).prefetch(
+                depth=1, batch_size=2) as prefetching:
+            self.first = prefetching.next()
+        self.prefetching = prefetching
+
+    def should_yield_documents_before_closing(self):
+        assert self.first == ('a',)
+
+    def should_stop_fetching(self):
+        remaining = sum(1 for _ in self.wrapped_cursor.documents)
+        assert remaining > 10 ** 6 - 100
+
+    def should_close_wrapped_cursor(self):
+        assert self.wrapped_cursor.close.calls('()').once()
+
+    def should_stop_iteration(self):
+        assert_raises(StopIteration, self.prefetching.next)
+
+
+####
+##
+## SortedMergeCursor
+##
+####
+
+class WhenMergingSortedCursors(object):
+
+    def setup(self):
+        self.wrapped = [
+            FakeWrappedCursor([{'a': 1, 'b': 9}, {'a': 4}, {'a': 7}]),
+            FakeWrappedCursor([{'a': 2}, {'a': 3}, {'a': 9}]),
+            FakeWrappedCursor([{'a': 1, 'b': 1}]),
+        ]
+        for wrapped in self.wrapped:
+            wrapped.close = Dingus('close')
+        self.cursor = mod.SortedMergeCursor(
+            [Cursor(wrapped, dict) for wrapped in self.wrapped],
+            [('a', 1)], depth=1, batch_size=2)
+        self.returned = list(self.cursor)
+
+    def should_merge_in_order(self):
+        assert [doc['a'] for doc in self.returned] == [1, 1, 2, 3, 4, 7, 9]
+
+    def should_close_cursors(self):
+        for wrapped in self.wrapped:
+            assert wrapped.close.calls('()').once()
+
+
+class WhenMergingDescendingCursors(object):
+
+    def setup(self):
+        cursors = [
+            Cursor(FakeWrappedCursor([{'a': {'b': 5}}, {'a': {'b': 1}}]),
+                   dict),
+            Cursor(FakeWrappedCursor([{'a': {'b': 3}}, {}]), dict),
+        ]
+        for cursor in cursors:
+            cursor._Cursor__wrapped_cursor.close = Dingus('close')
+        self.returned = list(mod.SortedMergeCursor(
+            cursors, [('a.b', -1)], depth=1, batch_size=1))
+
+    def should_merge_in_descending_order(self):
+        assert self.returned == [
+            {'a': {'b': 5}}, {'a': {'b': 3}}, {'a': {'b': 1}}, {}]
@@ -1,9 +1,19 @@
+import copy
+import threading
+
 from deterministic_dingus import DeterministicDingus
 from dingus import DingusTestCase, Dingus, exception_raiser
 from nose.tools import assert_raises
 
 from scalymongo.document import *
-from scalymongo.errors import GlobalQueryException, ModifyFailedError
+from scalymongo.errors import (
+    GlobalQueryException,
+    ModifyFailedError,
+    UnindexedSortException,
+    ValidationError,
+)
+from scalymongo.cache import DocumentCache
+from scalymongo.validation import ALWAYS, NEVER, SampledValidation
 import scalymongo.document as mod
 
 
@@ -85,6 +95,9 @@ class WhenDocumentClassIsNotAbstract(BaseDocumentMetaclassNew):
     def should_add_to_concrete_classes(self):
         assert self.returned in DocumentMetaclass.concrete_classes
 
+    def should_append_to_registration_log(self):
+        assert DocumentMetaclass.registration_log[-1] is self.returned
+
     def should_set_abstract_to_false(self):
         assert self.attrs['abstract'] is False
 
@@ -99,6 +112,17 @@ class DescribeGetConcreteClasses(DingusTestCase(get_concrete_classes)):
     def should_return_concrete_classes(self):
         assert self.returned == mod.DocumentMetaclass.concrete_classes
 
+
+class DescribeGetRegistrationLog(DingusTestCase(get_registration_log)):
+
+    def setup(self):
+        super(DescribeGetRegistrationLog, self).setup()
+
+        self.returned = get_registration_log()
+
+    def should_return_registration_log(self):
+        assert self.returned is mod.DocumentMetaclass.registration_log
+
 ####
 ## Document
 ####
@@ -113,7 +137,7 @@ class DescribeDocumentClass(object):
 
 
 class BaseDocumentTest(DingusTestCase(
-    Document, ['UnsafeBehaviorError', 'ClassDefault'])):
+    Document, ['UnsafeBehaviorError', 'ClassDefault', 'inflated'])):
 
     def setup(self):
         super(BaseDocumentTest, self).setup()
@@ -148,8 +172,57 @@ class WhenInitializingDocumentSubclassOverridingWriteConcern(object):
         self.MyDoc.collection = Dingus('collection')
         self.my_doc = self.MyDoc()
 
-    def should_set_collection_write_concern(self):
-        assert self.my_doc.collection.write_concern == {'w': 0}
+    def should_not_touch_collection(self):
+        # The write concern is applied once when the class is connected.
+        assert not self.MyDoc.collection.calls
+        assert 'write_concern' not in self.MyDoc.collection.__dict__
+
+
+class BaseWrapMany(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'foo': int, 'bar': int, 'sub': {'x': int}}
+            default_values = {'foo': 5, 'bar': lambda: 7}
+            abstract = True
+        self.MyDoc = MyDoc
+        self.contents = [{'foo': 1}, {'sub': {'x': 1}}]
+        self.returned = MyDoc.wrap_many(self.contents)
+
+
+class WhenWrappingManyDocuments(BaseWrapMany):
+
+    def should_return_instances(self):
+        assert all(isinstance(doc, self.MyDoc) for doc in self.returned)
+
+    def should_match_individually_created_documents(self):
+        assert self.returned == [self.MyDoc(doc) for doc in self.contents]
+
+    def should_mark_defaults_dirty(self):
+        assert [doc.get_dirty_paths() for doc in self.returned] == [
+            frozenset([('bar',)]), frozenset([('foo',), ('bar',)])]
+
+    def should_copy_contents(self):
+        self.returned[0]['foo'] = 2
+        assert self.contents[0] == {'foo': 1}
+
+    def should_apply_conversions(self):
+        assert self.returned[1].sub.x == 1
+
+
+class WhenWrappingManyDocumentsWithCustomConstructor(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'foo': int}
+            abstract = True
+
+            def __init__(self, content):
+                Document.__init__(self, content, foo=9)
+        self.returned = MyDoc.wrap_many([{}])
+
+    def should_use_constructor(self):
+        assert self.returned == [{'foo': 9}]
 
 
 class BaseDocumentSubclassWithDefaultsTest(object):
@@ -256,6 +329,488 @@ class WhenDocumentHasNoIdAndKeywordsAreSpecified(
         assert self.doc.collection.calls('save', self.doc, **self.kwargs)
 
 
+class BaseSaveWithoutValidationTest(BaseSaveTest):
+
+    def setup(self):
+        BaseSaveTest.setup(self)
+        Document.validation_policy = NEVER
+
+    def teardown(self):
+        Document.validation_policy = ALWAYS
+        super(BaseSaveWithoutValidationTest, self).teardown()
+
+
+class WhenSavingWithoutValidation(BaseSaveWithoutValidationTest):
+
+    def setup(self):
+        BaseSaveWithoutValidationTest.setup(self)
+
+        self.doc.save(w=0)
+
+    def should_not_validate_document(self):
+        assert not self.doc.validate.calls('()')
+
+    def should_save_document_into_collection(self):
+        assert self.doc.collection.calls('save', self.doc, w=0)
+
+
+class WhenSavingWithValidationOverride(BaseSaveWithoutValidationTest):
+
+    def setup(self):
+        BaseSaveWithoutValidationTest.setup(self)
+
+        self.doc.save(validation=ALWAYS)
+
+    def should_validate_document(self):
+        assert self.doc.validate.calls('()')
+
+    def should_not_pass_validation_to_collection(self):
+        assert self.doc.collection.calls('save', self.doc)
+
+
+####
+## Document.insert_many
+####
+
+class BaseInsertMany(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'foo': int}
+        self.MyDoc = MyDoc
+        self.ordered_bulk = Dingus('ordered_bulk')
+        self.unordered_bulk = Dingus('unordered_bulk')
+        MyDoc.collection = Dingus(
+            'collection',
+            initialize_ordered_bulk_op__returns=self.ordered_bulk,
+            initialize_unordered_bulk_op__returns=self.unordered_bulk,
+        )
+
+
+class WhenInsertingManyValidDocuments(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+        self.existing = self.MyDoc(foo=0)
+
+        self.returned = self.MyDoc.insert_many(
+            [self.existing, {'foo': 1}], w=2)
+
+    def should_wrap_dicts_in_model_class(self):
+        assert self.returned.documents[0] is self.existing
+        assert isinstance(self.returned.documents[1], self.MyDoc)
+        assert self.returned.documents[1] == {'foo': 1}
+
+    def should_insert_documents_in_one_ordered_bulk_write(self):
+        assert self.MyDoc.collection.calls(
+            'initialize_ordered_bulk_op').once()
+        assert self.ordered_bulk.calls('insert', self.returned.documents[0])
+        assert self.ordered_bulk.calls('insert', self.returned.documents[1])
+
+    def should_execute_with_write_concern(self):
+        assert self.ordered_bulk.calls('execute', {'w': 2}).once()
+
+    def should_report_all_inserted(self):
+        assert self.returned.inserted == [0, 1]
+        assert self.returned.errors == {}
+
+
+class WhenInsertingManyAssignsIds(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+        # The driver sets `_id` on each document it inserts.
+        self.ordered_bulk.insert = lambda document: document.__setitem__(
+            '_id', Dingus('_id'))
+
+        self.returned = self.MyDoc.insert_many([{'foo': 1}, {'foo': 'x'}])
+
+    def should_mark_inserted_documents_clean(self):
+        assert self.returned.documents[0].get_changes() == {}
+
+    def should_leave_rejected_documents_unchanged(self):
+        assert self.returned.documents[1].get_dirty_paths() == frozenset()
+        assert '_id' not in self.returned.documents[1]
+
+
+class WhenInsertingManyUnordered(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+
+        self.returned = self.MyDoc.insert_many([{'foo': 1}], ordered=False)
+
+    def should_use_unordered_bulk_write(self):
+        assert self.MyDoc.collection.calls(
+            'initialize_unordered_bulk_op').once()
+        assert not self.MyDoc.collection.calls('initialize_ordered_bulk_op')
+
+    def should_execute_with_default_write_concern(self):
+        assert self.unordered_bulk.calls('execute', None).once()
+
+
+class WhenInsertingManyWithRejectedDocuments(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+
+        self.returned = self.MyDoc.insert_many([
+            {'foo': 1, '_id': Dingus('_id')},
+            {'foo': 'not an int'},
+            {'foo': 3},
+        ])
+
+    def should_refuse_already_saved_document(self):
+        assert isinstance(self.returned.errors[0], UnsafeBehaviorError)
+
+    def should_report_validation_error(self):
+        assert isinstance(self.returned.errors[1], ValidationError)
+
+    def should_only_insert_valid_document(self):
+        assert self.ordered_bulk.calls('insert').once()
+        assert self.returned.inserted == [2]
+
+
+class WhenInsertingManyWithSampledValidation(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+        self.policy = SampledValidation(1.0)
+
+        self.returned = self.MyDoc.insert_many(
+            [{'foo': 'not an int'}, {'foo': 2}], validation=self.policy)
+
+    def should_report_failure_to_policy(self):
+        assert self.policy.failures == 1
+
+    def should_insert_all_documents(self):
+        assert self.returned.inserted == [0, 1]
+        assert self.returned.errors == {}
+
+
+class WhenInsertingManyExceedsChunkBytes(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+
+        self.returned = self.MyDoc.insert_many(
+            [{'foo': 1}, {'foo': 2}, {'foo': 3}], chunk_bytes=30)
+
+    def should_execute_a_bulk_write_per_chunk(self):
+        assert len(self.ordered_bulk.calls('execute')) == 2
+
+    def should_insert_all_documents(self):
+        assert self.returned.inserted == [0, 1, 2]
+
+
+class BaseInsertManyWithWriteError(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+        error = BulkWriteError({
+            'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'dup'}],
+        })
+        self.ordered_bulk.execute = exception_raiser(error)
+        self.unordered_bulk.execute = exception_raiser(error)
+        self.documents = [{'foo': 1}, {'foo': 2}, {'foo': 3}, {'foo': 4}]
+
+
+class WhenOrderedInsertManyHasWriteError(BaseInsertManyWithWriteError):
+
+    def setup(self):
+        BaseInsertManyWithWriteError.setup(self)
+
+        self.returned = self.MyDoc.insert_many(self.documents, chunk_bytes=30)
+
+    def should_report_write_error(self):
+        assert isinstance(self.returned.errors[1], OperationFailure)
+        assert self.returned.errors[1].code == 11000
+
+    def should_stop_after_first_failure(self):
+        assert self.MyDoc.collection.calls(
+            'initialize_ordered_bulk_op').once()
+        assert self.returned.inserted == [0]
+
+
+class WhenUnorderedInsertManyHasWriteError(BaseInsertManyWithWriteError):
+
+    def setup(self):
+        BaseInsertManyWithWriteError.setup(self)
+
+        self.returned = self.MyDoc.insert_many(
+            self.documents, ordered=False, chunk_bytes=30)
+
+    def should_continue_with_later_chunks(self):
+        assert len(self.MyDoc.collection.calls(
+            'initialize_unordered_bulk_op')) == 2
+
+    def should_report_failures_from_each_chunk(self):
+        assert sorted(self.returned.errors) == [1, 3]
+        assert self.returned.inserted == [0, 2]
+
+
+class WhenInsertingPreparedDocuments(BaseInsertMany):
+
+    def setup(self):
+        BaseInsertMany.setup(self)
+        self.documents = [
+            {'foo': 1}, {'foo': 2, '_id': Dingus('_id')}, {'foo': 'x'}]
+
+        self.returned = self.MyDoc.insert_prepared(
+            self.documents, [20, 20, 20], ordered=False, chunk_bytes=30,
+            w=2)
+
+    def should_insert_documents_as_they_are(self):
+        assert self.returned.documents is self.documents
+        assert self.unordered_bulk.calls('insert', self.documents[0])
+        assert self.unordered_bulk.calls('insert', self.documents[2])
+
+    def should_not_validate_documents(self):
+        assert self.returned.inserted == [0, 2]
+
+    def should_refuse_already_saved_document(self):
+        assert isinstance(self.returned.errors[1], UnsafeBehaviorError)
+
+    def should_chunk_by_given_sizes(self):
+        assert len(self.unordered_bulk.calls('execute', {'w': 2})) == 2
+
+
+class WhenChunkingByBsonSize(object):
+
+    def setup(self):
+        self.documents = [{'a': 'x' * 10}, {'a': 'x' * 100}, {'a': 'x'}]
+        sizes = [len(BSON.encode(doc)) for doc in self.documents]
+        self.max_bytes = sizes[0] + sizes[2]
+
+        self.returned = list(mod._chunk_by_bson_size(
+            self.documents, [0, 1, 2], self.max_bytes))
+
+    def should_put_oversized_document_in_its_own_chunk(self):
+        assert self.returned == [[0], [1], [2]]
+
+    def should_use_given_sizes(self):
+        assert list(mod._chunk_by_bson_size(
+            self.documents, [0, 1, 2], self.max_bytes, [1, 1, 1])) == [
+                [0, 1, 2]]
+
+
+####
+## Document.get_changes
+####
+
+class BaseGetChanges(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {
+                'foo': int,
+                'bar': {'biz': int, 'baz': int},
+                'qux': int,
+            }
+        self.MyDoc = MyDoc
+        self.doc = MyDoc({
+            '_id': Dingus('_id'),
+            'foo': 1,
+            'bar': {'biz': 2, 'baz': 3},
+            'qux': 4,
+        })
+
+
+class WhenDocumentIsUnchanged(BaseGetChanges):
+
+    def setup(self):
+        BaseGetChanges.setup(self)
+
+        self.returned = self.doc.get_changes()
+
+    def should_return_empty_modifier(self):
+        assert self.returned == {}
+
+
+class WhenDocumentHasChanges(BaseGetChanges):
+
+    def setup(self):
+        BaseGetChanges.setup(self)
+        self.doc.foo = 5
+        self.doc.bar.biz = 6
+        del self.doc['qux']
+
+        self.returned = self.doc.get_changes()
+
+    def should_set_changed_fields_and_unset_removed_fields(self):
+        assert self.returned == {
+            '$set': {'foo': 5, 'bar.biz': 6},
+            '$unset': {'qux': 1},
+        }
+
+
+class WhenArrayElementChanged(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'comments': [{'rank': int}]}
+        self.doc = MyDoc({'_id': Dingus('_id'), 'comments': [{'rank': 1}]})
+        self.doc.comments[0].rank = 2
+
+        self.returned = self.doc.get_changes()
+
+    def should_set_element_field(self):
+        assert self.returned == {'$set': {'comments.0.rank': 2}}
+
+
+class BaseGetChangesOfArrays(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {
+                'tags': [basestring],
+                'matrix': [[int]],
+                'meta': dict,
+                'address': {'city': basestring},
+            }
+        self.doc = MyDoc({
+            '_id': Dingus('_id'),
+            'tags': ['a'],
+            'matrix': [[1]],
+            'meta': {'x': 1},
+            'address': None,
+        })
+
+
+class WhenArrayOfPlainValuesChangedInPlace(BaseGetChangesOfArrays):
+
+    def setup(self):
+        BaseGetChangesOfArrays.setup(self)
+        self.doc.tags.append('b')
+        self.doc.matrix[0][0] = 2
+
+        self.returned = self.doc.get_changes()
+
+    def should_set_changed_arrays(self):
+        assert self.returned == {
+            '$set': {'tags': ['a', 'b'], 'matrix.0.0': 2}}
+
+
+class WhenFieldOfPlainDictTypeChangedInPlace(BaseGetChangesOfArrays):
+
+    def setup(self):
+        BaseGetChangesOfArrays.setup(self)
+        self.doc.meta['x'] = 2
+
+        self.returned = self.doc.get_changes()
+
+    def should_not_notice_change(self):
+        assert self.returned == {}
+
+
+class WhenEmbeddedDocumentIsNone(BaseGetChangesOfArrays):
+
+    def should_return_none(self):
+        assert self.doc.address is None
+        assert self.doc['address'] is None
+
+    def should_list_items(self):
+        assert ('address', None) in self.doc.items()
+        assert None in list(self.doc.itervalues())
+
+
+class WhenEmbeddedFieldChangedAndReplaced(BaseGetChanges):
+
+    def setup(self):
+        BaseGetChanges.setup(self)
+        self.doc.bar.biz = 6
+        self.doc['bar'] = {'biz': 7}
+
+        self.returned = self.doc.get_changes()
+
+    def should_only_set_outermost_field(self):
+        assert self.returned == {'$set': {'bar': {'biz': 7}}}
+
+
+class WhenDocumentIsCopied(BaseGetChanges):
+
+    def setup(self):
+        BaseGetChanges.setup(self)
+        self.doc.bar
+        self.copied = copy.copy(self.doc)
+        self.copied.bar.biz = 6
+
+    def should_leave_original_unchanged(self):
+        assert self.doc.get_changes() == {}
+
+    def should_track_changes_of_copy(self):
+        assert self.copied.get_changes() == {'$set': {'bar.biz': 6}}
+
+
+####
+## Document.save_changes
+####
+
+class BaseSaveChanges(BaseGetChanges):
+
+    def setup(self):
+        BaseGetChanges.setup(self)
+        self.MyDoc.update = Dingus('update', return_value={'n': 1})
+        self.MyDoc.shard_index = {'fields': ['foo']}
+
+
+class WhenSavingChanges(BaseSaveChanges):
+
+    def setup(self):
+        BaseSaveChanges.setup(self)
+        self.doc.qux = 5
+        self.query = {'bar.biz': 2}
+
+        self.doc.save_changes(self.query, w=0)
+
+    def should_update_by_shard_key_id_and_query(self):
+        assert self.MyDoc.update.calls(
+            '()',
+            {'_id': self.doc['_id'], 'foo': 1, 'bar.biz': 2},
+            {'$set': {'qux': 5}},
+            w=0,
+        )
+
+    def should_mark_document_clean(self):
+        assert self.doc.get_changes() == {}
+
+
+class WhenSavingWithoutChanges(BaseSaveChanges):
+
+    def setup(self):
+        BaseSaveChanges.setup(self)
+
+        self.doc.save_changes()
+
+    def should_not_update(self):
+        assert not self.MyDoc.update.calls('()')
+
+
+class WhenSavingChangesMatchesNothing(BaseSaveChanges):
+
+    def setup(self):
+        BaseSaveChanges.setup(self)
+        self.MyDoc.update.return_value = {'n': 0}
+        self.doc.qux = 5
+
+    def should_raise_modify_failed_error(self):
+        assert_raises(ModifyFailedError, self.doc.save_changes)
+
+    def should_keep_changes(self):
+        assert_raises(ModifyFailedError, self.doc.save_changes)
+        assert self.doc.get_changes() == {'$set': {'qux': 5}}
+
+
+class WhenSavingChangesOfUnsavedDocument(BaseSaveChanges):
+
+    def setup(self):
+        BaseSaveChanges.setup(self)
+        del self.doc['_id']
+
+    def should_raise_unsafe_behavior_error(self):
+        assert_raises(UnsafeBehaviorError, self.doc.save_changes)
+
+
 ####
 ## Document.reload
 ####
@@ -396,25 +951,271 @@ class TestModifyWithExplicitQuerySpec(
         self.my_doc.modify(self.update, query=self.query)
 
 
+class WhenModifyingWithWriteConcern(BaseModify):
+
+    def setup(self):
+        BaseModify.setup(self)
+        self.my_doc.modify(self.update, w=0)
+
+    def should_send_write_concern_with_find_and_modify(self):
+        query = {'_id': self.original_my_doc['_id'],
+                 'foo': self.original_my_doc['foo'],
+                 'bar': self.original_my_doc['bar']}
+        assert self.MyDoc.find_and_modify.calls(
+            '()', query, self.update, new=True, writeConcern={'w': 0})
+
+
 class WhenFindAndModifyReturnsNone(
     BaseModify,
     ):
 
     def setup(self):
-        BaseModify.setup(self)
-        self.query = {'blarg': Dingus('blarg')}
-        self.MyDoc.reload = Dingus('reload')
-        self.MyDoc.find_and_modify.return_value = None
-
-        assert_raises(
-            ModifyFailedError,
-            self.my_doc.modify,
-            self.update,
-            query=self.query,
-        )
+        BaseModify.setup(self)
+        self.query = {'blarg': Dingus('blarg')}
+        self.MyDoc.reload = Dingus('reload')
+        self.MyDoc.find_and_modify.return_value = None
+
+        assert_raises(
+            ModifyFailedError,
+            self.my_doc.modify,
+            self.update,
+            query=self.query,
+        )
+
+    def should_reload_model(self):
+        assert self.my_doc.reload.calls('()')
+
+
+class BaseModifyLocally(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {
+                'owner': int,
+                'count': int,
+                'tags': [basestring],
+                'meta': {'a': int, 'b': int},
+            }
+            indexes = [{'fields': ['owner'], 'shard_key': True}]
+            abstract = True
+            collection = Dingus('collection')
+            find_and_modify = Dingus('find_and_modify')
+            reload = Dingus('reload')
+
+        self.MyDoc = MyDoc
+        self.MyDoc.collection.update.return_value = {'n': 1}
+        self.my_doc = MyDoc({
+            '_id': 1,
+            'owner': 2,
+            'count': 3,
+            'tags': [u'a'],
+            'meta': {'a': 1},
+        })
+        self.update = {
+            '$inc': {'count': 2},
+            '$push': {'tags': u'b'},
+            '$set': {'meta.b': 5},
+            '$unset': {'meta.a': 1},
+        }
+
+
+class WhenModifyingLocally(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        self.my_doc.modify(self.update, apply_locally=True, w=2)
+
+    def should_update_document(self):
+        assert self.MyDoc.collection.calls(
+            'update', {'_id': 1, 'owner': 2}, self.update, w=2).once()
+
+    def should_not_find_and_modify(self):
+        assert not self.MyDoc.find_and_modify.calls('()')
+
+    def should_apply_update_to_local_copy(self):
+        assert self.my_doc == {
+            '_id': 1,
+            'owner': 2,
+            'count': 5,
+            'tags': [u'a', u'b'],
+            'meta': {'b': 5},
+        }
+
+    def should_mark_document_clean(self):
+        assert self.my_doc.get_changes() == {}
+
+
+class WhenModifyingLocallyWithSharedSource(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        self.source = {'_id': 1, 'owner': 2, 'tags': [u'a'], 'meta': {'a': 1}}
+        self.my_doc = self.MyDoc(self.source)
+        self.other_doc = self.MyDoc(self.source)
+        self.my_doc.modify(
+            {'$push': {'tags': u'b'}, '$set': {'meta.b': 5}},
+            apply_locally=True)
+
+    def should_apply_update_to_local_copy(self):
+        assert self.my_doc['tags'] == [u'a', u'b']
+        assert self.my_doc['meta'] == {'a': 1, 'b': 5}
+
+    def should_leave_source_unchanged(self):
+        assert self.source == {
+            '_id': 1, 'owner': 2, 'tags': [u'a'], 'meta': {'a': 1}}
+
+    def should_leave_other_documents_unchanged(self):
+        assert self.other_doc['tags'] == [u'a']
+        assert self.other_doc['meta'] == {'a': 1}
+
+
+class WhenModifyingLocallyWithUnsavedChanges(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        self.my_doc.count = 10
+        self.my_doc.meta.a = 4
+        self.my_doc.modify({'$push': {'tags': u'b'}}, apply_locally=True)
+
+    def should_keep_unrelated_changes(self):
+        assert self.my_doc.get_changes() == {
+            '$set': {'count': 10, 'meta.a': 4}}
+
+
+class WhenModifyingLocallyOverUnsavedChanges(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        self.my_doc.count = 10
+        self.my_doc.tags.append(u'c')
+        self.my_doc.modify({'$push': {'tags': u'b'}}, apply_locally=True)
+
+    def should_only_mark_modified_fields_clean(self):
+        assert self.my_doc.get_changes() == {'$set': {'count': 10}}
+
+
+class WhenModifyingLocallyWithReplacement(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        self.my_doc.modify({'owner': 2, 'count': 7}, apply_locally=True)
+
+    def should_replace_local_copy(self):
+        assert self.my_doc == {'_id': 1, 'owner': 2, 'count': 7}
+
+
+class WhenModifyingLocallyMatchesNothing(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        self.MyDoc.collection.update.return_value = {'n': 0}
+        self.original = dict(self.my_doc)
+
+        assert_raises(
+            ModifyFailedError, self.my_doc.modify, self.update,
+            apply_locally=True)
+
+    def should_leave_local_copy_unchanged(self):
+        assert self.my_doc == self.original
+
+    def should_not_reload_document(self):
+        assert not self.my_doc.reload.calls('()')
+
+
+class WhenModifyingLocallyWithUnsupportedModifier(BaseModifyLocally):
+
+    def setup(self):
+        BaseModifyLocally.setup(self)
+        assert_raises(
+            ValueError, self.my_doc.modify, {'$set': {'tags.$': u'c'}},
+            apply_locally=True)
+
+    def should_not_update_document(self):
+        assert not self.MyDoc.collection.calls('update')
+
+
+## Document validation policy ##
+
+class BaseValidationPolicy(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'owner': int, 'count': int}
+            indexes = [{'fields': ['owner'], 'shard_key': True}]
+            abstract = True
+            collection = Dingus('collection')
+            validation_policy = NEVER
+        self.MyDoc = MyDoc
+
+
+class WhenUpdatingWithoutValidation(BaseValidationPolicy):
+
+    def setup(self):
+        BaseValidationPolicy.setup(self)
+        self.MyDoc.update({'owner': 1}, {'$set': {'count': 'x'}}, w=0)
+
+    def should_update_without_validating(self):
+        assert self.MyDoc.collection.calls(
+            'update', {'owner': 1}, {'$set': {'count': 'x'}}, w=0).once()
+
+
+class WhenUpdatingWithValidationOverride(BaseValidationPolicy):
+
+    def should_validate_update_modifier(self):
+        assert_raises(
+            ValidationError, self.MyDoc.update, {'owner': 1},
+            {'$set': {'count': 'x'}}, validation=ALWAYS)
+
+    def should_validate_replacement(self):
+        assert_raises(
+            ValidationError, self.MyDoc.update, {'owner': 1},
+            {'owner': 1, 'count': 'x'}, validation=ALWAYS)
+
+
+class WhenReplacingLazyDocumentWithoutValidation(BaseValidationPolicy):
+
+    def setup(self):
+        BaseValidationPolicy.setup(self)
+        self.lazy = self.MyDoc.lazy_class()({'owner': 1, 'count': 2})
+        self.lazy.inflate = Dingus('inflate')
+        self.MyDoc._validate_update(self.lazy)
+
+    def should_still_inflate_document(self):
+        assert self.lazy.inflate.calls('()').once()
+
+
+## Document.json_schema ##
+
+class DescribeJsonSchema(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'name': basestring, 'rank': int}
+            required_fields = set(['name'])
+            abstract = True
+        self.MyDoc = MyDoc
+
+    def should_describe_structure_and_required_fields(self):
+        assert self.MyDoc.json_schema() == make_json_schema(
+            {'name': basestring, 'rank': int}, set(['name']))
+
+
+## Document.validate_many ##
+
+class DescribeValidateMany(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'name': basestring, 'rank': int}
+            required_fields = set(['name'])
+            abstract = True
+        self.MyDoc = MyDoc
 
-    def should_reload_model(self):
-        assert self.my_doc.reload.calls('()')
+    def should_check_structure_and_required_fields(self):
+        report = self.MyDoc.validate_many(
+            [{'name': 'a', 'rank': 1}, {'name': 'b', 'rank': 'c'}, {}])
+        assert report.valid_indexes() == [0]
+        assert sorted(report.errors()) == [1, 2]
 
 
 ## Document.ensure_index ##
@@ -576,6 +1377,633 @@ class WhenFindingOneAndAllowingGlobal(
         assert not self.MyDoc.check_query_sharding.calls('()')
 
 
+class BaseCachedDocumentTest(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'owner': basestring, 'name': basestring}
+            indexes = [{'fields': ['owner'], 'shard_key': True}]
+            abstract = True
+            collection = Dingus('collection')
+            database = Dingus('database')
+            cache = DocumentCache()
+        self.MyDoc = MyDoc
+        self.found = {'_id': 1, 'owner': u'a', 'name': u'x'}
+        self.MyDoc.collection.find_one.return_value = self.found
+        self.spec = {'_id': 1, 'owner': u'a'}
+
+
+class WhenFindingOneCachedDocument(BaseCachedDocumentTest):
+
+    def setup(self):
+        BaseCachedDocumentTest.setup(self)
+        self.MyDoc.find_one(self.spec)
+        self.MyDoc.collection.reset()
+        self.returned = self.MyDoc.find_one(dict(self.spec))
+
+    def should_not_query_collection(self):
+        assert not self.MyDoc.collection.calls('find_one')
+
+    def should_return_cached_document(self):
+        assert isinstance(self.returned, self.MyDoc)
+        assert self.returned == self.found
+
+    def should_count_hit_and_miss(self):
+        stats = self.MyDoc.cache.stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+class WhenFindingOneByOtherFieldsWithCache(BaseCachedDocumentTest):
+
+    def setup(self):
+        BaseCachedDocumentTest.setup(self)
+        self.spec['name'] = u'x'
+        self.MyDoc.find_one(self.spec)
+        self.MyDoc.find_one(self.spec)
+
+    def should_always_query_collection(self):
+        assert len(self.MyDoc.collection.calls('find_one')) == 2
+
+    def should_not_cache(self):
+        assert len(self.MyDoc.cache) == 0
+
+
+class WhenFindingOneWithKeywordsWithCache(BaseCachedDocumentTest):
+
+    def setup(self):
+        BaseCachedDocumentTest.setup(self)
+        self.MyDoc.find_one(self.spec, fields=['name'])
+
+    def should_not_cache(self):
+        assert len(self.MyDoc.cache) == 0
+
+
+class BaseCachedWriteTest(BaseCachedDocumentTest):
+
+    def setup(self):
+        BaseCachedDocumentTest.setup(self)
+        self.MyDoc.find_one(self.spec)
+        self.MyDoc.cache.set((2, u'b'), {'_id': 2, 'owner': u'b'})
+
+
+class WhenUpdatingCachedDocument(BaseCachedWriteTest):
+
+    def setup(self):
+        BaseCachedWriteTest.setup(self)
+        self.MyDoc.update(
+            {'_id': 1, 'owner': u'a', 'name': u'x'},
+            {'$set': {'name': u'y'}})
+
+    def should_discard_updated_document(self):
+        assert self.MyDoc.cache.get((1, u'a')) is None
+
+    def should_keep_other_documents(self):
+        assert self.MyDoc.cache.get((2, u'b')) is not None
+
+
+class WhenUpdatingManyDocumentsWithCache(BaseCachedWriteTest):
+
+    def setup(self):
+        BaseCachedWriteTest.setup(self)
+        self.MyDoc.update(
+            {'owner': u'a'}, {'$set': {'name': u'y'}}, multi=True)
+
+    def should_clear_cache(self):
+        assert len(self.MyDoc.cache) == 0
+
+
+class WhenRemovingCachedDocument(BaseCachedWriteTest):
+
+    def setup(self):
+        BaseCachedWriteTest.setup(self)
+        self.MyDoc.remove(self.spec)
+
+    def should_discard_removed_document(self):
+        assert self.MyDoc.cache.get((1, u'a')) is None
+        assert self.MyDoc.cache.get((2, u'b')) is not None
+
+
+class WhenFindingAndModifyingCachedDocument(BaseCachedWriteTest):
+
+    def setup(self):
+        BaseCachedWriteTest.setup(self)
+        self.MyDoc.find_and_modify(self.spec, {'$set': {'name': u'y'}})
+
+    def should_discard_modified_document(self):
+        assert self.MyDoc.cache.get((1, u'a')) is None
+        assert self.MyDoc.cache.get((2, u'b')) is not None
+
+
+class DescribeCacheKey(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'owner': basestring}
+            indexes = [{'fields': ['owner'], 'shard_key': True}]
+            abstract = True
+        self.MyDoc = MyDoc
+
+    def should_use_id_and_shard_key(self):
+        assert self.MyDoc._cache_key({'owner': u'a', '_id': 1}) == (1, u'a')
+
+    def should_reject_missing_fields(self):
+        assert self.MyDoc._cache_key({'_id': 1}) is None
+
+    def should_reject_extra_fields_when_exact(self):
+        assert self.MyDoc._cache_key(
+            {'_id': 1, 'owner': u'a', 'x': 1}) is None
+
+    def should_allow_extra_fields_when_not_exact(self):
+        assert self.MyDoc._cache_key(
+            {'_id': 1, 'owner': u'a', 'x': 1}, exact=False) == (1, u'a')
+
+    def should_reject_operators(self):
+        assert self.MyDoc._cache_key(
+            {'_id': {'$in': [1, 2]}, 'owner': u'a'}) is None
+
+    def should_reject_regular_expressions(self):
+        import re
+        assert self.MyDoc._cache_key(
+            {'_id': 1, 'owner': re.compile('a')}) is None
+
+    def should_reject_empty_specs(self):
+        assert self.MyDoc._cache_key(None) is None
+
+
+class WhenFindingCacheKeyOfDocumentShardedById(object):
+
+    def setup(self):
+        class MyDoc(Document):
+            structure = {'owner': basestring}
+            indexes = [{'fields': [('_id', 1)], 'shard_key': True}]
+            abstract = True
+        self.MyDoc = MyDoc
+
+    def should_use_id_once(self):
+        assert self.MyDoc._cache_key({'_id': 1}) == (1,)
+
+
+class FakeShardedCollection(object):
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def find(self, spec):
+        with self.lock:
+            self.queries.append(spec)
+        ids = spec['_id']
+        ids = ids['$in'] if isinstance(ids, dict) else [ids]
+        return iter([doc for doc in self.documents
+                     if doc['_id'] in ids and doc['org'] == spec['org']])
+
+
+class BaseFindManyByKeys(object):
+
+    def setup(self):
+        self.collection = FakeShardedCollection([
+            {'_id': 1, 'org': u'a'},
+            {'_id': 2, 'org': u'a'},
+            {'_id': 3, 'org': u'a'},
+            {'_id': 4, 'org': u'b'},
+        ])
+
+        class MyDoc(Document):
+            structure = {'org': basestring}
+            indexes = [{'fields': ['org'], 'shard_key': True}]
+            abstract = True
+            collection = self.collection
+        self.MyDoc = MyDoc
+
+
+class WhenFindingManyByKeys(BaseFindManyByKeys):
+
+    def setup(self):
+        BaseFindManyByKeys.setup(self)
+        self.returned = self.MyDoc.find_many_by_keys([
+            {'org': u'b', '_id': 4},
+            {'org': u'a', '_id': 1},
+            {'org': u'a', '_id': 9},
+            {'org': u'a', '_id': 3},
+            {'org': u'a', '_id': 1},
+            {'org': u'a', '_id': 2},
+        ], chunk_size=2)
+
+    def should_return_documents_in_input_order(self):
+        assert self.returned == [
+            {'_id': 4, 'org': u'b'},
+            {'_id': 1, 'org': u'a'},
+            None,
+            {'_id': 3, 'org': u'a'},
+            {'_id': 1, 'org': u'a'},
+            {'_id': 2, 'org': u'a'},
+        ]
+
+    def should_return_instances(self):
+        assert isinstance(self.returned[0], self.MyDoc)
+        assert self.returned[1] is not self.returned[4]
+
+    def should_query_chunks_per_shard_key_value(self):
+        queries = self.collection.queries
+        assert len(queries) == 3
+        assert {'org': u'b', '_id': 4} in queries
+        assert {'org': u'a', '_id': {'$in': [1, 9]}} in queries
+        assert {'org': u'a', '_id': {'$in': [3, 2]}} in queries
+
+
+class WhenFindingManyByKeysSerially(BaseFindManyByKeys):
+
+    def setup(self):
+        BaseFindManyByKeys.setup(self)
+        self.returned = self.MyDoc.find_many_by_keys(
+            [{'org': u'a', '_id': 1}, {'org': u'b', '_id': 4}],
+            max_workers=1)
+
+    def should_return_documents(self):
+        assert self.returned == [
+            {'_id': 1, 'org': u'a'}, {'_id': 4, 'org': u'b'}]
+
+
+class WhenFindingManyByIncompleteKeys(BaseFindManyByKeys):
+
+    def should_require_shard_key(self):
+        assert_raises(
+            GlobalQueryException, self.MyDoc.find_many_by_keys, [{'_id': 1}])
+
+    def should_require_id(self):
+        assert_raises(
+            GlobalQueryException, self.MyDoc.find_many_by_keys,
+            [{'org': u'a'}])
+
+    def should_reject_operators(self):
+        assert_raises(
+            GlobalQueryException, self.MyDoc.find_many_by_keys,
+            [{'org': {'$in': [u'a', u'b']}, '_id': 1}])
+
+
+def _matches(document, spec):
+    for field, condition in spec.iteritems():
+        if field == '$and':
+            if not all(_matches(document, part) for part in condition):
+                return False
+            continue
+        if field == '$or':
+            if not any(_matches(document, part) for part in condition):
+                return False
+            continue
+        value = document.get(field)
+        if isinstance(condition, dict):
+            # Like the server, ranges never match missing or null values.
+            if value is None:
+                return False
+            if '$gte' in condition and not value >= condition['$gte']:
+                return False
+            if '$lt' in condition and not value < condition['$lt']:
+                return False
+            if '$gt' in condition and not value > condition['$gt']:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeScanCursor(object):
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.iterator = None
+
+    def sort(self, field, direction=1):
+        if isinstance(field, list):
+            cursor = self
+            for key, direction in reversed(field):
+                cursor = cursor.sort(key, direction)
+            return cursor
+        return FakeScanCursor(sorted(
+            self.documents, key=lambda doc: doc.get(field),
+            reverse=direction < 0))
+
+    def limit(self, limit):
+        return FakeScanCursor(self.documents[:limit])
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self.iterator is None:
+            self.iterator = iter(self.documents)
+        return self.iterator.next()
+
+    def close(self):
+        pass
+
+
+class FakeScanCollection(object):
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, spec=None, fields=None, sort=None):
+        self.queries.append(spec)
+        found = [doc for doc in self.documents
+                 if _matches(doc, spec or {})]
+        cursor = FakeScanCursor(found)
+        for field, direction in reversed(sort or []):
+            cursor = cursor.sort(field, direction)
+        return cursor
+
+
+class BaseFindParallel(object):
+
+    def setup(self):
+        self.collection = FakeScanCollection(
+            [{'_id': i, 'kind': i % 3} for i in range(100)])
+
+        class MyDoc(Document):
+            structure = {'kind': int}
+            abstract = True
+            collection = self.collection
+        self.MyDoc = MyDoc
+
+
+class WhenFindingInParallel(BaseFindParallel):
+
+    def setup(self):
+        BaseFindParallel.setup(self)
+        with self.MyDoc.find_parallel(workers=4, batch_size=7) as cursor:
+            self.returned = list(cursor)
+
+    def should_return_every_document_once(self):
+        assert sorted(doc['_id'] for doc in self.returned) == range(100)
+
+    def should_return_instances(self):
+        assert all(isinstance(doc, self.MyDoc) for doc in self.returned)
+
+    def should_query_disjoint_ranges(self):
+        range_queries = self.collection.queries[2:]
+        assert range_queries == [
+            {'_id': {'$lt': 24}},
+            {'_id': {'$gte': 24, '$lt': 49}},
+            {'_id': {'$gte': 49, '$lt': 74}},
+            {'_id': {'$gte': 74}},
+            {'_id': None},
+        ]
+
+
+class WhenFindingInParallelWithSpecAndSort(BaseFindParallel):
+
+    def setup(self):
+        BaseFindParallel.setup(self)
+        cursor = self.MyDoc.find_parallel(
+            {'kind': 1}, boundaries=[50], sort=[('_id', -1)])
+        self.returned = list(cursor)
+
+    def should_combine_spec_with_ranges(self):
+        assert self.collection.queries == [
+            {'$and': [{'kind': 1}, {'_id': {'$lt': 50}}]},
+            {'$and': [{'kind': 1}, {'_id': {'$gte': 50}}]},
+            {'$and': [{'kind': 1}, {'_id': None}]},
+        ]
+
+    def should_merge_results_in_order(self):
+        assert [doc['_id'] for doc in self.returned] == range(97, 0, -3)
+
+
+class WhenFindingInParallelWithMissingValues(BaseFindParallel):
+
+    def setup(self):
+        BaseFindParallel.setup(self)
+        self.collection.documents.extend(
+            [{'_id': 100}, {'_id': 101, 'kind': None}])
+        cursor = self.MyDoc.find_parallel(
+            field='kind', boundaries=[1], sort=[('kind', 1)])
+        self.returned = list(cursor)
+
+    def should_return_every_document_once(self):
+        assert sorted(doc['_id'] for doc in self.returned) == range(102)
+
+    def should_query_missing_values_separately(self):
+        assert self.collection.queries[-1] == {'kind': None}
+
+    def should_merge_missing_values_first(self):
+        assert sorted(doc['_id'] for doc in self.returned[:2]) == [100, 101]
+
+
+class WhenFindingInParallelOnEmptyCollection(BaseFindParallel):
+
+    def setup(self):
+        BaseFindParallel.setup(self)
+        self.collection.documents = []
+        self.returned = list(self.MyDoc.find_parallel())
+
+    def should_use_single_range(self):
+        assert self.collection.queries[-1] is None
+
+    def should_return_nothing(self):
+        assert self.returned == []
+
+
+class DescribeSplitRange(object):
+
+    def should_split_integers(self):
+        assert mod._split_range(0, 100, 4) == [25, 50, 75]
+
+    def should_split_floats(self):
+        assert mod._split_range(0.0, 1.0, 2) == [0.5]
+
+    def should_split_dates(self):
+        from datetime import datetime
+        assert mod._split_range(
+            datetime(2012, 1, 1), datetime(2012, 1, 3), 2) == [
+                datetime(2012, 1, 2)]
+
+    def should_split_object_ids(self):
+        from datetime import datetime
+        from bson import ObjectId
+        low = ObjectId.from_datetime(datetime(2012, 1, 1))
+        high = ObjectId.from_datetime(datetime(2012, 1, 3))
+        assert mod._split_range(low, high, 2) == [
+            ObjectId.from_datetime(datetime(2012, 1, 2))]
+
+    def should_not_split_other_types(self):
+        assert mod._split_range(u'a', u'z', 4) == []
+
+    def should_drop_duplicate_points(self):
+        assert mod._split_range(0, 2, 4) == [1]
+
+
+####
+##
+## Document.paginate
+##
+####
+
+class BasePaginate(object):
+
+    def setup(self):
+        self.collection = FakeScanCollection(
+            [{'_id': i, 'org': i % 2, 'rank': i // 4} for i in range(10)])
+
+        class MyDoc(Document):
+            structure = {'org': int, 'rank': int}
+            indexes = [
+                {'fields': ['org'], 'shard_key': True},
+                {'fields': ['org', 'rank', '_id']},
+            ]
+            abstract = True
+            collection = self.collection
+        self.MyDoc = MyDoc
+
+    def pages(self, spec, order_by, page_size, **kwargs):
+        pages = [self.MyDoc.paginate(spec, order_by, page_size, **kwargs)]
+        while pages[-1].next_token is not None:
+            pages.append(self.MyDoc.paginate(
+                spec, order_by, page_size, after=pages[-1].next_token,
+                **kwargs))
+        return pages
+
+
+class WhenPaginating(BasePaginate):
+
+    def setup(self):
+        BasePaginate.setup(self)
+        self.pages = self.pages({'org': 0}, ['org', 'rank'], 2)
+
+    def should_return_every_document_in_order(self):
+        assert [[doc['_id'] for doc in page] for page in self.pages] == [
+            [0, 2], [4, 6], [8]]
+
+    def should_return_instances(self):
+        assert isinstance(self.pages[0].documents[0], self.MyDoc)
+
+    def should_not_return_token_for_last_page(self):
+        assert self.pages[-1].next_token is None
+
+    def should_seek_past_previous_page(self):
+        assert self.collection.queries[1] == {'$and': [
+            {'org': 0},
+            {'$or': [
+                {'org': {'$gt': 0}},
+                {'org': 0, 'rank': {'$gt': 0}},
+                {'org': 0, 'rank': 0, '_id': {'$gt': 2}},
+            ]},
+        ]}
+
+
+class WhenPaginatingDescendingById(BasePaginate):
+
+    def setup(self):
+        BasePaginate.setup(self)
+        self.pages = self.pages(None, [('_id', -1)], 4, allow_global=True)
+
+    def should_return_every_document_in_order(self):
+        assert [[doc['_id'] for doc in page] for page in self.pages] == [
+            [9, 8, 7, 6], [5, 4, 3, 2], [1, 0]]
+
+    def should_seek_with_single_condition(self):
+        assert self.collection.queries[1] == {'_id': {'$lt': 6}}
+
+
+class WhenPaginatingWithExactlyFullLastPage(BasePaginate):
+
+    def setup(self):
+        BasePaginate.setup(self)
+        self.pages = self.pages({'org': 1}, ['org', 'rank'], 5)
+
+    def should_not_return_empty_page(self):
+        assert len(self.pages) == 1
+        assert len(self.pages[0]) == 5
+
+
+class DescribePaginate(BasePaginate):
+
+    def should_check_query_sharding(self):
+        assert_raises(
+            GlobalQueryException, self.MyDoc.paginate, {}, ['org'])
+
+    def should_reject_unindexed_order(self):
+        assert_raises(
+            UnindexedSortException, self.MyDoc.paginate, {'org': 0},
+            ['rank'])
+
+    def should_reject_order_skipping_index_fields(self):
+        assert_raises(
+            UnindexedSortException, self.MyDoc.paginate, {'org': 0},
+            ['org'])
+
+    def should_reject_mixed_directions(self):
+        assert_raises(
+            UnindexedSortException, self.MyDoc.paginate, {'org': 0},
+            [('org', 1), ('rank', -1)])
+
+    def should_reject_token_for_other_order(self):
+        token = self.MyDoc.paginate(
+            {'org': 0}, ['org', 'rank'], 1).next_token
+        assert_raises(
+            ValueError, self.MyDoc.paginate, {'org': 0}, [('_id', -1)],
+            after=token)
+
+    def should_reject_malformed_token(self):
+        assert_raises(
+            ValueError, self.MyDoc.paginate, {'org': 0}, ['org', 'rank'],
+            after='not a token')
+
+
+class DescribeKeysetOrder(object):
+
+    def order(self, fields, order_by):
+        class MyDoc(Document):
+            structure = {'name': basestring, 'rank': int}
+            indexes = [{'fields': fields}]
+            abstract = True
+        return MyDoc._keyset_order(order_by)
+
+    def should_accept_index_of_field_names(self):
+        assert self.order(['name', '_id'], ['name']) == [
+            ('name', 1), ('_id', 1)]
+
+    def should_accept_index_of_field_and_direction_pairs(self):
+        assert self.order([('name', 1), ('_id', 1)], ['name']) == [
+            ('name', 1), ('_id', 1)]
+
+    def should_accept_index_of_field_and_direction_lists(self):
+        assert self.order([['name', 1], ['_id', 1]], [('name', 1)]) == [
+            ('name', 1), ('_id', 1)]
+
+    def should_accept_index_on_single_field_name(self):
+        assert self.order('_id', [('_id', -1)]) == [('_id', -1)]
+
+    def should_accept_index_scanned_in_reverse(self):
+        assert self.order(
+            [('name', 1), ('rank', -1), ('_id', 1)],
+            [('name', -1), ('rank', 1)]) == [
+                ('name', -1), ('rank', 1), ('_id', -1)]
+
+    def should_take_id_direction_from_index(self):
+        assert self.order(
+            [('name', 1), ('_id', -1)], ['name']) == [
+                ('name', 1), ('_id', -1)]
+
+    def should_reject_directions_not_matching_index(self):
+        assert_raises(
+            UnindexedSortException, self.order,
+            [('name', 1), ('rank', -1), ('_id', 1)],
+            [('name', 1), ('rank', 1)])
+
+    def should_reject_index_without_id_after_order(self):
+        assert_raises(
+            UnindexedSortException, self.order,
+            [('name', 1), ('rank', 1)], ['name'])
+
+    def should_order_by_id_without_index(self):
+        assert self.order([('name', 1)], None) == [('_id', 1)]
+
+
 class BaseFind(BaseDocumentSubclassTest):
 
     def setup(self):
@@ -647,6 +2075,81 @@ class WhenFindingAndAllowingGlobal(BaseFind):
         assert not self.MyDoc.check_query_sharding.calls('()')
 
 
+class WhenFindingLazily(BaseFindWithoutGlobalQuery):
+
+    def setup(self):
+        BaseFindWithoutGlobalQuery.setup(self)
+        self.MyDoc._raw_collection = Dingus('_raw_collection')
+        self.MyDoc.lazy_class = Dingus('lazy_class')
+        self.spec = Dingus()
+
+        self.returned = self.MyDoc.find(self.spec, lazy=True, foo=1)
+
+    def should_find_on_raw_collection(self):
+        assert self.MyDoc._raw_collection().calls('find', self.spec, foo=1)
+
+    def should_return_wrapped_Cursor(self):
+        assert self.returned is mod.Cursor(
+            self.MyDoc._raw_collection().find(), self.MyDoc.lazy_class())
+
+
+class WhenFindingOneLazily(BaseFindOneWithoutGlobalQuery):
+
+    def setup(self):
+        BaseFindOneWithoutGlobalQuery.setup(self)
+        self.MyDoc._raw_collection = Dingus('_raw_collection')
+        self.MyDoc.lazy_class = Dingus('lazy_class')
+        self.spec = Dingus()
+
+        self.returned = self.MyDoc.find_one(self.spec, lazy=True)
+
+    def should_find_one_on_raw_collection(self):
+        assert self.MyDoc._raw_collection().calls('find_one', self.spec)
+
+    def should_return_lazy_document(self):
+        assert self.returned is self.MyDoc.lazy_class()(
+            self.MyDoc._raw_collection().find_one())
+
+
+class DescribeLazyClass(BaseDocumentSubclassTest):
+
+    def setup(self):
+        BaseDocumentSubclassTest.setup(self)
+        self.returned = self.MyDoc.lazy_class()
+
+    def should_subclass_document_class(self):
+        assert issubclass(self.returned, self.MyDoc)
+
+    def should_mix_in_lazy_decoding(self):
+        assert issubclass(self.returned, mod.LazyDocumentMixin)
+
+    def should_reuse_class(self):
+        assert self.MyDoc.lazy_class() is self.returned
+
+    def should_not_register_class(self):
+        assert self.returned not in get_concrete_classes()
+
+    def should_not_share_class_with_subclasses(self):
+        class SubDoc(self.MyDoc):
+            pass
+        assert SubDoc.lazy_class() is not self.returned
+
+
+class WhenDriverLacksRawBSON(BaseDocumentSubclassTest):
+
+    def setup(self):
+        BaseDocumentSubclassTest.setup(self)
+        self.old_RawBSONDocument = mod.RawBSONDocument
+        mod.RawBSONDocument = None
+
+    def teardown(self):
+        mod.RawBSONDocument = self.old_RawBSONDocument
+
+    def should_raise_ImportError(self):
+        assert_raises(
+            ImportError, self.MyDoc.find, {}, allow_global=True, lazy=True)
+
+
 ## Document.find_and_modify ##
 
 
@@ -878,6 +2381,9 @@ class WhenMakingFullDocumentUpdate(BaseUpdate):
         self.returned = self.MyDoc.update(
             self.spec, self.document, allow_global=True, **self.kwargs)
 
+    def teardown(self):
+        reload(mod)
+
     def should_validate_new_value(self):
         assert self.MyDoc.validate.calls('()')
 
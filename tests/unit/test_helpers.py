@@ -1,7 +1,12 @@
+import copy
+import json
+
+from bson import BSON
 from dingus import Dingus
 from nose.tools import assert_raises
 
 from scalymongo.helpers import *
+import scalymongo.helpers as helpers
 
 
 ## is_update_modifier ##
@@ -146,6 +151,342 @@ class WhenGettingAnEmbeddedDict(object):
     def should_return_conversion_dict_with_conversions_for_a(self):
         assert self.returned._conversions == self.conversions['a']
 
+class WhenGettingAListOfEmbeddedDicts(object):
+
+    def setup(self):
+        self.content = {'a': [{'b': Dingus('value')}]}
+        self.conversions = {'a': {'b': Dingus('conversion')}}
+        self.conversion_dict = ConversionDict(self.content, self.conversions)
+        self.returned = self.conversion_dict.a
+
+    def should_return_list_of_conversion_dicts(self):
+        assert len(self.returned) == 1
+        assert isinstance(self.returned[0], ConversionDict)
+        assert self.returned[0]._conversions == self.conversions['a']
+
+class WhenGettingConvertedItemRepeatedly(BaseConversionDictTest):
+
+    def setup(self):
+        BaseConversionDictTest.setup(self)
+
+        self.returned = [self.conversion_dict.x for _ in range(3)]
+
+    def should_convert_only_once(self):
+        assert self.x_conversion.calls('()').once()
+
+    def should_return_same_object(self):
+        assert self.returned[0] is self.returned[1] is self.returned[2]
+
+
+class WhenGettingConvertedItemAfterAssignment(BaseConversionDictTest):
+
+    def setup(self):
+        BaseConversionDictTest.setup(self)
+        self.conversion_dict.x
+        self.new_value = Dingus('new_value')
+        self.conversion_dict['x'] = self.new_value
+
+        self.returned = self.conversion_dict.x
+
+    def should_convert_new_value(self):
+        assert self.x_conversion.calls('()', self.new_value).once()
+
+
+class WhenGettingEmbeddedDictRepeatedly(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict(
+            {'a': {'b': 1}}, {'a': {}})
+        self.first = self.conversion_dict.a
+        self.first.b = 2
+
+        self.returned = self.conversion_dict.a
+
+    def should_return_same_wrapper(self):
+        assert self.returned is self.first
+
+    def should_keep_changes_made_through_wrapper(self):
+        assert dict.__getitem__(self.conversion_dict, 'a') == {'b': 2}
+
+
+class WhenReplacingEmbeddedDict(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict(
+            {'a': {'b': 1}}, {'a': {}})
+        self.stale = self.conversion_dict.a
+        self.conversion_dict['a'] = {'b': 3}
+        self.stale.b = 2
+
+    def should_not_write_stale_wrapper_back(self):
+        assert self.conversion_dict['a'] == {'b': 3}
+
+
+class WhenGettingConvertedList(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict(
+            {'a': [{'b': 1}, {'b': 2}]}, {'a': {'b': int}})
+        self.first = self.conversion_dict.a
+        self.first[0].b = 5
+
+        self.returned = self.conversion_dict.a
+
+    def should_return_same_list(self):
+        assert self.returned is self.first
+
+    def should_record_change_to_element(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset([
+            ('a', 0, 'b')])
+
+    def should_keep_changes_made_to_elements(self):
+        assert dict.__getitem__(self.conversion_dict, 'a')[0] == {'b': 5}
+
+class WhenConvertingNone(object):
+
+    def setup(self):
+        self.conversion = Dingus('conversion')
+        self.conversion_dict = ConversionDict(
+            {'a': None, 'b': None, 'c': None, 'd': 'x'},
+            {'a': {'e': int}, 'b': self.conversion, 'c': {}, 'd': {}})
+
+    def should_return_none_unchanged(self):
+        assert self.conversion_dict.a is None
+        assert self.conversion_dict.b is None
+        assert not self.conversion.calls('()')
+
+    def should_return_other_values_for_embedded_dicts_unchanged(self):
+        assert self.conversion_dict.d == 'x'
+
+    def should_list_items(self):
+        assert sorted(self.conversion_dict.items()) == [
+            ('a', None), ('b', None), ('c', None), ('d', 'x')]
+
+    def should_keep_none_array_elements(self):
+        conversion_list = ConversionList([None, {'e': 1}], {})
+        assert list(conversion_list) == [None, {'e': 1}]
+
+
+class WhenSettingAttributes(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict({}, None)
+        self.conversion_dict.values = Dingus('values')
+        self.conversion_dict.foo = 1
+        self.conversion_dict._conversions = {'foo': int}
+
+    def should_set_class_attribute_names_on_instance(self):
+        assert 'values' not in self.conversion_dict
+        assert isinstance(self.conversion_dict.values, Dingus)
+
+    def should_set_nonkey_attributes_on_instance(self):
+        assert '_conversions' not in self.conversion_dict
+
+    def should_set_other_names_as_keys(self):
+        assert self.conversion_dict == {'foo': 1}
+
+
+class DescribeConversionDictAttributeNames(object):
+
+    def should_include_all_class_attributes(self):
+        assert ConversionDict._attribute_names == frozenset(
+            dir(ConversionDict))
+
+####
+## ConversionList
+####
+
+class BaseConversionListTest(object):
+
+    def setup(self):
+        self.values = [{'b': 1}, {'b': 2}, {'b': 3}]
+        self.conversion = Dingus('conversion')
+        self.conversion_list = ConversionList(self.values, self.conversion)
+
+
+class WhenTakingLengthAndSlicesOfConversionList(BaseConversionListTest):
+
+    def setup(self):
+        BaseConversionListTest.setup(self)
+
+        self.length = len(self.conversion_list)
+        self.sliced = self.conversion_list[1:]
+
+    def should_return_length(self):
+        assert self.length == 3
+
+    def should_return_conversion_list_of_slice(self):
+        assert isinstance(self.sliced, ConversionList)
+        assert self.sliced == self.values[1:]
+
+    def should_not_convert_anything(self):
+        assert not self.conversion.calls('()')
+
+
+class WhenIndexingConversionList(BaseConversionListTest):
+
+    def setup(self):
+        BaseConversionListTest.setup(self)
+
+        self.first = self.conversion_list[1]
+        self.second = self.conversion_list[-2]
+
+    def should_convert_only_indexed_element_once(self):
+        assert self.conversion.calls('()').once()
+        assert self.conversion.calls('()', self.values[1])
+
+    def should_return_cached_value(self):
+        assert self.first is self.second is self.conversion()
+
+
+class WhenIndexingLargeConversionListFirstTime(object):
+
+    def setup(self):
+        self.unwrap = Dingus('_unwrap')
+        self.original_unwrap = helpers._unwrap
+        helpers._unwrap = self.unwrap
+        self.values = [{'b': i} for i in range(1000)]
+        self.conversion = Dingus('conversion')
+
+        self.conversion_list = ConversionList(self.values, self.conversion)
+        self.returned = self.conversion_list[500]
+
+    def teardown(self):
+        helpers._unwrap = self.original_unwrap
+
+    def should_not_unwrap_elements(self):
+        assert not self.unwrap.calls('()')
+
+    def should_convert_only_indexed_element(self):
+        assert self.conversion.calls('()').once()
+        assert self.conversion.calls('()', self.values[500])
+
+
+class WhenCopyingConversionListWithAdoptedElements(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict(
+            {'a': [[1], [2]]}, {'a': [int]})
+        self.conversion_dict.a[0].append(3)
+
+        self.copied = ConversionList(self.conversion_dict.a, [int])
+
+    def should_store_plain_lists(self):
+        assert [type(value) for value in list.__iter__(self.copied)] == [
+            list, list]
+        assert self.copied == [[1, 3], [2]]
+
+
+class WhenIteratingConversionList(BaseConversionListTest):
+
+    def setup(self):
+        BaseConversionListTest.setup(self)
+
+        self.returned = list(self.conversion_list)
+
+    def should_convert_each_element(self):
+        assert len(self.conversion.calls('()')) == 3
+
+
+class WhenChangingConversionListInDocument(object):
+
+    def setup(self):
+        self.values = [{'b': 1}, {'b': 2}]
+        self.conversion_dict = ConversionDict(
+            {'a': self.values}, {'a': {'b': int}})
+        self.first = self.conversion_dict.a[0]
+        self.conversion_dict.a.insert(0, {'b': 0})
+        self.conversion_dict.a[2] = {'b': 5}
+
+    def should_write_to_dict(self):
+        assert dict.__getitem__(self.conversion_dict, 'a') == [
+            {'b': 0}, {'b': 1}, {'b': 5}]
+
+    def should_not_change_original_list(self):
+        assert self.values == [{'b': 1}, {'b': 2}]
+
+    def should_record_whole_array_as_dirty(self):
+        assert ('a',) in self.conversion_dict.get_dirty_paths()
+
+    def should_unlink_elements_after_indexes_shift(self):
+        self.first.b = 10
+        assert dict.__getitem__(self.conversion_dict, 'a')[1] == {'b': 1}
+
+
+class WhenAddingToConversionListAttribute(object):
+
+    def setup(self):
+        self.values = [{'b': 1}]
+        self.conversion_dict = ConversionDict(
+            {'a': self.values}, {'a': {'b': int}})
+
+        self.conversion_dict.a += [{'b': 2}]
+
+    def should_store_plain_list_in_dict(self):
+        stored = dict.__getitem__(self.conversion_dict, 'a')
+        assert type(stored) is list
+        assert stored == [{'b': 1}, {'b': 2}]
+
+
+class DescribeConversionListCompatibility(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict(
+            {'a': [{'b': 2}, {'b': 1}]}, {'a': {'b': int}})
+        self.conversion_list = self.conversion_dict.a
+
+    def should_be_a_list(self):
+        assert isinstance(self.conversion_list, list)
+
+    def should_add_to_lists(self):
+        added = self.conversion_list + [{'b': 3}]
+        assert type(added) is list
+        assert added == [{'b': 2}, {'b': 1}, {'b': 3}]
+        assert isinstance(added[0], ConversionDict)
+        assert [{'b': 0}] + self.conversion_list == [
+            {'b': 0}, {'b': 2}, {'b': 1}]
+
+    def should_sort_converted_elements(self):
+        self.conversion_list.sort(key=lambda element: element.b)
+        assert dict.__getitem__(self.conversion_dict, 'a') == [
+            {'b': 1}, {'b': 2}]
+        assert ('a',) in self.conversion_dict.get_dirty_paths()
+
+    def should_reverse(self):
+        self.conversion_list.reverse()
+        assert self.conversion_list == [{'b': 1}, {'b': 2}]
+        assert list(reversed(self.conversion_list)) == [{'b': 2}, {'b': 1}]
+
+    def should_pop_converted_element(self):
+        popped = self.conversion_list.pop()
+        assert isinstance(popped, ConversionDict)
+        assert popped == {'b': 1}
+        assert dict.__getitem__(self.conversion_dict, 'a') == [{'b': 2}]
+
+    def should_find_elements(self):
+        assert {'b': 1} in self.conversion_list
+        assert self.conversion_list.index({'b': 1}) == 1
+        assert self.conversion_list.count({'b': 2}) == 1
+
+    def should_slice_without_getslice_fallback(self):
+        assert isinstance(self.conversion_list[:1], ConversionList)
+        assert isinstance(self.conversion_list[:1][0], ConversionDict)
+
+    def should_encode_to_json(self):
+        self.conversion_list[0].b = 5
+        assert json.loads(json.dumps(self.conversion_dict)) == {
+            'a': [{'b': 5}, {'b': 1}]}
+
+    def should_encode_to_bson(self):
+        self.conversion_list.append({'b': 3})
+        assert BSON.encode(self.conversion_dict).decode() == {
+            'a': [{'b': 2}, {'b': 1}, {'b': 3}]}
+
+    def should_copy_as_plain_list(self):
+        copied = copy.deepcopy(self.conversion_list)
+        assert type(copied) is list
+        assert copied == [{'b': 2}, {'b': 1}]
+
 ####
 ## ConversionDict.iteritems
 ## ConversionDict.items
@@ -253,3 +594,127 @@ class DescribeDotExpandDict(object):
             },
             'd': 3,
         }
+
+
+####
+##
+## ConversionDict dirty tracking
+##
+####
+
+class BaseDirtyTrackingTest(object):
+
+    def setup(self):
+        self.conversion_dict = ConversionDict(
+            {'a': {'b': 1, 'c': 2}, 'd': 3, 'e': 4},
+            {'a': {'b': None}},
+        )
+
+
+class WhenConversionDictIsNew(BaseDirtyTrackingTest):
+
+    def should_have_no_dirty_paths(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset()
+
+
+class WhenMutatingTopLevelKeys(BaseDirtyTrackingTest):
+
+    def setup(self):
+        BaseDirtyTrackingTest.setup(self)
+        self.conversion_dict['d'] = 5
+        self.conversion_dict.f = 6
+        del self.conversion_dict['e']
+        self.conversion_dict.setdefault('d', 7)
+        self.conversion_dict.setdefault('g', 8)
+        self.conversion_dict.update(h=9)
+
+    def should_record_changed_keys(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset([
+            ('d',), ('e',), ('f',), ('g',), ('h',)])
+
+
+class WhenMutatingEmbeddedConversionDict(BaseDirtyTrackingTest):
+
+    def setup(self):
+        BaseDirtyTrackingTest.setup(self)
+        self.conversion_dict.a.c = 10
+
+    def should_record_nested_path(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset([
+            ('a', 'c')])
+
+    def should_write_change_back_to_parent(self):
+        assert self.conversion_dict['a'] == {'b': 1, 'c': 10}
+
+
+class WhenClearingConversionDict(BaseDirtyTrackingTest):
+
+    def setup(self):
+        BaseDirtyTrackingTest.setup(self)
+        self.conversion_dict.clear()
+
+    def should_record_all_removed_keys(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset([
+            ('a',), ('d',), ('e',)])
+
+
+class WhenMarkingConversionDictClean(BaseDirtyTrackingTest):
+
+    def setup(self):
+        BaseDirtyTrackingTest.setup(self)
+        self.conversion_dict['d'] = 5
+        self.conversion_dict.mark_clean()
+
+    def should_forget_dirty_paths(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset()
+
+
+class WhenCopyingConversionDict(BaseDirtyTrackingTest):
+
+    def setup(self):
+        BaseDirtyTrackingTest.setup(self)
+        self.conversion_dict.a
+        self.copied = copy.copy(self.conversion_dict)
+        self.copied.a.c = 10
+        self.copied['d'] = 5
+
+    def should_not_share_converted_values(self):
+        assert (self.copied._converted_values
+                is not self.conversion_dict._converted_values)
+
+    def should_not_reparent_original_children(self):
+        assert self.conversion_dict.a._parent is self.conversion_dict
+
+    def should_leave_original_clean(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset()
+
+    def should_leave_original_values(self):
+        assert self.conversion_dict == {
+            'a': {'b': 1, 'c': 2}, 'd': 3, 'e': 4}
+
+    def should_track_changes_on_copy(self):
+        assert self.copied.get_dirty_paths() == frozenset([
+            ('a', 'c'), ('d',)])
+
+    def should_not_have_a_parent(self):
+        assert self.copied._parent is None
+
+
+class WhenDeepCopyingConversionDict(BaseDirtyTrackingTest):
+
+    def setup(self):
+        BaseDirtyTrackingTest.setup(self)
+        self.conversion_dict['d'] = 5
+        self.copied = copy.deepcopy(self.conversion_dict)
+        self.copied.a.c = 10
+
+    def should_copy_dirty_paths(self):
+        assert self.conversion_dict.get_dirty_paths() == frozenset([('d',)])
+        assert self.copied.get_dirty_paths() == frozenset([
+            ('a', 'c'), ('d',)])
+
+    def should_leave_original_values(self):
+        assert self.conversion_dict['a'] == {'b': 1, 'c': 2}
+
+    def should_keep_conversions(self):
+        assert isinstance(self.copied.a, ConversionDict)
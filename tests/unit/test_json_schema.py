@@ -0,0 +1,108 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from scalymongo.json_schema import *
+from scalymongo.schema_operators import IS, OR
+
+
+####
+##
+## field_schema
+##
+####
+
+class DescribeFieldSchema(object):
+
+    def should_accept_both_integer_types_for_int(self):
+        assert field_schema(int) == {'bsonType': ['int', 'long']}
+
+    def should_use_double_for_float(self):
+        assert field_schema(float) == {'bsonType': 'double'}
+
+    def should_use_bool_for_bool(self):
+        assert field_schema(bool) == {'bsonType': 'bool'}
+
+    def should_use_string_for_strings(self):
+        assert field_schema(basestring) == {'bsonType': 'string'}
+        assert field_schema(unicode) == {'bsonType': 'string'}
+
+    def should_use_date_for_datetime(self):
+        assert field_schema(datetime) == {'bsonType': 'date'}
+
+    def should_use_objectId_for_ObjectId(self):
+        assert field_schema(ObjectId) == {'bsonType': 'objectId'}
+
+    def should_not_restrict_unknown_types(self):
+        assert field_schema(object) == {}
+
+    def should_describe_array_elements(self):
+        assert field_schema([float]) == {
+            'bsonType': 'array', 'items': {'bsonType': 'double'}}
+
+    def should_use_enum_for_IS(self):
+        assert field_schema(IS(2, 1)) == {'enum': [1, 2]}
+
+    def should_merge_bson_types_of_OR(self):
+        schema = field_schema(OR(float, int))
+        assert sorted(schema['bsonType']) == ['double', 'int', 'long']
+
+    def should_use_anyOf_for_OR_of_complex_types(self):
+        schema = field_schema(OR(float, {'a': int}))
+        assert schema.keys() == ['anyOf']
+        assert {'bsonType': 'double'} in schema['anyOf']
+
+    def should_not_restrict_OR_including_unknown_type(self):
+        assert field_schema(OR(float, object)) == {}
+
+    def should_describe_embedded_documents(self):
+        assert field_schema({'a': int}) == {
+            'bsonType': 'object',
+            'properties': {'a': {'bsonType': ['int', 'long']}},
+            'additionalProperties': False,
+        }
+
+    def should_describe_type_keys_as_additional_properties(self):
+        assert field_schema({basestring: float, 'a': int}) == {
+            'bsonType': 'object',
+            'properties': {'a': {'bsonType': ['int', 'long']}},
+            'additionalProperties': {'bsonType': 'double'},
+        }
+
+
+####
+##
+## make_json_schema
+##
+####
+
+class WhenMakingJsonSchema(object):
+
+    def setup(self):
+        self.returned = make_json_schema(
+            {'name': basestring, 'tags': [basestring]}, set(['name']))
+
+    def should_describe_fields(self):
+        assert self.returned['properties']['name'] == {'bsonType': 'string'}
+
+    def should_allow_id(self):
+        assert self.returned['properties']['_id'] == {}
+
+    def should_reject_undeclared_fields(self):
+        assert self.returned['additionalProperties'] is False
+
+    def should_require_required_fields(self):
+        assert self.returned['required'] == ['name']
+
+
+class WhenMakingJsonSchemaWithDeclaredId(object):
+
+    def setup(self):
+        self.returned = make_json_schema({'_id': ObjectId})
+
+    def should_keep_declared_id_type(self):
+        assert self.returned['properties']['_id'] == {
+            'bsonType': 'objectId'}
+
+    def should_not_require_anything(self):
+        assert 'required' not in self.returned
@@ -0,0 +1,287 @@
+from copy import deepcopy
+
+from bson import BSON
+from dingus import Dingus
+from nose.tools import assert_raises
+
+from scalymongo import Document
+from scalymongo.lazy import *
+from scalymongo.schema import SchemaDocument
+from scalymongo.validation import NEVER
+
+
+class BaseRawFieldsTest(object):
+
+    def setup(self):
+        self.data = BSON.encode({'a': 1, 'b': {'c': [1, 2]}, 'd': u'text'})
+        self.fields = RawFields(self.data)
+
+
+class DescribeRawFields(BaseRawFieldsTest):
+
+    def should_contain_fields(self):
+        assert 'b' in self.fields
+
+    def should_not_contain_missing_fields(self):
+        assert 'missing' not in self.fields
+
+    def should_list_keys(self):
+        assert sorted(self.fields.keys()) == ['a', 'b', 'd']
+
+    def should_have_length(self):
+        assert len(self.fields) == 3
+
+    def should_decode_single_field(self):
+        assert self.fields.pop('b') == {'c': [1, 2]}
+
+    def should_raise_KeyError_for_missing_field(self):
+        assert_raises(KeyError, self.fields.pop, 'missing')
+
+
+class WhenPoppingField(BaseRawFieldsTest):
+
+    def setup(self):
+        BaseRawFieldsTest.setup(self)
+        self.fields.pop('a')
+
+    def should_remove_field(self):
+        assert 'a' not in self.fields
+
+    def should_keep_other_fields(self):
+        assert sorted(self.fields.keys()) == ['b', 'd']
+
+
+class WhenDiscardingField(BaseRawFieldsTest):
+
+    def setup(self):
+        BaseRawFieldsTest.setup(self)
+        self.fields.discard('d')
+
+    def should_remove_field(self):
+        assert 'd' not in self.fields
+
+    def should_ignore_missing_fields(self):
+        self.fields.discard('missing')
+
+
+class WhenScanningAllElementTypes(object):
+
+    def setup(self):
+        import datetime
+        import re
+        from bson import Binary, Code, ObjectId, Timestamp
+        from bson.max_key import MaxKey
+        from bson.min_key import MinKey
+        self.content = {
+            'double': 1.5,
+            'string': u'value',
+            'document': {'x': 1},
+            'array': [1, u'two'],
+            'binary': Binary('\x00\x01', 5),
+            'object_id': ObjectId(),
+            'bool': True,
+            'date': datetime.datetime(2012, 1, 1),
+            'null': None,
+            'regex': re.compile('^a.*b$'),
+            'code': Code('return 1'),
+            'code_with_scope': Code('return x', {'x': 1}),
+            'int32': 5,
+            'timestamp': Timestamp(1, 2),
+            'int64': 2 ** 40,
+            'min_key': MinKey(),
+            'max_key': MaxKey(),
+            'last': u'end',
+        }
+        self.fields = RawFields(BSON.encode(self.content))
+
+    def should_find_last_field(self):
+        assert self.fields.pop('last') == u'end'
+
+    def should_index_every_field(self):
+        assert sorted(self.fields.keys()) == sorted(self.content)
+
+
+class MyDoc(Document):
+    structure = {
+        'a': int,
+        'b': {'c': [int]},
+        'd': basestring,
+        'e': int,
+    }
+    default_values = {'e': 7}
+    abstract = True
+
+
+class BaseLazyDocumentTest(object):
+
+    def setup(self):
+        self.content = {'a': 1, 'b': {'c': [1, 2]}, 'd': u'text'}
+        self.doc = MyDoc.lazy_class()(BSON.encode(self.content))
+
+
+class DescribeLazyDocument(BaseLazyDocumentTest):
+
+    def should_not_decode_fields_up_front(self):
+        assert dict.keys(self.doc) == ['e']
+
+    def should_decode_accessed_field(self):
+        assert self.doc['a'] == 1
+        assert dict.keys(self.doc) == ['e', 'a'] or \
+            sorted(dict.keys(self.doc)) == ['a', 'e']
+        assert 'd' not in dict.keys(self.doc)
+
+    def should_support_attribute_access(self):
+        assert self.doc.b.c == [1, 2]
+
+    def should_contain_undecoded_fields(self):
+        assert 'd' in self.doc
+
+    def should_not_contain_missing_fields(self):
+        assert 'missing' not in self.doc
+
+    def should_count_undecoded_fields(self):
+        assert len(self.doc) == 4
+
+    def should_get_undecoded_field(self):
+        assert self.doc.get('d') == u'text'
+
+    def should_apply_defaults(self):
+        assert self.doc['e'] == 7
+
+    def should_equal_decoded_content(self):
+        self.content['e'] = 7
+        assert self.doc == self.content
+
+    def should_list_all_keys(self):
+        assert sorted(self.doc.keys()) == ['a', 'b', 'd', 'e']
+
+    def should_validate(self):
+        self.doc.validate()
+
+    def should_only_mark_defaults_dirty(self):
+        assert self.doc.get_dirty_paths() == frozenset([('e',)])
+
+
+class WhenAssigningUndecodedField(BaseLazyDocumentTest):
+
+    def setup(self):
+        BaseLazyDocumentTest.setup(self)
+        self.doc['d'] = u'new'
+
+    def should_keep_new_value(self):
+        assert self.doc['d'] == u'new'
+
+    def should_keep_new_value_after_inflating(self):
+        self.doc.inflate()
+        assert dict.__getitem__(self.doc, 'd') == u'new'
+
+
+class WhenDeletingUndecodedField(BaseLazyDocumentTest):
+
+    def setup(self):
+        BaseLazyDocumentTest.setup(self)
+        del self.doc['d']
+
+    def should_remove_field(self):
+        assert 'd' not in self.doc
+
+    def should_record_change(self):
+        assert self.doc.get_changes()['$unset'] == {'d': 1}
+
+
+class WhenModifyingEmbeddedField(BaseLazyDocumentTest):
+
+    def setup(self):
+        BaseLazyDocumentTest.setup(self)
+        self.doc.mark_clean()
+        self.doc.b.c = [5, 2]
+
+    def should_record_change(self):
+        assert self.doc.get_changes() == {'$set': {'b.c': [5, 2]}}
+
+
+class WhenInflating(BaseLazyDocumentTest):
+
+    def setup(self):
+        BaseLazyDocumentTest.setup(self)
+        self.doc.inflate()
+
+    def should_decode_all_fields(self):
+        assert sorted(dict.keys(self.doc)) == ['a', 'b', 'd', 'e']
+
+    def should_be_idempotent(self):
+        self.doc.inflate()
+        assert len(self.doc) == 4
+
+
+class WhenUsingLazyDocumentAsDict(BaseLazyDocumentTest):
+
+    def setup(self):
+        BaseLazyDocumentTest.setup(self)
+        self.content['e'] = 7
+
+    def should_wrap_every_field(self):
+        assert dict.copy(MyDoc(self.doc)) == self.content
+
+    def should_wrap_every_field_in_batch(self):
+        assert dict.copy(MyDoc.wrap_many([self.doc])[0]) == self.content
+
+    def should_update_with_every_field(self):
+        doc = MyDoc()
+        # `Document.update` is a classmethod, as in `Document.reload`.
+        SchemaDocument.update(doc, self.doc)
+        assert dict.copy(doc) == self.content
+
+    def should_copy_every_field(self):
+        assert deepcopy(self.doc) == self.content
+        assert dict.copy(self.doc.copy()) == self.content
+
+    def should_encode_every_field_once_inflated(self):
+        assert BSON.encode(inflated(self.doc)).decode() == self.content
+
+    def should_leave_other_values_unchanged(self):
+        assert inflated(self.content) is self.content
+
+
+class BaseWritingLazyDocumentTest(BaseLazyDocumentTest):
+
+    def setup(self):
+        BaseLazyDocumentTest.setup(self)
+        self.content['e'] = 7
+        self.written = []
+        record = lambda document, *args, **kwargs: self.written.append(
+            BSON.encode(document).decode())
+        self.collection = Dingus(
+            'collection', save=record, update=lambda spec, document,
+            **kwargs: record(document))
+        self.bulk = Dingus('bulk', insert=record)
+        self.collection.initialize_ordered_bulk_op.return_value = self.bulk
+        self.Model = type('Model', (MyDoc,), {
+            'collection': self.collection, 'abstract': True})
+        self.doc = self.Model.lazy_class()(BSON.encode(self.content))
+
+
+class WhenSavingLazyDocument(BaseWritingLazyDocumentTest):
+
+    def should_save_every_field(self):
+        self.doc.save()
+        assert self.written == [self.content]
+
+
+class WhenInsertingLazyDocumentsWithoutValidation(
+        BaseWritingLazyDocumentTest):
+
+    def should_insert_every_field(self):
+        self.Model.insert_many([self.doc], validation=NEVER)
+        assert self.written == [self.content]
+
+    def should_insert_every_field_of_prepared_document(self):
+        self.Model.insert_prepared([self.doc])
+        assert self.written == [self.content]
+
+
+class WhenReplacingWithLazyDocument(BaseWritingLazyDocumentTest):
+
+    def should_replace_with_every_field(self):
+        self.Model.update({'a': 1}, self.doc, allow_global=True)
+        assert self.written == [self.content]
@@ -0,0 +1,194 @@
+from nose.tools import assert_raises
+
+from scalymongo.modifiers import *
+
+
+def apply(document, update):
+    check_local_update_modifier(update)
+    apply_update_modifier(document, update)
+    return document
+
+
+####
+##
+## apply_update_modifier
+##
+####
+
+class DescribeSet(object):
+
+    def should_set_field(self):
+        assert apply({'a': 1}, {'$set': {'a': 2}}) == {'a': 2}
+
+    def should_create_embedded_documents(self):
+        assert apply({}, {'$set': {'a.b.c': 1}}) == {'a': {'b': {'c': 1}}}
+
+    def should_set_array_element(self):
+        assert apply({'a': [1, 2]}, {'$set': {'a.1': 3}}) == {'a': [1, 3]}
+
+    def should_pad_array_with_nulls(self):
+        assert apply({'a': [1]}, {'$set': {'a.2': 3}}) == {
+            'a': [1, None, 3]}
+
+    def should_set_field_of_array_element(self):
+        assert apply({'a': [{'b': 1}]}, {'$set': {'a.0.b': 2}}) == {
+            'a': [{'b': 2}]}
+
+
+class DescribeUnset(object):
+
+    def should_remove_field(self):
+        assert apply({'a': 1, 'b': 2}, {'$unset': {'a': 1}}) == {'b': 2}
+
+    def should_remove_embedded_field(self):
+        assert apply({'a': {'b': 1, 'c': 2}}, {'$unset': {'a.b': 1}}) == {
+            'a': {'c': 2}}
+
+    def should_ignore_missing_field(self):
+        assert apply({'a': 1}, {'$unset': {'b.c': 1}}) == {'a': 1}
+
+    def should_leave_null_in_array(self):
+        assert apply({'a': [1, 2]}, {'$unset': {'a.0': 1}}) == {
+            'a': [None, 2]}
+
+
+class DescribeInc(object):
+
+    def should_increment_field(self):
+        assert apply({'a': 1}, {'$inc': {'a': 2}}) == {'a': 3}
+
+    def should_set_missing_field(self):
+        assert apply({}, {'$inc': {'a.b': -2}}) == {'a': {'b': -2}}
+
+
+class DescribePush(object):
+
+    def should_append_value(self):
+        assert apply({'a': [1]}, {'$push': {'a': 2}}) == {'a': [1, 2]}
+
+    def should_create_missing_array(self):
+        assert apply({}, {'$push': {'a': 1}}) == {'a': [1]}
+
+    def should_append_each_value(self):
+        assert apply({'a': [1]}, {'$push': {'a': {'$each': [2, 3]}}}) == {
+            'a': [1, 2, 3]}
+
+    def should_append_all_values(self):
+        assert apply({'a': [1]}, {'$pushAll': {'a': [1, 2]}}) == {
+            'a': [1, 1, 2]}
+
+
+class DescribeAddToSet(object):
+
+    def should_append_new_value(self):
+        assert apply({'a': [1]}, {'$addToSet': {'a': 2}}) == {'a': [1, 2]}
+
+    def should_not_append_existing_value(self):
+        assert apply({'a': [1]}, {'$addToSet': {'a': 1}}) == {'a': [1]}
+
+    def should_append_each_new_value(self):
+        update = {'$addToSet': {'a': {'$each': [1, 2, 2]}}}
+        assert apply({'a': [1]}, update) == {'a': [1, 2]}
+
+
+class DescribePop(object):
+
+    def should_remove_last_element(self):
+        assert apply({'a': [1, 2, 3]}, {'$pop': {'a': 1}}) == {'a': [1, 2]}
+
+    def should_remove_first_element(self):
+        assert apply({'a': [1, 2, 3]}, {'$pop': {'a': -1}}) == {'a': [2, 3]}
+
+    def should_ignore_empty_array(self):
+        assert apply({'a': []}, {'$pop': {'a': 1}}) == {'a': []}
+
+    def should_ignore_missing_array(self):
+        assert apply({}, {'$pop': {'a': 1}}) == {}
+
+
+class DescribePull(object):
+
+    def should_remove_equal_values(self):
+        assert apply({'a': [1, 2, 1]}, {'$pull': {'a': 1}}) == {'a': [2]}
+
+    def should_remove_matching_documents(self):
+        document = {'a': [{'b': 1, 'c': 1}, {'b': 2, 'c': 1}]}
+        assert apply(document, {'$pull': {'a': {'b': 1}}}) == {
+            'a': [{'b': 2, 'c': 1}]}
+
+    def should_remove_all_listed_values(self):
+        assert apply({'a': [1, 2, 3]}, {'$pullAll': {'a': [1, 3]}}) == {
+            'a': [2]}
+
+
+class DescribeRename(object):
+
+    def should_move_field(self):
+        assert apply({'a': 1}, {'$rename': {'a': 'b'}}) == {'b': 1}
+
+    def should_move_embedded_field(self):
+        assert apply({'a': {'b': 1}}, {'$rename': {'a.b': 'c.d'}}) == {
+            'a': {}, 'c': {'d': 1}}
+
+    def should_ignore_missing_field(self):
+        assert apply({'a': 1}, {'$rename': {'b': 'c'}}) == {'a': 1}
+
+
+####
+##
+## check_local_update_modifier
+##
+####
+
+class DescribeCheckLocalUpdateModifier(object):
+
+    def should_reject_unsupported_modifier(self):
+        assert_raises(
+            ValueError, check_local_update_modifier, {'$max': {'a': 1}})
+
+    def should_reject_positional_operator(self):
+        assert_raises(
+            ValueError, check_local_update_modifier, {'$set': {'a.$.b': 1}})
+
+    def should_reject_push_modifiers_other_than_each(self):
+        assert_raises(
+            ValueError, check_local_update_modifier,
+            {'$push': {'a': {'$each': [1], '$slice': -5}}})
+
+    def should_reject_pull_queries(self):
+        assert_raises(
+            ValueError, check_local_update_modifier,
+            {'$pull': {'a': {'$gte': 6}}})
+
+    def should_reject_nested_pull_queries(self):
+        assert_raises(
+            ValueError, check_local_update_modifier,
+            {'$pull': {'items': {'qty': {'$gt': 1}}}})
+        assert_raises(
+            ValueError, check_local_update_modifier,
+            {'$pull': {'items': {'tags': [{'$exists': True}]}}})
+
+    def should_reject_dotted_fields_in_pull_conditions(self):
+        assert_raises(
+            ValueError, check_local_update_modifier,
+            {'$pull': {'items': {'size.h': 1}}})
+
+    def should_accept_literal_pull_conditions(self):
+        check_local_update_modifier(
+            {'$pull': {'items': {'qty': 1, 'size': {'h': 2}}, 'tags': 'a'}})
+
+
+####
+##
+## modified_fields
+##
+####
+
+class DescribeModifiedFields(object):
+
+    def should_return_top_level_fields(self):
+        update = {'$set': {'a.b': 1, 'c': 2}, '$inc': {'d.0': 1}}
+        assert modified_fields(update) == set(['a', 'c', 'd'])
+
+    def should_include_rename_targets(self):
+        assert modified_fields({'$rename': {'a': 'b.c'}}) == set(['a', 'b'])
@@ -0,0 +1,210 @@
+from bson import BSON
+from bson.errors import InvalidDocument
+from dingus import Dingus, exception_raiser
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from scalymongo.document import BulkInsertResult, Document
+from scalymongo.errors import ValidationError
+from scalymongo.pipeline import *
+
+
+class ImportedDocument(Document):
+    structure = {'name': basestring, 'rank': int}
+    required_fields = set(['name'])
+    default_values = {'rank': 0}
+    abstract = True
+
+
+def raw_documents(count):
+    """Return `count` documents where every third one is invalid."""
+    return [{'name': 'doc{0}'.format(i)} if i % 3 else {'name': i}
+            for i in xrange(count)]
+
+
+####
+##
+## prepare_documents
+##
+####
+
+class WhenPreparingDocuments(object):
+
+    def setup(self):
+        self.batch = prepare_documents(
+            ImportedDocument, [{'name': 'a'}, {'name': 1}, {'rank': 2}], 10)
+
+    def should_count_documents(self):
+        assert self.batch.start == 10
+        assert self.batch.count == 3
+
+    def should_apply_default_values(self):
+        assert self.batch.documents == [{'name': 'a', 'rank': 0}]
+
+    def should_return_plain_dicts(self):
+        assert type(self.batch.documents[0]) is dict
+
+    def should_index_documents_within_import(self):
+        assert self.batch.indexes == [10]
+
+    def should_report_invalid_documents(self):
+        assert sorted(self.batch.errors) == [11, 12]
+        assert isinstance(self.batch.errors[11], ValidationError)
+
+    def should_report_bson_size_of_documents(self):
+        assert self.batch.sizes == [
+            len(BSON.encode({'name': 'a', 'rank': 0}))]
+
+
+class WhenPreparingDocumentsWithoutValidation(object):
+
+    def should_keep_every_document(self):
+        batch = prepare_documents(
+            ImportedDocument, [{'name': 1}], validate=False)
+        assert batch.documents == [{'name': 1, 'rank': 0}]
+        assert batch.indexes == [0]
+        assert batch.errors == {}
+
+    def should_reject_documents_which_cannot_be_encoded(self):
+        batch = prepare_documents(
+            ImportedDocument, [{'name': object()}, {'name': 'a'}],
+            validate=False)
+        assert batch.indexes == [1]
+        assert isinstance(batch.errors[0], InvalidDocument)
+
+
+####
+##
+## prepare_batches
+##
+####
+
+class WhenPreparingBatchesInPool(object):
+
+    def setup(self):
+        self.documents = raw_documents(25)
+        self.batches = list(prepare_batches(
+            ImportedDocument, iter(self.documents), batch_size=4,
+            processes=2))
+
+    def should_yield_batches_in_order(self):
+        assert [batch.start for batch in self.batches] == range(0, 25, 4)
+
+    def should_prepare_every_document(self):
+        assert sum(batch.count for batch in self.batches) == 25
+
+    def should_keep_valid_documents(self):
+        indexes = sum([batch.indexes for batch in self.batches], [])
+        assert indexes == [i for i in xrange(25) if i % 3]
+
+    def should_report_invalid_documents(self):
+        errors = {}
+        for batch in self.batches:
+            errors.update(batch.errors)
+        assert sorted(errors) == range(0, 25, 3)
+
+
+####
+##
+## bulk_import
+##
+####
+
+class WhenImportingDocuments(object):
+
+    def setup(self):
+        self.written = []
+        self.progress = []
+        self.stats = bulk_import(
+            ImportedDocument, raw_documents(10), self.write, batch_size=4,
+            processes=2,
+            on_batch=lambda stats: self.progress.append(stats.documents))
+
+    def write(self, batch):
+        self.written.extend(batch.documents)
+        if batch.start == 4:
+            batch.errors[4] = Exception('Write failed')
+            return len(batch.documents) - 1
+        return len(batch.documents)
+
+    def should_write_valid_documents_in_order(self):
+        assert [doc['name'] for doc in self.written] == [
+            'doc{0}'.format(i) for i in xrange(10) if i % 3]
+
+    def should_count_documents(self):
+        assert self.stats.documents == 10
+        assert self.stats.batches == 3
+
+    def should_count_written_documents(self):
+        assert self.stats.written == 5
+
+    def should_report_validation_and_write_errors(self):
+        assert sorted(self.stats.errors) == [0, 3, 4, 6, 9]
+
+    def should_report_progress_after_each_batch(self):
+        assert self.progress == [4, 8, 10]
+
+    def should_report_throughput(self):
+        assert self.stats.elapsed > 0
+        assert self.stats.documents_per_second() > 0
+
+
+class WhenImportStatsAreEmpty(object):
+
+    def should_report_no_throughput(self):
+        assert ImportStats().documents_per_second() == 0.0
+
+
+####
+##
+## insert_batch
+##
+####
+
+class WhenInsertingBatch(object):
+
+    def setup(self):
+        self.model = Dingus()
+        self.result = BulkInsertResult([{}, {}, {}])
+        self.result.inserted = [0, 2]
+        self.result.errors = {1: Exception('Duplicate key')}
+        self.model.insert_prepared.return_value = self.result
+        self.batch = PreparedBatch(
+            5, 4, [5, 6, 8], [{}, {}, {}], {7: ValidationError()}, 0.0,
+            [5, 5, 5])
+        self.returned = insert_batch(self.model, self.batch, w=2)
+
+    def should_insert_prepared_documents_unordered(self):
+        assert self.model.insert_prepared.calls(
+            '()', self.batch.documents, self.batch.sizes, ordered=False,
+            w=2).once()
+
+    def should_return_number_inserted(self):
+        assert self.returned == 2
+
+    def should_add_write_errors_to_batch(self):
+        assert sorted(self.batch.errors) == [6, 7]
+
+
+class WhenInsertingBatchHasDuplicateKey(object):
+
+    def setup(self):
+        class Model(ImportedDocument):
+            abstract = True
+        self.bulk = Dingus('bulk')
+        self.bulk.execute = exception_raiser(BulkWriteError({
+            'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'dup'}],
+        }))
+        Model.collection = Dingus(
+            'collection', initialize_unordered_bulk_op__returns=self.bulk)
+
+        self.batch = prepare_documents(
+            Model, [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}], 10)
+        self.returned = insert_batch(Model, self.batch)
+
+    def should_insert_documents_after_duplicate(self):
+        assert len(self.bulk.calls('insert')) == 3
+        assert self.returned == 2
+
+    def should_report_duplicate_by_import_index(self):
+        assert sorted(self.batch.errors) == [11]
+        assert isinstance(self.batch.errors[11], OperationFailure)
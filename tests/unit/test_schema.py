@@ -5,6 +5,7 @@ from dingus import Dingus, DingusTestCase, DontCare
 from nose.tools import assert_raises
 
 from scalymongo.schema import *
+from scalymongo.schema_operators import IS, OR
 from tests.helpers import assert_raises_with_message
 import scalymongo.schema as mod
 
@@ -82,6 +83,7 @@ class WhenSchemaMetaclassHasBaseClasses(BaseDescribeNewSchemaMetaclass):
                         self.base_b.indexes[0]],
             'shard_index': mod.find_shard_index(),
             '_conversions': mod.make_conversion_dict(),
+            '_compiled_structure': mod.compile_structure(),
             'default_values': {
                 'a_1': 'a_1_default',
                 'b_1': 'b_1_default',
@@ -90,6 +92,46 @@ class WhenSchemaMetaclassHasBaseClasses(BaseDescribeNewSchemaMetaclass):
         }
 
 
+class WhenSchemaClassIsCreated(object):
+
+    def setup(self):
+        class MyDocument(SchemaDocument):
+            structure = {'foo': int}
+
+            def bar(self):
+                pass
+        self.MyDocument = MyDocument
+
+    def should_record_attribute_names(self):
+        assert self.MyDocument._attribute_names == frozenset(
+            dir(self.MyDocument))
+        assert 'bar' in self.MyDocument._attribute_names
+
+
+class WhenSchemaClassAttributeIsChanged(object):
+
+    def setup(self):
+        class MyDocument(SchemaDocument):
+            structure = {'foo': int}
+        class MySubDocument(MyDocument):
+            pass
+        self.MyDocument = MyDocument
+        self.MySubDocument = MySubDocument
+
+        self.MyDocument.biz = Dingus('biz')
+
+    def should_refresh_attribute_names(self):
+        assert 'biz' in self.MyDocument._attribute_names
+
+    def should_refresh_subclass_attribute_names(self):
+        assert 'biz' in self.MySubDocument._attribute_names
+
+    def should_forget_deleted_attribute_names(self):
+        del self.MyDocument.biz
+        assert 'biz' not in self.MyDocument._attribute_names
+        assert 'biz' not in self.MySubDocument._attribute_names
+
+
 ## make_conversion_dict ##
 
 class WhenStructureContainsSchemaDocumentSubclass(object):
@@ -107,6 +149,33 @@ class WhenStructureContainsSchemaDocumentSubclass(object):
         assert self.result == self.structure
 
 
+class WhenStructureContainsEmbeddedDicts(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.structure = {
+            'bar': {'baz': int},
+            'foo': [{'baz': int}],
+        }
+        cls.result = make_conversion_dict(cls.structure)
+
+    def should_wrap_embedded_dicts(self):
+        assert self.result == {'bar': {}, 'foo': {}}
+
+
+class WhenStructureContainsArraysOfPrimatives(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.structure = {'foo': [int], 'bar': [[float]]}
+        cls.result = make_conversion_dict(cls.structure)
+
+    def should_wrap_arrays_without_converting_elements(self):
+        assert self.result == {
+            'foo': mod._unconverted, 'bar': mod._unconverted}
+        assert mod._unconverted(self) is self
+
+
 class WhenStructureContainsOnlyPrimatives(object):
 
     @classmethod
@@ -243,15 +312,229 @@ class WhenValidating(DescribeSchemaDocument):
         DescribeSchemaDocument.setup(self)
         self.document.validate()
 
-    def should_validate_structure(self):
-        assert mod.validate_structure.calls(
-            '()', self.document, self.document.structure)
+    def should_validate_structure_with_compiled_structure(self):
+        assert self.document._compiled_structure.calls(
+            'validate', self.document)
 
     def should_validate_required_fields(self):
         assert mod.validate_required_fields.calls(
             '()', self.document, self.document.required_fields)
 
 
+## compile_structure ##
+
+
+class DescribeCompileStructure(DingusTestCase(compile_structure)):
+
+    def setup(self):
+        super(DescribeCompileStructure, self).setup()
+        self.structure = Dingus('structure')
+
+        self.returned = compile_structure(self.structure)
+
+    def should_compile_with_field_check_and_single_field_validator(self):
+        assert mod.CompiledStructure.calls(
+            '()', self.structure, mod.make_field_check,
+            mod.validate_single_field)
+
+    def should_return_compiled_structure(self):
+        assert self.returned == mod.CompiledStructure()
+
+
+class EmbeddedCompileExample(SchemaDocument):
+    structure = {'name': basestring}
+
+
+class DescribeCompiledStructureErrors(object):
+    """Compiled structures must raise exactly what the walker raises."""
+
+    structure = {
+        'a': int,
+        'b': {'c': [float], 'd': {basestring: int}},
+        'e': [{'f': OR(int, float), 'g': IS('x', 'y')}],
+        'h': [EmbeddedCompileExample],
+    }
+
+    def assert_same_error(self, body):
+        try:
+            validate_structure(body, self.structure)
+        except ValidationError as ex:
+            expected = str(ex)
+        else:
+            raise AssertionError('Walker did not raise for {0!r}'.format(body))
+
+        assert_raises_with_message(
+            ValidationError, expected,
+            compile_structure(self.structure).validate, body)
+
+    def should_accept_valid_body(self):
+        compile_structure(self.structure).validate({
+            'a': 1,
+            'b': {'c': [1.5], 'd': {'k': 1}},
+            'e': [{'f': 2.5, 'g': 'x'}],
+            'h': [EmbeddedCompileExample(name='n')],
+        })
+
+    def should_accept_positional_array_keys(self):
+        compile_structure(self.structure).validate(
+            {'e': {'0': {'f': 1}, '$': {'g': 'y'}}})
+
+    def should_match_top_level_type_error(self):
+        self.assert_same_error({'a': 'one'})
+
+    def should_match_top_level_unknown_field_error(self):
+        self.assert_same_error({'a': 1, 'z': 2})
+
+    def should_match_nested_unknown_field_error(self):
+        self.assert_same_error({'b': {'z': 2}})
+
+    def should_match_array_element_error(self):
+        self.assert_same_error({'b': {'c': [1.5, 'two']}})
+
+    def should_match_type_keyed_error(self):
+        self.assert_same_error({'b': {'d': {'k': 1.5}}})
+
+    def should_match_embedded_array_document_error(self):
+        self.assert_same_error({'e': [{'f': 1}, {'g': 'z'}]})
+
+    def should_match_positional_array_key_error(self):
+        self.assert_same_error({'e': {'1': {'f': 'bad'}}})
+
+    def should_match_embedded_schema_document_error(self):
+        self.assert_same_error({'h': [{'name': 'n'}]})
+
+
+class DescribeCompiledStructureValidatePaths(DescribeCompiledStructureErrors):
+
+    def assert_same_path_error(self, body, path):
+        try:
+            validate_structure(body, self.structure)
+        except ValidationError as ex:
+            expected = str(ex)
+        else:
+            raise AssertionError('Walker did not raise for {0!r}'.format(body))
+
+        assert_raises_with_message(
+            ValidationError, expected,
+            compile_structure(self.structure).validate_paths, body, [path])
+
+    def should_only_check_given_paths(self):
+        compile_structure(self.structure).validate_paths(
+            {'a': 'one', 'b': {'c': [1.5]}}, [('b', 'c')])
+
+    def should_match_array_element_error(self):
+        self.assert_same_path_error(
+            {'b': {'c': [1.5, 'two']}}, ('b', 'c', 1))
+
+    def should_match_unknown_field_error(self):
+        self.assert_same_path_error({'b': {'z': 2}}, ('b', 'z'))
+
+    def should_match_type_keyed_error(self):
+        self.assert_same_path_error({'b': {'d': {'k': 1.5}}}, ('b', 'd', 'k'))
+
+    def should_match_embedded_array_document_error(self):
+        self.assert_same_path_error(
+            {'e': [{'f': 1}, {'g': 'z'}]}, ('e', 1, 'g'))
+
+    def should_check_whole_value_at_path(self):
+        self.assert_same_path_error({'b': {'c': [1.5, 'two']}}, ('b',))
+
+    def should_skip_removed_values(self):
+        compile_structure(self.structure).validate_paths(
+            {'b': {'c': []}, 'e': []}, [('b', 'c', 3), ('e', 0, 'f')])
+
+
+class IncrementalDocument(SchemaDocument):
+    structure = {'a': int, 'items': [{'n': int}]}
+    required_fields = set(['a'])
+    incremental_validation = True
+
+
+class BaseIncrementalValidation(object):
+
+    def setup(self):
+        self.document = IncrementalDocument(
+            {'a': 1, 'items': [{'n': 1}, {'n': 2}]})
+        self.document.validate()
+
+
+class WhenValidatingIncrementallyForTheFirstTime(object):
+
+    def should_validate_whole_document(self):
+        document = IncrementalDocument({'a': 'one'})
+        assert_raises(ValidationError, document.validate)
+
+
+class WhenValidatingUnchangedDocumentIncrementally(BaseIncrementalValidation):
+
+    def should_not_walk_document_again(self):
+        # Bypass change tracking to show the value isn't looked at again.
+        dict.__setitem__(self.document, 'a', 'one')
+        self.document.validate()
+
+
+class WhenValidatingChangedDocumentIncrementally(BaseIncrementalValidation):
+
+    def setup(self):
+        BaseIncrementalValidation.setup(self)
+        self.document['items'][1]['n'] = 'two'
+
+    def should_check_changed_value(self):
+        assert_raises_with_message(
+            ValidationError,
+            "Position 'items.1.n' was declared to be <type 'int'>,"
+            " but encountered value 'two'",
+            self.document.validate)
+
+    def should_check_changed_value_until_it_is_valid(self):
+        assert_raises(ValidationError, self.document.validate)
+        assert_raises(ValidationError, self.document.validate)
+        self.document['items'][1]['n'] = 2
+        self.document.validate()
+
+
+class WhenRemovingRequiredFieldOfIncrementallyValidatedDocument(
+        BaseIncrementalValidation):
+
+    def should_check_required_fields(self):
+        del self.document['a']
+        assert_raises(ValidationError, self.document.validate)
+
+
+class WhenAddingUnknownFieldToIncrementallyValidatedDocument(
+        BaseIncrementalValidation):
+
+    def should_reject_unknown_field(self):
+        self.document['z'] = 1
+        assert_raises(ValidationError, self.document.validate)
+
+
+## make_field_check ##
+
+
+class WhenMakingFieldCheckForSchemaOperator(object):
+
+    def setup(self):
+        self.expected_type = Dingus('expected_type')
+
+        self.returned = make_field_check(self.expected_type)
+
+    def should_return_evaluate(self):
+        assert self.returned == self.expected_type.evaluate
+
+
+class WhenMakingFieldCheckForSimpleClass(object):
+
+    def setup(self):
+        self.returned = make_field_check(int)
+
+    def should_accept_instances(self):
+        assert self.returned(1)
+
+    def should_reject_other_values(self):
+        assert not self.returned(1.5)
+
+
 ## validate_structure ##
 
 
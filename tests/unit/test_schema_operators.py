@@ -73,6 +73,9 @@ class DescribeEvaluatorIs(object):
     def should_evaluate_others_as_false(self):
         assert self.is_.evaluate(Dingus()) is False
 
+    def should_evaluate_unhashable_values_as_false(self):
+        assert self.is_.evaluate([self.arg0]) is False
+
 
 class WhenComparingIsDeclarations(object):
 
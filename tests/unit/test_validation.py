@@ -0,0 +1,85 @@
+from nose.tools import assert_raises
+
+from scalymongo.errors import ValidationError
+from scalymongo.validation import *
+
+
+def valid():
+    pass
+
+
+def invalid():
+    raise ValidationError('invalid')
+
+
+class FakeRandom(object):
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def __call__(self):
+        return self.values.pop(0)
+
+
+####
+##
+## ALWAYS and NEVER
+##
+####
+
+class DescribeAlways(object):
+
+    def should_raise_validation_errors(self):
+        assert_raises(ValidationError, ALWAYS.run, invalid)
+
+
+class DescribeNever(object):
+
+    def should_not_validate(self):
+        NEVER.run(invalid)
+
+
+####
+##
+## SampledValidation
+##
+####
+
+class WhenValidatingSample(object):
+
+    def setup(self):
+        self.failures = []
+        self.policy = SampledValidation(
+            0.5, on_failure=self.failures.append,
+            random=FakeRandom([0.1, 0.7, 0.4, 0.5]))
+        for validate in [invalid, invalid, valid, invalid]:
+            self.policy.run(validate)
+
+    def should_count_checked_and_skipped_writes(self):
+        assert self.policy.stats() == {
+            'checked': 2, 'skipped': 2, 'failures': 1}
+
+    def should_report_failures_to_hook(self):
+        assert len(self.failures) == 1
+        assert isinstance(self.failures[0], ValidationError)
+
+
+class WhenSampledValidationRaisesFailures(object):
+
+    def setup(self):
+        self.policy = SampledValidation(
+            1.0, raise_failures=True, random=FakeRandom([0.0]))
+
+    def should_count_and_raise_failure(self):
+        assert_raises(ValidationError, self.policy.run, invalid)
+        assert self.policy.failures == 1
+
+
+class WhenSampledValidationHasNoHook(object):
+
+    def setup(self):
+        self.policy = SampledValidation(1.0, random=FakeRandom([0.0]))
+
+    def should_not_raise_failure(self):
+        self.policy.run(invalid)
+        assert self.policy.failures == 1